@@ -0,0 +1,174 @@
+"""
+Batch Scoring Engine
+Vectorized domain-wise scoring for many candidates at once
+"""
+
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+
+from config import SCORING_WEIGHTS
+from metrics import timed
+from ai_engine.scoring import DIFFICULTY_SCORES, MAX_REASONABLE_TIME
+
+@timed('calculate_scores_batch')
+def calculate_scores_batch(candidates):
+    """
+    Calculate skill scores for many candidates in one vectorized pass
+
+    Produces the same scores as calling ``calculate_score`` per candidate.
+
+    Args:
+        candidates: List of dictionaries with ``candidate_id`` and ``responses``
+
+    Returns:
+        List of ``{"candidate_id": ..., "scores": {...}}`` in input order
+    """
+    frame, groups = build_response_frame(candidates)
+    results = [{'candidate_id': c.get('candidate_id'), 'scores': {}} for c in candidates]
+
+    if frame.empty:
+        return results
+
+    components = score_groups(frame, len(groups))
+
+    # Convert to Python floats once so rounding matches the scalar path
+    columns = {name: values.tolist() for name, values in components.items()}
+    for group_id, (candidate_idx, domain) in enumerate(groups):
+        results[candidate_idx]['scores'][domain] = {
+            'skill_score': round(columns['task_performance'][group_id], 2),
+            'accuracy_score': round(columns['accuracy'][group_id], 2),
+            'time_score': round(columns['time_efficiency'][group_id], 2),
+            'learning_score': round(columns['learning_indicators'][group_id], 2),
+            'total_score': round(columns['total'][group_id], 2)
+        }
+
+    return results
+
+def iter_scores_batched(candidates, batch_size=500):
+    """
+    Score an iterable of candidates in chunks of ``batch_size``
+
+    Only one chunk is held in memory at a time, so ``candidates`` can be a
+    lazily parsed stream.
+
+    Yields:
+        Lists of ``{"candidate_id": ..., "scores": {...}}``, one per chunk
+    """
+    iterator = iter(candidates)
+    while True:
+        chunk = list(islice(iterator, batch_size))
+        if not chunk:
+            return
+        yield calculate_scores_batch(chunk)
+
+def build_response_frame(candidates):
+    """
+    Flatten all candidate responses into a columnar frame
+
+    Returns:
+        Tuple of (DataFrame with one row per response, list of
+        (candidate index, domain) per group id in first-seen order)
+    """
+    group_ids = []
+    is_correct = []
+    has_time = []
+    time_taken = []
+    difficulty = []
+    submitted_at = []
+    groups = []
+
+    for candidate_idx, candidate in enumerate(candidates):
+        domain_groups = {}
+        for response in candidate.get('responses') or []:
+            domain = response.get('domain', 'general')
+            group_id = domain_groups.get(domain)
+            if group_id is None:
+                group_id = domain_groups[domain] = len(groups)
+                groups.append((candidate_idx, domain))
+
+            time_value = response.get('time_taken')
+            group_ids.append(group_id)
+            is_correct.append(bool(response.get('is_correct', False)))
+            has_time.append(bool(time_value))
+            time_taken.append(time_value if time_value else 0)
+            difficulty.append(DIFFICULTY_SCORES.get(response.get('difficulty', 'medium'), 66))
+            submitted_at.append(response.get('submitted_at', ''))
+
+    frame = pd.DataFrame({
+        'group': np.asarray(group_ids, dtype=np.int64),
+        'is_correct': np.asarray(is_correct, dtype=np.float64),
+        'has_time': np.asarray(has_time, dtype=np.float64),
+        'time_taken': np.asarray(time_taken, dtype=np.float64),
+        'difficulty': np.asarray(difficulty, dtype=np.float64),
+        'submitted_at': pd.Series(submitted_at, dtype=object)
+    })
+    return frame, groups
+
+def score_groups(frame, group_count):
+    """
+    Compute every SCORING_WEIGHTS component per (candidate, domain) group
+
+    Returns:
+        Dictionary of component name to array indexed by group id
+    """
+    group = frame['group'].to_numpy()
+    correct = frame['is_correct'].to_numpy()
+
+    count = np.bincount(group, minlength=group_count).astype(np.float64)
+    correct_count = np.bincount(group, weights=correct, minlength=group_count)
+    time_count = np.bincount(group, weights=frame['has_time'].to_numpy(), minlength=group_count)
+    time_sum = np.bincount(group, weights=frame['time_taken'].to_numpy(), minlength=group_count)
+    difficulty_sum = np.bincount(group, weights=frame['difficulty'].to_numpy(), minlength=group_count)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        task_performance = (correct_count / count) * 100
+
+        avg_time = time_sum / time_count
+        efficiency = np.maximum(0, 100 - (avg_time / MAX_REASONABLE_TIME * 100))
+        time_efficiency = np.where(time_count > 0, np.minimum(100, np.maximum(0, efficiency)), 50.0)
+
+        learning_indicators = _learning_indicators(frame, group, correct, count, group_count)
+
+        avg_difficulty = difficulty_sum / count
+
+    total = (
+        task_performance * SCORING_WEIGHTS['task_performance'] +
+        task_performance * SCORING_WEIGHTS['accuracy'] +
+        time_efficiency * SCORING_WEIGHTS['time_efficiency'] +
+        learning_indicators * SCORING_WEIGHTS['learning_indicators'] +
+        avg_difficulty * SCORING_WEIGHTS['difficulty']
+    )
+
+    return {
+        'task_performance': task_performance,
+        'accuracy': task_performance,
+        'time_efficiency': time_efficiency,
+        'learning_indicators': learning_indicators,
+        'difficulty': avg_difficulty,
+        'total': total
+    }
+
+def _learning_indicators(frame, group, correct, count, group_count):
+    """Half-split improvement per group, ordered by submission time"""
+    # Stable sort by (group, submitted_at), matching sorted() per domain
+    submitted_codes, _ = pd.factorize(frame['submitted_at'], sort=True)
+    order = np.lexsort((submitted_codes, group))
+    sorted_group = group[order]
+
+    group_start = np.concatenate(([0], np.cumsum(count)[:-1])).astype(np.int64)
+    position = np.arange(len(order)) - group_start[sorted_group]
+    half = count // 2
+
+    in_first_half = position < half[sorted_group]
+    first_correct = np.bincount(sorted_group, weights=correct[order] * in_first_half, minlength=group_count)
+    second_correct = np.bincount(group, weights=correct, minlength=group_count) - first_correct
+
+    first_accuracy = (first_correct / half) * 100
+    second_accuracy = (second_correct / (count - half)) * 100
+
+    improvement = ((second_accuracy - first_accuracy) / first_accuracy) * 100
+    improvement = np.minimum(100, np.maximum(0, 50 + improvement))
+
+    return np.where((count < 2) | (first_accuracy == 0), 50.0, improvement)
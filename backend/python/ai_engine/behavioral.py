@@ -3,6 +3,9 @@ Behavioral Analysis Engine
 Analyzes response patterns and learning trends
 """
 
+from metrics import timed
+
+@timed('analyze_behavior')
 def analyze_behavior(candidate_id, responses):
     """
     Analyze candidate behavior and learning patterns
@@ -26,17 +29,9 @@ def analyze_behavior(candidate_id, responses):
     # Sort responses by time (if available)
     sorted_responses = sorted(responses, key=lambda x: x.get('submitted_at', ''))
     
-    # Calculate improvement trend
-    improvement_trend = calculate_improvement_trend(sorted_responses)
-    
-    # Calculate adaptability (how well they adapt to different difficulty levels)
-    adaptability_score = calculate_adaptability(responses)
-    
-    # Calculate learning curve
-    learning_curve = calculate_learning_curve(sorted_responses)
-    
-    # Analyze response patterns
-    response_pattern = analyze_response_patterns(responses)
+    # Compute all metrics with one pass over each ordering
+    improvement_trend, adaptability_score, learning_curve, response_pattern = \
+        analyze_responses(responses, sorted_responses)
     
     return {
         'candidate_id': candidate_id,
@@ -46,6 +41,125 @@ def analyze_behavior(candidate_id, responses):
         'response_pattern': response_pattern
     }
 
+@timed('analyze_behavior_batch')
+def analyze_behavior_batch(candidates):
+    """
+    Analyze behavior for many candidates
+    
+    Args:
+        candidates: List of dictionaries with candidate_id and responses
+        
+    Returns:
+        List of behavioral analysis dictionaries in input order
+    """
+    return [
+        analyze_behavior(candidate.get('candidate_id'), candidate.get('responses', []))
+        for candidate in candidates
+    ]
+
+def analyze_responses(responses, sorted_responses):
+    """
+    Fused equivalent of the four behavioral metrics
+    
+    Produces the same values as calculate_improvement_trend,
+    calculate_adaptability, calculate_learning_curve and
+    analyze_response_patterns, using constant extra memory. Like those
+    functions, the difficulty and time statistics read the responses in
+    submission order (float sums and dictionary key order depend on it) and
+    only the half/third splits read them in time order.
+    
+    Args:
+        responses: Responses as submitted
+        sorted_responses: The same responses sorted by submission time
+        
+    Returns:
+        Tuple of (improvement_trend, adaptability_score, learning_curve,
+        response_pattern)
+    """
+    total = len(sorted_responses)
+    mid = total // 2
+    third_size = total // 3
+    
+    correct_total = 0
+    difficulty_totals = {'easy': 0, 'medium': 0, 'hard': 0}
+    difficulty_correct = {'easy': 0, 'medium': 0, 'hard': 0}
+    difficulty_distribution = {}
+    time_sum = 0
+    time_count = 0
+    
+    for response in responses:
+        is_correct = 1 if response.get('is_correct', False) else 0
+        difficulty = response.get('difficulty', 'medium')
+        time_taken = response.get('time_taken')
+        
+        correct_total += is_correct
+        difficulty_totals[difficulty] += 1
+        difficulty_correct[difficulty] += is_correct
+        difficulty_distribution[difficulty] = difficulty_distribution.get(difficulty, 0) + 1
+        
+        if time_taken:
+            time_sum += time_taken
+            time_count += 1
+    
+    first_half_correct = 0
+    third_correct = [0, 0, 0]
+    
+    for idx, response in enumerate(sorted_responses):
+        is_correct = 1 if response.get('is_correct', False) else 0
+        if idx < mid:
+            first_half_correct += is_correct
+        if idx < third_size:
+            third_correct[0] += is_correct
+        elif idx < 2 * third_size:
+            third_correct[1] += is_correct
+        else:
+            third_correct[2] += is_correct
+    
+    # Improvement trend (first half vs second half)
+    improvement_trend = 0.0
+    if total >= 2:
+        first_rate = first_half_correct / mid
+        second_rate = (correct_total - first_half_correct) / (total - mid)
+        if first_rate != 0:
+            improvement_trend = ((second_rate - first_rate) / first_rate) * 100
+    
+    # Adaptability (consistency across difficulty levels)
+    performance_scores = [
+        difficulty_correct[difficulty] / count * 100
+        for difficulty, count in difficulty_totals.items()
+        if count
+    ]
+    adaptability_score = 50.0
+    if performance_scores:
+        avg_performance = sum(performance_scores) / len(performance_scores)
+        variance = sum((s - avg_performance) ** 2 for s in performance_scores) / len(performance_scores)
+        adaptability_score = max(0, 100 - (variance * 10))
+    
+    # Learning curve (first third vs last third)
+    learning_curve = 50.0
+    if total >= 3:
+        third_sizes = [third_size, third_size, total - 2 * third_size]
+        accuracies = [
+            correct / size * 100
+            for correct, size in zip(third_correct, third_sizes)
+            if size
+        ]
+        if len(accuracies) >= 2:
+            if len(accuracies) == 3:
+                slope = (accuracies[2] - accuracies[0]) / 2
+            else:
+                slope = accuracies[-1] - accuracies[0]
+            learning_curve = min(100, max(0, 50 + slope))
+    
+    response_pattern = {
+        'total_responses': total,
+        'correct_responses': correct_total,
+        'average_time': time_sum / time_count if time_count else 0,
+        'difficulty_distribution': difficulty_distribution
+    }
+    
+    return improvement_trend, adaptability_score, learning_curve, response_pattern
+
 def calculate_improvement_trend(responses):
     """Calculate improvement percentage over time"""
     if len(responses) < 2:
@@ -0,0 +1,178 @@
+"""
+Explanation Engine
+Per-candidate score explanations, cached until scores change
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from config import SCORING_WEIGHTS, EXPLANATION_CACHE_SIZE, EXPLANATION_TTL_SECONDS
+from ai_engine.ranking import calculate_overall_score
+
+# Domain score fields for each weighted component (difficulty is not reported
+# per domain, so its contribution is what remains of the total score)
+COMPONENT_FIELDS = {
+    'task_performance': 'skill_score',
+    'accuracy': 'accuracy_score',
+    'time_efficiency': 'time_score',
+    'learning_indicators': 'learning_score'
+}
+
+STRENGTH_THRESHOLD = 75
+
+def build_explanation(scores, behavior=None):
+    """
+    Build a structured explanation from domain scores
+
+    Args:
+        scores: Domain-wise scores as returned by ``calculate_score``
+        behavior: Optional behavioral analysis from ``analyze_behavior``
+
+    Returns:
+        Dictionary with summary, per-domain component breakdown, strengths
+        and behavioral highlights
+    """
+    overall_score = calculate_overall_score(scores)
+
+    domains = {}
+    strengths = []
+    for domain, score_data in scores.items():
+        if not isinstance(score_data, dict):
+            score_data = {'total_score': score_data}
+        total_score = score_data.get('total_score', 0)
+
+        domains[domain] = {
+            'total_score': total_score,
+            'components': _component_breakdown(score_data, total_score)
+        }
+        if total_score >= STRENGTH_THRESHOLD:
+            strengths.append(domain.replace('_', ' ').title())
+
+    highlights = behavioral_highlights(behavior) if behavior else []
+
+    if overall_score >= 80:
+        summary = [f"Excellent overall performance ({overall_score:.1f}%)"]
+    elif overall_score >= 60:
+        summary = [f"Good overall performance ({overall_score:.1f}%)"]
+    else:
+        summary = [f"Average performance ({overall_score:.1f}%)"]
+    if strengths:
+        summary.append(f"Strong in: {', '.join(strengths)}")
+    summary.extend(highlights)
+
+    return {
+        'summary': ". ".join(summary) + ".",
+        'overall_score': round(overall_score, 2),
+        'domains': domains,
+        'strengths': strengths,
+        'behavioral_highlights': highlights
+    }
+
+def _component_breakdown(score_data, total_score):
+    components = {}
+    weighted_sum = 0
+    for component, field in COMPONENT_FIELDS.items():
+        if field not in score_data:
+            continue
+        contribution = score_data[field] * SCORING_WEIGHTS[component]
+        weighted_sum += contribution
+        components[component] = {
+            'score': score_data[field],
+            'weight': SCORING_WEIGHTS[component],
+            'contribution': round(contribution, 2)
+        }
+
+    if components:
+        contribution = total_score - weighted_sum
+        components['difficulty'] = {
+            'score': round(contribution / SCORING_WEIGHTS['difficulty'], 2) if SCORING_WEIGHTS['difficulty'] else 0,
+            'weight': SCORING_WEIGHTS['difficulty'],
+            'contribution': round(contribution, 2)
+        }
+    return components
+
+def behavioral_highlights(behavior):
+    """Short notes on the notable parts of a behavioral analysis"""
+    highlights = []
+
+    trend = behavior.get('improvement_trend', 0)
+    if trend >= 10:
+        highlights.append(f"Improved {trend:.1f}% over the assessment")
+    elif trend <= -10:
+        highlights.append(f"Accuracy dropped {abs(trend):.1f}% over the assessment")
+
+    if behavior.get('adaptability_score', 0) >= 80:
+        highlights.append("Consistent across difficulty levels")
+
+    if behavior.get('learning_curve', 0) >= 70:
+        highlights.append("Strong learning curve")
+
+    return highlights
+
+class ExplanationCache:
+    """
+    Explanations keyed by candidate, rebuilt only after scores change
+
+    Score and behavior updates replace the stored inputs and invalidate the
+    cached explanation, which is built again on the next read. Entries
+    expire ``ttl_seconds`` after their last update and the least recently
+    used are evicted beyond ``max_entries``.
+    """
+
+    def __init__(self, ttl_seconds=3600, max_entries=50000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def update_scores(self, candidate_id, scores):
+        self._update(candidate_id, 'scores', scores)
+
+    def update_behavior(self, candidate_id, behavior):
+        self._update(candidate_id, 'behavior', behavior)
+
+    def invalidate(self, candidate_id):
+        with self._lock:
+            self._entries.pop(candidate_id, None)
+
+    def get(self, candidate_id):
+        """
+        Return the candidate's explanation, or None if no scores are cached
+
+        The returned dictionary is shared and must not be modified.
+        """
+        with self._lock:
+            entry = self._entries.get(candidate_id)
+            if entry is None:
+                return None
+            if entry['expires_at'] <= time.monotonic():
+                del self._entries[candidate_id]
+                return None
+            self._entries.move_to_end(candidate_id)
+
+            if entry['scores'] is None:
+                return None
+            if entry['explanation'] is None:
+                entry['explanation'] = build_explanation(entry['scores'], entry['behavior'])
+            return entry['explanation']
+
+    def _update(self, candidate_id, field, value):
+        if candidate_id is None:
+            return
+
+        with self._lock:
+            entry = self._entries.get(candidate_id)
+            if entry is None:
+                entry = self._entries[candidate_id] = {'scores': None, 'behavior': None}
+            else:
+                self._entries.move_to_end(candidate_id)
+
+            entry[field] = value
+            entry['explanation'] = None
+            entry['expires_at'] = time.monotonic() + self.ttl_seconds
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+explanations = ExplanationCache(EXPLANATION_TTL_SECONDS, EXPLANATION_CACHE_SIZE)
@@ -0,0 +1,268 @@
+"""
+Incremental Scoring Engine
+Maintains running per-domain scoring state that is updated one response at a time
+"""
+
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+
+from config import SCORING_WEIGHTS, INCREMENTAL_STATE_MAX_CANDIDATES
+from ai_engine.scoring import DIFFICULTY_SCORES, MAX_REASONABLE_TIME
+
+class HalfSplitCounter:
+    """
+    Correct counts for the first and second half of a time-ordered sequence
+
+    Appending in submission order is O(1); a response that arrives out of
+    order is inserted at its sorted position and the halves are recounted.
+
+    The keys and outcomes of every response are kept, and serialized, on
+    purpose. The midpoint moves one position for every two appends, so each
+    second-half outcome is needed again when it crosses into the first
+    half, and a late arrival can land before the midpoint and push first-half
+    responses back across it. Counters and boundary values alone cannot
+    reproduce ``calculate_learning_indicators`` exactly; the state costs one
+    key and one character per response.
+    """
+
+    def __init__(self):
+        self.keys = []
+        self.outcomes = bytearray()
+        self.first_correct = 0
+        self.second_correct = 0
+
+    def __len__(self):
+        return len(self.outcomes)
+
+    @property
+    def first_size(self):
+        return len(self.outcomes) // 2
+
+    @property
+    def second_size(self):
+        return len(self.outcomes) - len(self.outcomes) // 2
+
+    def add(self, key, is_correct):
+        outcome = 1 if is_correct else 0
+
+        if not self.keys or key >= self.keys[-1]:
+            old_mid = self.first_size
+            self.keys.append(key)
+            self.outcomes.append(outcome)
+            self.second_correct += outcome
+
+            # One element crosses from the second half into the first
+            if self.first_size > old_mid:
+                moved = self.outcomes[old_mid]
+                self.first_correct += moved
+                self.second_correct -= moved
+            return
+
+        # Same position a stable sort of the full history would give
+        idx = bisect_right(self.keys, key)
+        self.keys.insert(idx, key)
+        self.outcomes.insert(idx, outcome)
+        mid = self.first_size
+        self.first_correct = sum(self.outcomes[:mid])
+        self.second_correct = sum(self.outcomes[mid:])
+
+    def to_dict(self):
+        """Serialized history; grows by one key and one outcome per response (see class docstring)"""
+        return {
+            'keys': list(self.keys),
+            'outcomes': self.outcomes.translate(_OUTCOMES_TO_TEXT).decode('ascii')
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        counter = cls()
+        counter.keys = list(data.get('keys', []))
+        counter.outcomes = bytearray(data.get('outcomes', '').encode('ascii').translate(_TEXT_TO_OUTCOMES))
+        mid = counter.first_size
+        counter.first_correct = sum(counter.outcomes[:mid])
+        counter.second_correct = sum(counter.outcomes[mid:])
+        return counter
+
+# Outcomes are serialized as a compact string of '0' and '1'
+_OUTCOMES_TO_TEXT = bytes.maketrans(b'\x00\x01', b'01')
+_TEXT_TO_OUTCOMES = bytes.maketrans(b'01', b'\x00\x01')
+
+class DomainScoreState:
+    """Running accumulators for one candidate domain"""
+
+    def __init__(self):
+        self.count = 0
+        self.correct = 0
+        self.time_count = 0
+        self.time_sum = 0
+        self.difficulty_sum = 0
+        self.half_split = HalfSplitCounter()
+
+    def add(self, response):
+        """Apply one response in O(1) (amortized, for in-order arrivals)"""
+        is_correct = bool(response.get('is_correct', False))
+        time_taken = response.get('time_taken')
+
+        self.count += 1
+        self.correct += 1 if is_correct else 0
+        if time_taken:
+            self.time_count += 1
+            self.time_sum += time_taken
+        self.difficulty_sum += DIFFICULTY_SCORES.get(response.get('difficulty', 'medium'), 66)
+        self.half_split.add(response.get('submitted_at', ''), is_correct)
+
+    def scores(self):
+        """Return the same dictionary ``calculate_score`` builds for a domain"""
+        task_performance = (self.correct / self.count) * 100
+        accuracy_score = task_performance
+
+        if self.time_count:
+            avg_time = self.time_sum / self.time_count
+            efficiency = max(0, 100 - (avg_time / MAX_REASONABLE_TIME * 100))
+            time_score = min(100, max(0, efficiency))
+        else:
+            time_score = 50.0
+
+        learning_score = self._learning_score()
+        avg_difficulty = self.difficulty_sum / self.count
+
+        total_score = (
+            task_performance * SCORING_WEIGHTS['task_performance'] +
+            accuracy_score * SCORING_WEIGHTS['accuracy'] +
+            time_score * SCORING_WEIGHTS['time_efficiency'] +
+            learning_score * SCORING_WEIGHTS['learning_indicators'] +
+            avg_difficulty * SCORING_WEIGHTS['difficulty']
+        )
+
+        return {
+            'skill_score': round(task_performance, 2),
+            'accuracy_score': round(accuracy_score, 2),
+            'time_score': round(time_score, 2),
+            'learning_score': round(learning_score, 2),
+            'total_score': round(total_score, 2)
+        }
+
+    def _learning_score(self):
+        if self.count < 2:
+            return 50.0
+
+        half_split = self.half_split
+        first_accuracy = (half_split.first_correct / half_split.first_size) * 100
+        second_accuracy = (half_split.second_correct / half_split.second_size) * 100
+
+        if first_accuracy == 0:
+            return 50.0
+
+        improvement = ((second_accuracy - first_accuracy) / first_accuracy) * 100
+        return min(100, max(0, 50 + improvement))
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'correct': self.correct,
+            'time_count': self.time_count,
+            'time_sum': self.time_sum,
+            'difficulty_sum': self.difficulty_sum,
+            'half_split': self.half_split.to_dict()
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls()
+        state.count = data.get('count', 0)
+        state.correct = data.get('correct', 0)
+        state.time_count = data.get('time_count', 0)
+        state.time_sum = data.get('time_sum', 0)
+        state.difficulty_sum = data.get('difficulty_sum', 0)
+        state.half_split = HalfSplitCounter.from_dict(data.get('half_split', {}))
+        return state
+
+class CandidateScoreState:
+    """Incremental scoring state for one candidate across domains"""
+
+    def __init__(self):
+        self.domains = {}
+
+    def add(self, response):
+        domain = response.get('domain', 'general')
+        state = self.domains.get(domain)
+        if state is None:
+            state = self.domains[domain] = DomainScoreState()
+        state.add(response)
+        return domain
+
+    def add_many(self, responses):
+        """Apply responses and return the set of domains they touched"""
+        return {self.add(response) for response in responses}
+
+    def scores(self, domains=None):
+        """Return domain-wise scores, optionally only for the given domains"""
+        return {
+            domain: state.scores()
+            for domain, state in self.domains.items()
+            if domains is None or domain in domains
+        }
+
+    def to_dict(self):
+        return {
+            'domains': [
+                {'domain': domain, **state.to_dict()}
+                for domain, state in self.domains.items()
+            ]
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls()
+        for domain_data in data.get('domains', []):
+            state.domains[domain_data.get('domain')] = DomainScoreState.from_dict(domain_data)
+        return state
+
+class ScoreStateStore:
+    """In-process store of candidate scoring states, bounded by LRU eviction"""
+
+    def __init__(self, max_candidates=10000):
+        self.max_candidates = max_candidates
+        self._states = OrderedDict()
+        self._lock = threading.Lock()
+
+    def apply(self, candidate_id, responses, state=None, reset=False):
+        """
+        Apply new responses to a candidate's state
+
+        Args:
+            candidate_id: Candidate ID
+            responses: New response dictionaries, in submission order
+            state: Optional serialized state to resume from
+            reset: Discard any stored state first
+
+        Returns:
+            Tuple of (CandidateScoreState, set of touched domains)
+        """
+        with self._lock:
+            if state is not None:
+                current = CandidateScoreState.from_dict(state)
+            elif reset or candidate_id not in self._states:
+                current = CandidateScoreState()
+            else:
+                current = self._states[candidate_id]
+
+            touched = current.add_many(responses)
+
+            self._states[candidate_id] = current
+            self._states.move_to_end(candidate_id)
+            while len(self._states) > self.max_candidates:
+                self._states.popitem(last=False)
+
+            return current, touched
+
+    def get(self, candidate_id):
+        with self._lock:
+            return self._states.get(candidate_id)
+
+    def remove(self, candidate_id):
+        with self._lock:
+            self._states.pop(candidate_id, None)
+
+score_states = ScoreStateStore(INCREMENTAL_STATE_MAX_CANDIDATES)
@@ -0,0 +1,201 @@
+"""
+Leaderboard Engine
+Persistent per-role candidate rankings with incremental updates
+"""
+
+import atexit
+import json
+import math
+import os
+import threading
+
+from sortedcontainers import SortedList
+
+from config import LEADERBOARD_SNAPSHOT_PATH
+from ai_engine.ranking import calculate_overall_score, generate_explanation
+
+SNAPSHOT_VERSION = 1
+
+class Leaderboard:
+    """
+    Ranked candidates for one role
+
+    Candidates are ordered by rounded overall score (descending) and then by
+    first insertion, the same tie-breaking ``rank_candidates`` uses for input
+    order. Insert, update, remove and rank lookups are O(log n).
+    """
+
+    def __init__(self, role_match):
+        self.role_match = role_match
+        self._order = SortedList()
+        self._entries = {}
+        self._next_seq = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def upsert(self, candidate_id, scores=None, overall_score=None):
+        """
+        Insert or update a candidate and return its new rank position
+
+        Args:
+            candidate_id: Candidate ID
+            scores: Domain scores (used to compute the overall score)
+            overall_score: Overall score, if already known
+
+        Raises:
+            ValueError: If the overall score is not a finite number
+        """
+        if overall_score is None:
+            overall_score = calculate_overall_score(scores or {})
+        overall_score = round(float(overall_score), 2)
+        if not math.isfinite(overall_score):
+            raise ValueError(f'Overall score must be a finite number, got {overall_score}')
+
+        existing = self._entries.get(candidate_id)
+        if existing is not None:
+            self._order.remove(existing['key'])
+            seq = existing['key'][1]
+        else:
+            seq = self._next_seq
+            self._next_seq += 1
+
+        key = (-overall_score, seq, candidate_id)
+        self._entries[candidate_id] = {
+            'key': key,
+            'candidate_id': candidate_id,
+            'overall_score': overall_score,
+            'scores': scores if scores is not None else (existing or {}).get('scores', {})
+        }
+        self._order.add(key)
+        return self._order.index(key) + 1
+
+    def remove(self, candidate_id):
+        """Remove a candidate. Returns False if it was not ranked."""
+        entry = self._entries.pop(candidate_id, None)
+        if entry is None:
+            return False
+        self._order.remove(entry['key'])
+        return True
+
+    def get(self, candidate_id):
+        """Return the candidate's ranked row, or None"""
+        entry = self._entries.get(candidate_id)
+        if entry is None:
+            return None
+        rank_position = self._order.index(entry['key']) + 1
+        return self._row(entry, rank_position)
+
+    def range(self, offset=0, limit=None):
+        """Return ranked rows ``offset`` to ``offset + limit``"""
+        stop = None if limit is None else offset + limit
+        return [
+            self._row(self._entries[item[2]], rank_position)
+            for rank_position, item in enumerate(self._order.islice(offset, stop), start=offset + 1)
+        ]
+
+    def _row(self, entry, rank_position):
+        scores = entry['scores']
+        return {
+            'candidate_id': entry['candidate_id'],
+            'overall_score': entry['overall_score'],
+            'rank_position': rank_position,
+            'explanation': generate_explanation(entry, scores, self.role_match, avg_score=entry['overall_score']),
+            'scores': scores
+        }
+
+    def to_dict(self):
+        return {
+            'role_match': self.role_match,
+            'next_seq': self._next_seq,
+            'entries': [
+                {
+                    'candidate_id': item[2],
+                    'overall_score': self._entries[item[2]]['overall_score'],
+                    'seq': item[1],
+                    'scores': self._entries[item[2]]['scores']
+                }
+                for item in self._order
+            ]
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        leaderboard = cls(data['role_match'])
+        for entry in data.get('entries', []):
+            key = (-entry['overall_score'], entry['seq'], entry['candidate_id'])
+            leaderboard._entries[entry['candidate_id']] = {
+                'key': key,
+                'candidate_id': entry['candidate_id'],
+                'overall_score': entry['overall_score'],
+                'scores': entry.get('scores', {})
+            }
+            leaderboard._order.add(key)
+        leaderboard._next_seq = data.get('next_seq', len(leaderboard._entries))
+        return leaderboard
+
+class LeaderboardRegistry:
+    """Leaderboards keyed by role, with snapshot/restore to a local file"""
+
+    def __init__(self):
+        self._leaderboards = {}
+        self.lock = threading.RLock()
+
+    def get(self, role_match, create=False):
+        with self.lock:
+            leaderboard = self._leaderboards.get(role_match)
+            if leaderboard is None and create:
+                leaderboard = self._leaderboards[role_match] = Leaderboard(role_match)
+            return leaderboard
+
+    def roles(self):
+        with self.lock:
+            return {role: len(board) for role, board in self._leaderboards.items()}
+
+    def snapshot(self, path):
+        """Atomically write all leaderboards to ``path``"""
+        with self.lock:
+            data = {
+                'version': SNAPSHOT_VERSION,
+                'leaderboards': [board.to_dict() for board in self._leaderboards.values()]
+            }
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(temp_path, path)
+
+    def restore(self, path):
+        """Replace all leaderboards with the snapshot at ``path``"""
+        with open(path) as f:
+            data = json.load(f)
+
+        if data.get('version') != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported leaderboard snapshot version: {data.get('version')}")
+
+        leaderboards = {}
+        for board_data in data.get('leaderboards', []):
+            board = Leaderboard.from_dict(board_data)
+            leaderboards[board.role_match] = board
+
+        with self.lock:
+            self._leaderboards = leaderboards
+
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_leaderboards():
+    """Return the shared registry, restoring the configured snapshot on first use"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                registry = LeaderboardRegistry()
+                if LEADERBOARD_SNAPSHOT_PATH:
+                    if os.path.exists(LEADERBOARD_SNAPSHOT_PATH):
+                        registry.restore(LEADERBOARD_SNAPSHOT_PATH)
+                    atexit.register(registry.snapshot, LEADERBOARD_SNAPSHOT_PATH)
+                _registry = registry
+    return _registry
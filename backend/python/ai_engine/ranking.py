@@ -3,13 +3,20 @@ Ranking Engine
 Generates candidate rankings with explainable reasoning
 """
 
-def rank_candidates(candidates, role_match='General'):
+import heapq
+
+from metrics import timed
+
+@timed('rank_candidates')
+def rank_candidates(candidates, role_match='General', top_k=None, offset=0):
     """
     Rank candidates based on their scores
     
     Args:
         candidates: List of candidate dictionaries with scores
         role_match: Role/job title being matched
+        top_k: Number of ranked candidates to return (None for all)
+        offset: Number of top-ranked candidates to skip (for pagination)
         
     Returns:
         List of ranked candidates with explanations
@@ -17,50 +24,45 @@ def rank_candidates(candidates, role_match='General'):
     if not candidates:
         return []
     
-    # Calculate ranking score for each candidate
-    ranked_candidates = []
+    selected = select_ranked(candidates, top_k=top_k, offset=offset)
+    return list(iter_ranking_rows(selected, role_match, offset=offset))
+
+@timed('select_ranked')
+def select_ranked(candidates, top_k=None, offset=0):
+    """
+    Select the ranked entries for rows ``offset`` to ``offset + top_k``
+    
+    ``candidates`` may be any iterable; with ``top_k`` set only
+    ``offset + top_k`` entries are held in memory at a time.
+    """
+    entries = _rank_entries(candidates)
+    
+    if top_k is None:
+        selected = sorted(entries, key=_rank_key)
+    else:
+        # Partial selection of only the rows that will be returned
+        selected = heapq.nsmallest(offset + top_k, entries, key=_rank_key)
     
-    for candidate in candidates:
-        candidate_id = candidate.get('candidate_id')
+    return selected[offset:]
+
+def iter_ranking_rows(selected, role_match='General', offset=0):
+    """Yield ranked rows (with explanations) for entries from ``select_ranked``"""
+    for rank_position, (rounded_score, _, candidate, overall_score) in enumerate(selected, start=offset + 1):
         scores = candidate.get('scores', {})
         
-        # Calculate overall score (average of domain scores)
-        domain_scores = []
-        for domain, score_data in scores.items():
-            if isinstance(score_data, dict):
-                domain_scores.append(score_data.get('total_score', 0))
-            else:
-                domain_scores.append(score_data)
-        
-        overall_score = sum(domain_scores) / len(domain_scores) if domain_scores else 0
+        # Generate explanation only for returned rows
+        explanation = generate_explanation(candidate, scores, role_match, avg_score=overall_score)
         
-        # Generate explanation
-        explanation = generate_explanation(candidate, scores, role_match)
-        
-        ranked_candidates.append({
-            'candidate_id': candidate_id,
-            'overall_score': round(overall_score, 2),
-            'rank_position': 0,  # Will be set after sorting
+        yield {
+            'candidate_id': candidate.get('candidate_id'),
+            'overall_score': rounded_score,
+            'rank_position': rank_position,
             'explanation': explanation,
             'scores': scores
-        })
-    
-    # Sort by overall score (descending)
-    ranked_candidates.sort(key=lambda x: x['overall_score'], reverse=True)
-    
-    # Assign rank positions
-    for idx, candidate in enumerate(ranked_candidates, start=1):
-        candidate['rank_position'] = idx
-    
-    return ranked_candidates
+        }
 
-def generate_explanation(candidate, scores, role_match):
-    """
-    Generate explainable ranking reason
-    """
-    explanations = []
-    
-    # Overall performance
+def calculate_overall_score(scores):
+    """Calculate overall score (average of domain scores)"""
     domain_scores = []
     for domain, score_data in scores.items():
         if isinstance(score_data, dict):
@@ -68,7 +70,30 @@ def generate_explanation(candidate, scores, role_match):
         else:
             domain_scores.append(score_data)
     
-    avg_score = sum(domain_scores) / len(domain_scores) if domain_scores else 0
+    return sum(domain_scores) / len(domain_scores) if domain_scores else 0
+
+def _rank_entries(candidates):
+    """Yield (rounded score, input index, candidate, overall score) tuples"""
+    for idx, candidate in enumerate(candidates):
+        overall_score = calculate_overall_score(candidate.get('scores', {}))
+        yield (round(overall_score, 2), idx, candidate, overall_score)
+
+def _rank_key(entry):
+    """Sort key: highest rounded score first, ties keep input order"""
+    return (-entry[0], entry[1])
+
+def generate_explanation(candidate, scores, role_match, avg_score=None):
+    """
+    Generate explainable ranking reason
+    
+    Args:
+        avg_score: Precomputed overall score, to avoid averaging twice
+    """
+    explanations = []
+    
+    # Overall performance
+    if avg_score is None:
+        avg_score = calculate_overall_score(scores)
     
     if avg_score >= 80:
         explanations.append(f"Excellent overall performance ({avg_score:.1f}%)")
@@ -4,7 +4,15 @@ Calculates domain-wise skill scores based on multiple factors
 """
 
 from config import SCORING_WEIGHTS
+from metrics import timed
 
+# Difficulty level to score mapping (unknown levels count as medium)
+DIFFICULTY_SCORES = {'easy': 33, 'medium': 66, 'hard': 100}
+
+# Average time (seconds) at which time efficiency reaches zero
+MAX_REASONABLE_TIME = 600  # 10 minutes
+
+@timed('calculate_score')
 def calculate_score(responses):
     """
     Calculate skill scores for a candidate based on responses
@@ -88,8 +96,7 @@ def calculate_time_efficiency(responses):
     
     # Normalize to 0-100 (assuming reasonable time limits)
     # Adjust these thresholds based on actual assessment time limits
-    max_reasonable_time = 600  # 10 minutes
-    efficiency = max(0, 100 - (avg_time / max_reasonable_time * 100))
+    efficiency = max(0, 100 - (avg_time / MAX_REASONABLE_TIME * 100))
     
     return min(100, max(0, efficiency))
 
@@ -123,7 +130,6 @@ def get_average_difficulty(responses):
     if not responses:
         return 0.0
     
-    difficulty_map = {'easy': 33, 'medium': 66, 'hard': 100}
-    difficulties = [difficulty_map.get(r.get('difficulty', 'medium'), 66) for r in responses]
+    difficulties = [DIFFICULTY_SCORES.get(r.get('difficulty', 'medium'), 66) for r in responses]
     
     return sum(difficulties) / len(difficulties) if difficulties else 0.0
@@ -0,0 +1,279 @@
+"""
+Streaming Behavioral Analytics
+Online behavioral metrics updated as response events arrive
+"""
+
+import json
+import logging
+import queue
+import threading
+from collections import OrderedDict, deque
+
+from config import BEHAVIOR_WINDOW_SIZE, BEHAVIOR_STREAM_MAX_CANDIDATES
+from metrics import BEHAVIOR_STREAM_FAILURES
+from ai_engine.incremental import HalfSplitCounter
+
+logger = logging.getLogger(__name__)
+
+# Levels accepted by behavioral.calculate_adaptability, in its summation order
+DIFFICULTY_LEVELS = ('easy', 'medium', 'hard')
+
+class EventBatchError(ValueError):
+    """Raised when a batch of events is rejected; ``consumed`` events were already applied"""
+
+    def __init__(self, message, consumed=0):
+        super().__init__(message)
+        self.consumed = consumed
+
+def validate_event(event):
+    """
+    Check that ``event`` can be applied without failing part-way
+
+    Raises:
+        ValueError: If the event is not an object or has a field the
+            analytics cannot use
+    """
+    if not isinstance(event, dict):
+        raise ValueError('Event is not a JSON object')
+    difficulty = event.get('difficulty', 'medium')
+    if difficulty not in DIFFICULTY_LEVELS:
+        raise ValueError(f'Unknown difficulty: {difficulty!r}')
+    time_taken = event.get('time_taken')
+    if time_taken is not None and (isinstance(time_taken, bool) or not isinstance(time_taken, (int, float))):
+        raise ValueError(f'time_taken must be a number, got {time_taken!r}')
+    if not isinstance(event.get('submitted_at', ''), str):
+        raise ValueError(f"submitted_at must be a string, got {event.get('submitted_at')!r}")
+
+class CandidateBehaviorState:
+    """
+    Running behavioral state for one candidate
+
+    Every update is O(1) for events arriving in submission order.
+    """
+
+    def __init__(self, window_size=20):
+        self.window = deque(maxlen=window_size)
+        self.window_correct = 0
+        self.half_split = HalfSplitCounter()
+        self.total = 0
+        self.correct = 0
+        self.time_sum = 0
+        self.time_count = 0
+        # difficulty -> [count, correct]
+        self.difficulty_stats = {}
+        self.last_submitted_at = None
+
+    def add(self, response):
+        """
+        Apply one response
+
+        Raises:
+            ValueError: If the response fails ``validate_event`` (nothing is
+                applied)
+        """
+        validate_event(response)
+        is_correct = 1 if response.get('is_correct', False) else 0
+        difficulty = response.get('difficulty', 'medium')
+        time_taken = response.get('time_taken')
+        submitted_at = response.get('submitted_at', '')
+
+        # Sliding window accuracy
+        if len(self.window) == self.window.maxlen:
+            self.window_correct -= self.window[0]
+        self.window.append(is_correct)
+        self.window_correct += is_correct
+
+        self.half_split.add(submitted_at, is_correct)
+        self.total += 1
+        self.correct += is_correct
+        if time_taken:
+            self.time_sum += time_taken
+            self.time_count += 1
+
+        stats = self.difficulty_stats.get(difficulty)
+        if stats is None:
+            stats = self.difficulty_stats[difficulty] = [0, 0]
+        stats[0] += 1
+        stats[1] += is_correct
+
+        if self.last_submitted_at is None or submitted_at > self.last_submitted_at:
+            self.last_submitted_at = submitted_at
+
+    def improvement_trend(self):
+        """Same definition as behavioral.calculate_improvement_trend"""
+        half_split = self.half_split
+        if len(half_split) < 2:
+            return 0.0
+
+        first_rate = half_split.first_correct / half_split.first_size
+        second_rate = half_split.second_correct / half_split.second_size
+        if first_rate == 0:
+            return 0.0
+        return ((second_rate - first_rate) / first_rate) * 100
+
+    def adaptability(self):
+        """
+        Same definition as behavioral.calculate_adaptability
+
+        Returns:
+            Tuple of (adaptability score, variance across difficulty levels)
+        """
+        performance_scores = [
+            stats[1] / stats[0] * 100
+            for stats in (self.difficulty_stats.get(difficulty) for difficulty in DIFFICULTY_LEVELS)
+            if stats is not None
+        ]
+        if not performance_scores:
+            return 50.0, 0.0
+
+        avg_performance = sum(performance_scores) / len(performance_scores)
+        variance = sum((s - avg_performance) ** 2 for s in performance_scores) / len(performance_scores)
+        return max(0, 100 - (variance * 10)), variance
+
+    def snapshot(self):
+        adaptability_score, adaptability_variance = self.adaptability()
+        return {
+            'window_size': self.window.maxlen,
+            'window_accuracy': round(self.window_correct / len(self.window) * 100, 2) if self.window else 0.0,
+            'improvement_trend': round(self.improvement_trend(), 2),
+            'adaptability_score': round(adaptability_score, 2),
+            'adaptability_variance': round(adaptability_variance, 4),
+            'difficulty_performance': {
+                difficulty: {
+                    'responses': count,
+                    'accuracy': round(correct / count * 100, 2)
+                }
+                for difficulty, (count, correct) in self.difficulty_stats.items()
+            },
+            'response_pattern': {
+                'total_responses': self.total,
+                'correct_responses': self.correct,
+                'average_time': self.time_sum / self.time_count if self.time_count else 0,
+                'difficulty_distribution': {
+                    difficulty: stats[0] for difficulty, stats in self.difficulty_stats.items()
+                }
+            },
+            'last_submitted_at': self.last_submitted_at
+        }
+
+class OnlineBehaviorAnalyzer:
+    """
+    Consumes response events and keeps per-candidate behavioral state
+
+    Events are response dictionaries carrying a ``candidate_id``. They can
+    be fed directly, from NDJSON lines, or through the ``events`` queue.
+    """
+
+    def __init__(self, window_size=20, max_candidates=50000):
+        self.window_size = window_size
+        self.max_candidates = max_candidates
+        self.events = queue.Queue()
+        self._states = OrderedDict()
+        self._lock = threading.Lock()
+        self._consumer = None
+
+    def consume(self, event):
+        """Apply one response event"""
+        validate_event(event)
+        candidate_id = event.get('candidate_id')
+        with self._lock:
+            state = self._states.get(candidate_id)
+            if state is None:
+                state = self._states[candidate_id] = CandidateBehaviorState(self.window_size)
+            else:
+                self._states.move_to_end(candidate_id)
+            state.add(event)
+
+            while len(self._states) > self.max_candidates:
+                self._states.popitem(last=False)
+
+    def consume_many(self, events):
+        """
+        Apply a list of events, all or nothing
+
+        Returns:
+            Number of events consumed
+
+        Raises:
+            EventBatchError: If any event fails validation (none are applied)
+        """
+        events = list(events)
+        for index, event in enumerate(events):
+            try:
+                validate_event(event)
+            except ValueError as e:
+                raise EventBatchError(f'Event {index}: {e}')
+        for event in events:
+            self.consume(event)
+        return len(events)
+
+    def consume_ndjson(self, lines):
+        """
+        Apply events from an iterable of NDJSON lines (str or bytes)
+
+        Lines are applied as they are read, so a bad line stops the stream
+        with the events before it already applied.
+
+        Returns:
+            Number of events consumed
+
+        Raises:
+            EventBatchError: If a line is not valid JSON or not a valid event;
+                ``consumed`` counts the lines applied before it
+        """
+        count = 0
+        for line_number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                event = json.loads(line)
+            except ValueError:
+                raise EventBatchError(f'Invalid JSON on line {line_number}', consumed=count)
+            if not isinstance(event, dict):
+                raise EventBatchError(f'Line {line_number} is not a JSON object', consumed=count)
+            try:
+                self.consume(event)
+            except ValueError as e:
+                raise EventBatchError(f'Line {line_number}: {e}', consumed=count)
+            count += 1
+        return count
+
+    def start_consumer(self):
+        """Start a background thread that drains the ``events`` queue"""
+        with self._lock:
+            if self._consumer is not None:
+                return
+            self._consumer = threading.Thread(
+                target=self._drain,
+                name='behavior-stream-consumer',
+                daemon=True
+            )
+            self._consumer.start()
+
+    def publish(self, event):
+        """Queue an event for the background consumer"""
+        self.start_consumer()
+        self.events.put(event)
+
+    def snapshot(self, candidate_id):
+        """Return current metrics for a candidate, or None"""
+        with self._lock:
+            state = self._states.get(candidate_id)
+            if state is None:
+                return None
+            snapshot = state.snapshot()
+        snapshot['candidate_id'] = candidate_id
+        return snapshot
+
+    def _drain(self):
+        while True:
+            event = self.events.get()
+            try:
+                self.consume(event)
+            except Exception as e:
+                BEHAVIOR_STREAM_FAILURES.inc(type(e).__name__)
+                logger.exception('Dropped behavior event for candidate %r', event.get('candidate_id'))
+            finally:
+                self.events.task_done()
+
+behavior_stream = OnlineBehaviorAnalyzer(BEHAVIOR_WINDOW_SIZE, BEHAVIOR_STREAM_MAX_CANDIDATES)
@@ -0,0 +1,16 @@
+"""
+Benchmark Suite
+Synthetic workloads, micro-benchmarks and HTTP scenarios for the AI service
+
+Run from backend/python:
+    python -m benchmarks --suite all --candidates 1000 --output run.json
+    python -m benchmarks --compare baseline.json run.json
+"""
+
+import os
+import sys
+
+# Same import path the service uses (config lives in models/)
+MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'models')
+if MODELS_DIR not in sys.path:
+    sys.path.append(MODELS_DIR)
@@ -0,0 +1,100 @@
+"""
+Benchmark runner
+
+Usage (from backend/python):
+    python -m benchmarks [--suite micro|http|all] [--candidates N] [--output run.json]
+    python -m benchmarks --compare baseline.json run.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+import benchmarks  # noqa: F401 - sets up the import path
+from benchmarks.harness import compare, environment
+
+def main():
+    parser = argparse.ArgumentParser(description='AI service benchmarks')
+    parser.add_argument('--suite', choices=['micro', 'http', 'all'], default='all')
+    parser.add_argument('--candidates', type=int, default=1000)
+    parser.add_argument('--responses', type=int, default=20, help='Responses per candidate')
+    parser.add_argument('--questions', type=int, default=50, help='MCQ questions per candidate')
+    parser.add_argument('--test-cases', type=int, default=10, help='Test cases per code submission')
+    parser.add_argument('--code-profiles', nargs='*', help='Code submission profiles to run')
+    parser.add_argument('--concurrency', type=int, default=4, help='Concurrent HTTP clients')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per micro-benchmark')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Write JSON results here instead of stdout')
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CURRENT'),
+                        help='Compare two JSON result files and exit')
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            baseline = json.load(f)
+        with open(args.compare[1]) as f:
+            current = json.load(f)
+        rows = compare(baseline, current)
+        json.dump({'comparison': rows}, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+        return 1 if any(row['status'] == 'regression' for row in rows) else 0
+
+    # Keep benchmark writes out of the service's real database
+    scratch = tempfile.mkdtemp(prefix='ai-benchmarks-')
+    os.environ.setdefault('STORAGE_SQLITE_PATH', os.path.join(scratch, 'benchmarks.db'))
+    os.environ.setdefault('LEADERBOARD_SNAPSHOT_PATH', '')
+
+    params = {
+        'suite': args.suite,
+        'candidates': args.candidates,
+        'responses_per_candidate': args.responses,
+        'questions': args.questions,
+        'test_cases': args.test_cases,
+        'concurrency': args.concurrency,
+        'repeat': args.repeat,
+        'seed': args.seed
+    }
+    results = []
+
+    if args.suite in ('micro', 'all'):
+        from benchmarks.micro import run_micro
+        results.extend(run_micro(
+            candidates=args.candidates,
+            responses=args.responses,
+            questions=args.questions,
+            test_cases=args.test_cases,
+            code_profiles=args.code_profiles,
+            repeat=args.repeat,
+            seed=args.seed
+        ))
+
+    if args.suite in ('http', 'all'):
+        from benchmarks.scenarios import run_http
+        results.extend(run_http(
+            candidates=args.candidates,
+            responses=args.responses,
+            questions=args.questions,
+            test_cases=args.test_cases,
+            concurrency=args.concurrency,
+            seed=args.seed
+        ))
+
+    run = {'environment': environment(), 'params': params, 'results': results}
+
+    for result in results:
+        print(f"{result['name']:<40} median {result['median_ms']:>10.3f} ms  "
+              f"p95 {result['p95_ms']:>10.3f} ms  {result['items_per_sec'] or 0:>12.1f} items/s",
+              file=sys.stderr)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(run, f, indent=2)
+    else:
+        json.dump(run, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
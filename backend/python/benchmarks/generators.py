@@ -0,0 +1,145 @@
+"""
+Synthetic Data Generators
+Deterministic (seeded) candidates, responses, MCQ answers and code submissions
+"""
+
+import random
+from datetime import datetime, timedelta
+
+DEFAULT_DOMAINS = ['algorithms', 'data_structures', 'databases', 'system_design', 'web_development']
+
+DEFAULT_DIFFICULTY_MIX = {'easy': 0.3, 'medium': 0.5, 'hard': 0.2}
+
+# Probability of a correct answer per difficulty level
+CORRECT_RATE = {'easy': 0.85, 'medium': 0.65, 'hard': 0.4}
+
+def make_responses(rng, count, domains=None, difficulty_mix=None, start=None):
+    """Generate one candidate's responses in submission order"""
+    domains = domains or DEFAULT_DOMAINS
+    difficulty_mix = difficulty_mix or DEFAULT_DIFFICULTY_MIX
+    levels = list(difficulty_mix)
+    weights = [difficulty_mix[level] for level in levels]
+    submitted_at = start or datetime(2024, 1, 1, 9, 0, 0)
+
+    responses = []
+    for idx in range(count):
+        difficulty = rng.choices(levels, weights)[0]
+        time_taken = rng.randint(15, 900)
+        submitted_at += timedelta(seconds=time_taken)
+        responses.append({
+            'assessment_id': idx + 1,
+            'response_text': '',
+            'is_correct': rng.random() < CORRECT_RATE.get(difficulty, 0.5),
+            'time_taken': time_taken,
+            'difficulty': difficulty,
+            'domain': rng.choice(domains),
+            'submitted_at': submitted_at.isoformat()
+        })
+    return responses
+
+def make_candidates(count, responses_per_candidate=20, domains=None, difficulty_mix=None, seed=0):
+    """
+    Generate candidates with response histories
+
+    Returns:
+        List of ``{"candidate_id": int, "responses": [...]}``
+    """
+    rng = random.Random(seed)
+    return [
+        {
+            'candidate_id': candidate_id,
+            'responses': make_responses(rng, responses_per_candidate, domains, difficulty_mix)
+        }
+        for candidate_id in range(1, count + 1)
+    ]
+
+def make_scored_candidates(count, domains=None, seed=0):
+    """Generate candidates with domain scores, as ``rank_candidates`` expects"""
+    rng = random.Random(seed)
+    domains = domains or DEFAULT_DOMAINS
+    candidates = []
+    for candidate_id in range(1, count + 1):
+        scores = {}
+        for domain in rng.sample(domains, rng.randint(1, len(domains))):
+            components = {
+                'skill_score': round(rng.uniform(0, 100), 2),
+                'accuracy_score': round(rng.uniform(0, 100), 2),
+                'time_score': round(rng.uniform(0, 100), 2),
+                'learning_score': round(rng.uniform(0, 100), 2)
+            }
+            components['total_score'] = round(sum(components.values()) / 4, 2)
+            scores[domain] = components
+        candidates.append({'candidate_id': candidate_id, 'scores': scores})
+    return candidates
+
+def make_mcq_key(questions, seed=0, options='ABCD'):
+    rng = random.Random(seed)
+    return [rng.choice(options) for _ in range(questions)]
+
+def make_mcq_answers(correct_answers, candidates, accuracy=0.7, seed=0, options='ABCD'):
+    """Generate answer sheets with varied case/whitespace and some blanks"""
+    rng = random.Random(seed)
+    sheets = []
+    for _ in range(candidates):
+        sheet = []
+        for answer in correct_answers:
+            roll = rng.random()
+            if roll < 0.05:
+                sheet.append(None)
+            elif roll < accuracy:
+                sheet.append(rng.choice([answer, answer.lower(), f' {answer} ']))
+            else:
+                sheet.append(rng.choice(options))
+        sheets.append(sheet)
+    return sheets
+
+# Code submission profiles: (source template, description)
+CODE_PROFILES = {
+    'correct': (
+        "def solve(values):\n"
+        "    return sorted(values)\n",
+        'Passes every test case'
+    ),
+    'wrong': (
+        "def solve(values):\n"
+        "    return values\n",
+        'Runs but fails most test cases'
+    ),
+    'error': (
+        "def solve(values):\n"
+        "    return values[len(values)]\n",
+        'Raises on every test case'
+    ),
+    'cpu_heavy': (
+        "def solve(values):\n"
+        "    total = 0\n"
+        "    for i in range(200000):\n"
+        "        total += i\n"
+        "    return sorted(values)\n",
+        'Correct, with a busy loop per call'
+    )
+}
+
+def make_code_submission(profile='correct', test_cases=10, seed=0, unique=None):
+    """
+    Generate a coding submission and its test cases
+
+    Args:
+        profile: Key of ``CODE_PROFILES``
+        test_cases: Number of test cases
+        unique: Optional tag appended as a comment so the source does not
+            hit the result cache
+
+    Returns:
+        Tuple of (code, test cases JSON-compatible dictionary)
+    """
+    rng = random.Random(seed)
+    code = CODE_PROFILES[profile][0]
+    if unique is not None:
+        code += f"# submission {unique}\n"
+
+    cases = []
+    for _ in range(test_cases):
+        values = [rng.randint(-1000, 1000) for _ in range(rng.randint(1, 30))]
+        cases.append({'input': [values], 'output': sorted(values)})
+    return code, {'test_cases': cases}
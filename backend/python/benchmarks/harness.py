@@ -0,0 +1,115 @@
+"""
+Benchmark Harness
+Timing, summary statistics and run comparison
+"""
+
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+
+def measure(name, func, items=1, repeat=5, warmup=1, params=None):
+    """
+    Time ``func()`` ``repeat`` times after ``warmup`` untimed calls
+
+    Args:
+        name: Benchmark name
+        func: Zero-argument callable doing one unit of work
+        items: Number of items one call processes (for throughput)
+        repeat: Timed calls
+        warmup: Untimed calls made first
+        params: Workload parameters recorded with the result
+
+    Returns:
+        Result dictionary (times in milliseconds)
+    """
+    for _ in range(warmup):
+        func()
+
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append((time.perf_counter() - start) * 1000)
+
+    return summarize(name, durations, items, params)
+
+def summarize(name, durations, items=1, params=None):
+    """Build a result dictionary from durations in milliseconds"""
+    ordered = sorted(durations)
+    median = statistics.median(ordered)
+    return {
+        'name': name,
+        'params': params or {},
+        'runs': len(ordered),
+        'items': items,
+        'min_ms': round(ordered[0], 3),
+        'mean_ms': round(statistics.fmean(ordered), 3),
+        'median_ms': round(median, 3),
+        'p95_ms': round(percentile(ordered, 95), 3),
+        'max_ms': round(ordered[-1], 3),
+        'stdev_ms': round(statistics.stdev(ordered), 3) if len(ordered) > 1 else 0.0,
+        'items_per_sec': round(items / (median / 1000), 1) if median else None
+    }
+
+def percentile(ordered, pct):
+    """Nearest-rank percentile of an ascending list"""
+    if not ordered:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+def environment():
+    """Host details recorded with every run"""
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': sys.version.split()[0],
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count()
+    }
+
+def compare(baseline, current, threshold=0.10):
+    """
+    Compare two runs by median time
+
+    Args:
+        baseline: Run dictionary loaded from a previous JSON output
+        current: Run dictionary to compare against it
+        threshold: Relative change reported as a regression/improvement
+
+    Returns:
+        List of ``{"name", "baseline_ms", "current_ms", "change", "status"}``
+    """
+    previous = {result['name']: result for result in baseline.get('results', [])}
+    rows = []
+    for result in current.get('results', []):
+        before = previous.get(result['name'])
+        if before is None or not before['median_ms']:
+            rows.append({
+                'name': result['name'],
+                'baseline_ms': None,
+                'current_ms': result['median_ms'],
+                'change': None,
+                'status': 'new'
+            })
+            continue
+
+        change = (result['median_ms'] - before['median_ms']) / before['median_ms']
+        if change > threshold:
+            status = 'regression'
+        elif change < -threshold:
+            status = 'improvement'
+        else:
+            status = 'unchanged'
+        rows.append({
+            'name': result['name'],
+            'baseline_ms': before['median_ms'],
+            'current_ms': result['median_ms'],
+            'change': round(change, 4),
+            'status': status
+        })
+    return rows
@@ -0,0 +1,101 @@
+"""
+Micro-benchmarks
+Per-function timings for the scoring, ranking, behavioral and evaluation engines
+"""
+
+import itertools
+
+from ai_engine.scoring import calculate_score
+from ai_engine.batch_scoring import calculate_scores_batch
+from ai_engine.ranking import rank_candidates
+from ai_engine.behavioral import analyze_behavior, analyze_behavior_batch
+from evaluation.mcq_evaluator import evaluate_mcq, evaluate_mcq_bulk, AnswerKeyIndex
+from evaluation.code_evaluator import evaluate_code
+
+from benchmarks.generators import (
+    CODE_PROFILES,
+    make_candidates,
+    make_code_submission,
+    make_mcq_answers,
+    make_mcq_key,
+    make_scored_candidates
+)
+from benchmarks.harness import measure
+
+def run_micro(candidates=1000, responses=20, questions=50, test_cases=10,
+              code_profiles=None, repeat=5, seed=0):
+    """
+    Run every micro-benchmark
+
+    Returns:
+        List of result dictionaries
+    """
+    workload = {'candidates': candidates, 'responses_per_candidate': responses}
+    histories = make_candidates(candidates, responses, seed=seed)
+    scored = make_scored_candidates(candidates, seed=seed)
+
+    results = [
+        measure(
+            'calculate_score', lambda: [calculate_score(c['responses']) for c in histories],
+            items=candidates, repeat=repeat, params=workload
+        ),
+        measure(
+            'calculate_scores_batch', lambda: calculate_scores_batch(histories),
+            items=candidates, repeat=repeat, params=workload
+        ),
+        measure(
+            'rank_candidates', lambda: rank_candidates(scored, 'Software Engineer'),
+            items=candidates, repeat=repeat, params={'candidates': candidates}
+        ),
+        measure(
+            'rank_candidates_top50', lambda: rank_candidates(scored, 'Software Engineer', top_k=50),
+            items=candidates, repeat=repeat, params={'candidates': candidates, 'top_k': 50}
+        ),
+        measure(
+            'analyze_behavior',
+            lambda: [analyze_behavior(c['candidate_id'], c['responses']) for c in histories],
+            items=candidates, repeat=repeat, params=workload
+        ),
+        measure(
+            'analyze_behavior_batch', lambda: analyze_behavior_batch(histories),
+            items=candidates, repeat=repeat, params=workload
+        )
+    ]
+
+    key = make_mcq_key(questions, seed=seed)
+    sheets = make_mcq_answers(key, candidates, seed=seed)
+    mcq_params = {'candidates': candidates, 'questions': questions}
+    results.append(measure(
+        'evaluate_mcq',
+        lambda: [evaluate_mcq(answer or '', correct) for sheet in sheets for answer, correct in zip(sheet, key)],
+        items=candidates * questions, repeat=repeat, params=mcq_params
+    ))
+    index = AnswerKeyIndex(0, key)
+    results.append(measure(
+        'evaluate_mcq_bulk', lambda: evaluate_mcq_bulk(index, sheets),
+        items=candidates * questions, repeat=repeat, params=mcq_params
+    ))
+
+    for profile in code_profiles or list(CODE_PROFILES):
+        results.extend(_code_benchmarks(profile, test_cases, repeat, seed))
+
+    return results
+
+def _code_benchmarks(profile, test_cases, repeat, seed):
+    params = {'profile': profile, 'test_cases': test_cases}
+    counter = itertools.count()
+
+    def cold():
+        # A unique comment keeps every run out of the result cache
+        code, cases = make_code_submission(profile, test_cases, seed=seed, unique=next(counter))
+        evaluate_code(code, cases)
+
+    code, cases = make_code_submission(profile, test_cases, seed=seed)
+
+    return [
+        measure(f'evaluate_code[{profile}]', cold, items=test_cases, repeat=repeat, params=params),
+        measure(
+            f'evaluate_code_cached[{profile}]', lambda: evaluate_code(code, cases),
+            items=test_cases, repeat=repeat, params=params
+        )
+    ]
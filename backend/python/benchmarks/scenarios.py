@@ -0,0 +1,124 @@
+"""
+HTTP Scenarios
+End-to-end request load against the Flask app through its test client
+"""
+
+import itertools
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app import app
+
+from benchmarks.generators import (
+    make_candidates,
+    make_code_submission,
+    make_mcq_key,
+    make_scored_candidates
+)
+from benchmarks.harness import summarize
+
+def run_scenario(name, requests, concurrency=1, params=None):
+    """
+    Send ``requests`` through test clients on ``concurrency`` threads
+
+    Args:
+        name: Scenario name
+        requests: List of (method, path, JSON body or None)
+        concurrency: Number of concurrent clients
+        params: Workload parameters recorded with the result
+
+    Returns:
+        Result dictionary with per-request latency statistics, overall
+        throughput, payload sizes and non-2xx count
+    """
+    def send(client, request):
+        method, path, body = request
+        data = None if body is None else json.dumps(body)
+        start = time.perf_counter()
+        response = client.open(path, method=method, data=data, content_type='application/json')
+        elapsed = (time.perf_counter() - start) * 1000
+        return elapsed, len(data or ''), len(response.data), response.status_code
+
+    def worker(chunk):
+        client = app.test_client()
+        return [send(client, request) for request in chunk]
+
+    chunks = [requests[i::concurrency] for i in range(concurrency)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(itertools.chain.from_iterable(pool.map(worker, chunks)))
+    wall = time.perf_counter() - start
+
+    result = summarize(name, [outcome[0] for outcome in outcomes], params=dict(params or {}, concurrency=concurrency))
+    result['items_per_sec'] = round(len(outcomes) / wall, 1) if wall else None
+    result['request_bytes'] = sum(outcome[1] for outcome in outcomes)
+    result['response_bytes'] = sum(outcome[2] for outcome in outcomes)
+    result['errors'] = sum(1 for outcome in outcomes if outcome[3] >= 300)
+    return result
+
+def run_http(candidates=1000, responses=20, questions=50, test_cases=10,
+             concurrency=4, coding_requests=20, seed=0):
+    """
+    Run every HTTP scenario
+
+    Returns:
+        List of result dictionaries
+    """
+    histories = make_candidates(candidates, responses, seed=seed)
+    scored = make_scored_candidates(candidates, seed=seed)
+    workload = {'candidates': candidates, 'responses_per_candidate': responses}
+
+    results = [
+        run_scenario('http_health', [('GET', '/health', None)] * candidates, concurrency),
+        run_scenario(
+            'http_evaluate',
+            [('POST', '/ai/evaluate', c) for c in histories],
+            concurrency, workload
+        ),
+        run_scenario(
+            'http_explain',
+            [('GET', f"/ai/explain/{c['candidate_id']}", None) for c in histories],
+            concurrency, {'candidates': candidates}
+        ),
+        run_scenario(
+            'http_evaluate_batch',
+            [('POST', '/ai/evaluate/batch', {'candidates': histories})],
+            1, workload
+        ),
+        run_scenario(
+            'http_analyze',
+            [('POST', '/ai/analyze', c) for c in histories],
+            concurrency, workload
+        ),
+        run_scenario(
+            'http_rank',
+            [('POST', '/ai/rank', {'candidates': scored, 'role_match': 'Software Engineer'})] * 5,
+            1, {'candidates': candidates}
+        ),
+        run_scenario(
+            'http_rank_top50',
+            [('POST', '/ai/rank', {'candidates': scored, 'role_match': 'Software Engineer', 'top_k': 50})] * 5,
+            1, {'candidates': candidates, 'top_k': 50}
+        )
+    ]
+
+    key = make_mcq_key(questions, seed=seed)
+    results.append(run_scenario(
+        'http_mcq',
+        [
+            ('POST', '/evaluate/response', {'type': 'mcq', 'response': answer, 'correct_answer': answer})
+            for answer in key * max(1, candidates // questions)
+        ],
+        concurrency, {'questions': questions}
+    ))
+
+    coding = []
+    for idx in range(coding_requests):
+        code, cases = make_code_submission('correct', test_cases, seed=seed, unique=f'http-{idx}')
+        coding.append(('POST', '/evaluate/response', {'type': 'coding', 'response': code, 'test_cases': cases}))
+    results.append(run_scenario(
+        'http_coding', coding, concurrency, {'test_cases': test_cases}
+    ))
+
+    return results
@@ -3,13 +3,46 @@ Code Evaluator
 Evaluates Python code submissions against test cases
 """
 
+import functools
 import json
+import signal
 import subprocess
 import sys
 import tempfile
+import time
 import os
+from concurrent.futures import ThreadPoolExecutor
 
-def evaluate_code(code, test_cases_json):
+from config import EVALUATION_MODE, EVALUATION_PARALLELISM, SANDBOX_MAX_OUTPUT_BYTES, SANDBOX_MEMORY_LIMIT_MB
+from evaluation import fixtures, sandbox, sandbox_worker
+from evaluation.preflight import preflight
+from evaluation.result_cache import get_result_cache, make_cache_key
+from metrics import SANDBOX_EXEC_LATENCY, observe, timed
+
+# Wall-clock limit for a single test case, in seconds
+TEST_TIMEOUT = 5
+
+# Per-test verdicts reported in result details
+VERDICT_ACCEPTED = 'AC'
+VERDICT_WRONG_ANSWER = 'WA'
+VERDICT_RUNTIME_ERROR = 'RE'
+VERDICT_TIME_LIMIT = 'TLE'
+VERDICT_MEMORY_LIMIT = 'MLE'
+VERDICT_OUTPUT_LIMIT = 'OLE'
+VERDICT_COMPILE_ERROR = 'CE'  # Rejected by the pre-flight check
+VERDICT_SKIPPED = 'SKIP'  # Not run after an earlier failure in fail-fast mode
+
+# Test case execution modes
+MODE_SEQUENTIAL = 'sequential'
+MODE_PARALLEL = 'parallel'  # Cases spread over workers, results in case order
+MODE_FAIL_FAST = 'fail_fast'  # Stop at the first failing case
+EVALUATION_MODES = (MODE_SEQUENTIAL, MODE_PARALLEL, MODE_FAIL_FAST)
+
+# Exit status of a process killed for exceeding RLIMIT_CPU
+_CPU_LIMIT_RETURNCODE = -getattr(signal, 'SIGXCPU', 0) or None
+
+@timed('evaluate_code')
+def evaluate_code(code, test_cases_json, mode=None):
     """
     Evaluate Python code against test cases
     
@@ -20,19 +53,56 @@ def evaluate_code(code, test_cases_json):
             "test_cases": [
                 {"input": {...}, "output": expected_output},
                 ...
-            ]
+            ],
+            "function_name": "solve"  (optional; resolved from the code if omitted)
         }
+        mode: 'sequential', 'parallel' or 'fail_fast' (EVALUATION_MODE if None)
     
     Returns:
         Dictionary with evaluation results
+    
+    Raises:
+        ValueError: If the mode is unknown
     """
     if isinstance(test_cases_json, str):
         test_cases_data = json.loads(test_cases_json)
     else:
         test_cases_data = test_cases_json
     
-    test_cases = test_cases_data.get('test_cases', [])
+    return _evaluate(
+        code, test_cases_data.get('test_cases', []), test_cases_data.get('function_name'), mode=mode
+    )
+
+@timed('evaluate_suite')
+def evaluate_suite(code, suite, mode=None):
+    """
+    Evaluate Python code against a registered problem suite
+    
+    Args:
+        code: String containing Python code
+        suite: evaluation.problems.TestSuite with pre-built call arguments
+        mode: 'sequential', 'parallel' or 'fail_fast' (EVALUATION_MODE if None)
+    
+    Returns:
+        Dictionary with evaluation results
+    """
+    return _evaluate(code, suite.test_cases, suite.function_name, suite, mode)
+
+def resolve_mode(mode=None):
+    """
+    Return the execution mode to use for a request
     
+    Raises:
+        ValueError: If the mode is unknown
+    """
+    mode = mode or EVALUATION_MODE
+    if mode not in EVALUATION_MODES:
+        raise ValueError(f"Invalid mode. Must be one of: {', '.join(EVALUATION_MODES)}")
+    return mode
+
+def _evaluate(code, test_cases, requested_function, suite=None, mode=None):
+    """Shared body of evaluate_code and evaluate_suite"""
+    mode = resolve_mode(mode)
     if not test_cases:
         return {
             'is_correct': False,
@@ -42,10 +112,31 @@ def evaluate_code(code, test_cases_json):
             'details': []
         }
     
-    passed = 0
+    # Serve identical submissions from the result cache
+    cache = get_result_cache()
+    cache_key = None
+    if cache is not None:
+        # A registered suite is identified by its content digest. Parallel
+        # runs produce the same result as sequential ones and share entries.
+        cache_key = make_cache_key(
+            code, suite.digest if suite is not None else test_cases, TEST_TIMEOUT, requested_function,
+            mode == MODE_FAIL_FAST
+        )
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+    
     total = len(test_cases)
-    errors = []
-    details = []
+    
+    # Reject broken submissions in-process and resolve the entry point
+    check = preflight(code, requested_function)
+    if not check.ok:
+        result = _rejected(check.error, total)
+        if cache_key is not None:
+            cache.put(cache_key, result)
+        return result
+    
+    function_name = check.function_name
     
     # Create temporary file for code
     with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False) as f:
@@ -53,109 +144,19 @@ def evaluate_code(code, test_cases_json):
         temp_file = f.name
     
     try:
-        for idx, test_case in enumerate(test_cases):
-            test_input = test_case.get('input', {})
-            expected_output = test_case.get('output')
-            
-            # Prepare input arguments
-            input_args = []
-            if isinstance(test_input, dict):
-                # Convert dict to function arguments
-                for key, value in test_input.items():
-                    input_args.append(f"{key}={repr(value)}")
-            elif isinstance(test_input, (list, tuple)):
-                input_args = [repr(arg) for arg in test_input]
-            else:
-                input_args = [repr(test_input)]
-            
-            # Create test script - simpler approach
-            # Try to extract function name from code
-            function_name = None
-            code_lines = code.split('\n')
-            for line in code_lines:
-                if 'def ' in line:
-                    function_name = line.split('def ')[1].split('(')[0].strip()
-                    break
-            
-            # Create test script
-            if function_name:
-                # Function-based code
-                test_script = f"""
-{code}
-
-# Test the function
-result = {function_name}({', '.join(input_args)})
-print(repr(result))
-"""
-            else:
-                # Script-based code - wrap it
-                test_script = f"""
-{code}
-
-# If code doesn't define a function, try to capture output
-# This is a simplified approach - assumes code prints or returns result
-"""
-            
+        cwd = os.path.dirname(temp_file)
+        outcome = None
+        
+        if function_name and sandbox.is_supported():
             try:
-                # Run test
-                result = subprocess.run(
-                    [sys.executable, '-c', test_script],
-                    capture_output=True,
-                    text=True,
-                    timeout=5,  # 5 second timeout
-                    cwd=os.path.dirname(temp_file)
-                )
-                
-                if result.returncode != 0:
-                    errors.append(f"Test {idx + 1}: Execution error - {result.stderr}")
-                    details.append({
-                        'test_case': idx + 1,
-                        'passed': False,
-                        'error': result.stderr
-                    })
-                    continue
-                
-                # Parse output
-                try:
-                    actual_output = eval(result.stdout.strip())
-                except:
-                    actual_output = result.stdout.strip()
-                
-                # Compare outputs
-                is_match = compare_outputs(actual_output, expected_output)
-                
-                if is_match:
-                    passed += 1
-                    details.append({
-                        'test_case': idx + 1,
-                        'passed': True,
-                        'input': test_input,
-                        'expected': expected_output,
-                        'actual': actual_output
-                    })
-                else:
-                    details.append({
-                        'test_case': idx + 1,
-                        'passed': False,
-                        'input': test_input,
-                        'expected': expected_output,
-                        'actual': actual_output
-                    })
-                    
-            except subprocess.TimeoutExpired:
-                errors.append(f"Test {idx + 1}: Timeout")
-                details.append({
-                    'test_case': idx + 1,
-                    'passed': False,
-                    'error': 'Timeout (exceeded 5 seconds)'
-                })
-            except Exception as e:
-                errors.append(f"Test {idx + 1}: {str(e)}")
-                details.append({
-                    'test_case': idx + 1,
-                    'passed': False,
-                    'error': str(e)
-                })
+                outcome = _evaluate_batched(code, function_name, test_cases, cwd, check.bytecode, suite, mode)
+            except sandbox.SandboxError:
+                outcome = None  # Retry below with one script per test
+        
+        if outcome is None:
+            outcome = _evaluate_per_script(code, function_name, test_cases, cwd, suite, mode)
+        
+        passed, errors, details = outcome
     
     finally:
         # Clean up temp file
@@ -164,7 +165,7 @@ print(repr(result))
         except:
             pass
     
-    return {
+    result = {
         'is_correct': passed == total,
         'passed': passed,
         'total': total,
@@ -172,6 +173,339 @@ print(repr(result))
         'errors': errors,
         'details': details
     }
+    
+    # Timeouts depend on host load, so only cache deterministic outcomes
+    timed_out = any(detail.get('verdict') == VERDICT_TIME_LIMIT for detail in details)
+    if cache_key is not None and not timed_out:
+        cache.put(cache_key, result)
+    
+    return result
+
+def build_argument_source(test_input):
+    """Convert a test case input into the argument list of a generated call"""
+    if isinstance(test_input, dict):
+        # Convert dict to function arguments
+        return ', '.join(f"{key}={repr(value)}" for key, value in test_input.items())
+    if isinstance(test_input, (list, tuple)):
+        return ', '.join(repr(arg) for arg in test_input)
+    return repr(test_input)
+
+def _rejected(error, total):
+    """Result for a submission that failed the pre-flight check"""
+    return {
+        'is_correct': False,
+        'passed': 0,
+        'total': total,
+        'score': 0,
+        'errors': [f"Rejected before execution - {error}"],
+        'details': [
+            {'test_case': idx + 1, 'passed': False, 'verdict': VERDICT_COMPILE_ERROR, 'error': error}
+            for idx in range(total)
+        ]
+    }
+
+def build_call_arguments(test_input):
+    """Convert a test case input into sandbox call arguments"""
+    if isinstance(test_input, dict):
+        return {'kwargs': test_input}
+    if isinstance(test_input, (list, tuple)):
+        return {'args': list(test_input)}
+    return {'args': [test_input]}
+
+def _evaluate_batched(code, function_name, test_cases, cwd, bytecode=None, suite=None, mode=MODE_SEQUENTIAL):
+    """
+    Load the submission once in the sandbox and call the function per test case
+    
+    Returns:
+        Tuple of (passed, errors, details)
+    
+    Raises:
+        sandbox.SandboxError: If the sandbox could not run the batch
+    """
+    if suite is not None:
+        cases = suite.cases
+    else:
+        cases = [build_call_arguments(test_case.get('input', {})) for test_case in test_cases]
+    options = {
+        'timeout': TEST_TIMEOUT,
+        'cwd': cwd,
+        'bytecode': bytecode,
+        'suite_id': suite.digest if suite is not None else None,
+        'fixtures': suite.fixture_path if suite is not None else None
+    }
+    pool = sandbox.get_pool()
+    if mode == MODE_FAIL_FAST:
+        # Read results as they arrive so the batch can be stopped at a failure
+        results = pool.stream_batch(code, function_name, cases, **options)
+    else:
+        parallelism = _parallelism() if mode == MODE_PARALLEL else 1
+        results = iter(pool.run_batch(code, function_name, cases, parallelism=parallelism, **options))
+    
+    passed = 0
+    errors = []
+    details = []
+    
+    if suite is not None:
+        # Fixture values are shown as placeholders in the details
+        test_cases = suite.detail_cases
+    
+    try:
+        for idx, test_case in enumerate(test_cases):
+            result = next(results, None)
+            if result is None:
+                raise sandbox.SandboxError('Sandbox worker returned an incomplete batch')
+            
+            is_pass = _record_batch_result(idx, test_case, result, errors, details)
+            passed += is_pass
+            if not is_pass and mode == MODE_FAIL_FAST:
+                break
+    finally:
+        if mode == MODE_FAIL_FAST:
+            results.close()
+    
+    _record_skipped(len(test_cases), errors, details)
+    return passed, errors, details
+
+def _record_batch_result(idx, test_case, result, errors, details):
+    """Record one sandbox batch result and return whether the case passed"""
+    if result['status'] == 'timeout':
+        _record_failure(idx, VERDICT_TIME_LIMIT, None, errors, details)
+        return False
+    
+    if result['status'] == 'error':
+        _record_failure(idx, result.get('verdict', VERDICT_RUNTIME_ERROR), result['error'], errors, details)
+        return False
+    
+    if 'match' in result:
+        # Compared with a fixture inside the sandbox; the result is a preview
+        _record_match(idx, test_case, result['match'], result['result'], details)
+        return result['match']
+    
+    return _record_output(idx, test_case, sandbox_worker.parse_output(result['result']), details)
+
+def _evaluate_per_script(code, function_name, test_cases, cwd, suite=None, mode=MODE_SEQUENTIAL):
+    """
+    Run one generated script per test case
+    
+    Returns:
+        Tuple of (passed, errors, details)
+    """
+    def run_case(idx):
+        case_errors = []
+        case_details = []
+        is_pass = _run_script_case(code, function_name, idx, test_cases[idx], cwd, suite, case_errors, case_details)
+        return is_pass, case_errors, case_details
+    
+    if mode == MODE_PARALLEL:
+        with ThreadPoolExecutor(max_workers=_parallelism()) as executor:
+            outcomes = list(executor.map(run_case, range(len(test_cases))))
+    else:
+        # Lazy, so fail-fast mode runs nothing after the first failure
+        outcomes = map(run_case, range(len(test_cases)))
+    
+    passed = 0
+    errors = []
+    details = []
+    
+    for is_pass, case_errors, case_details in outcomes:
+        passed += is_pass
+        errors.extend(case_errors)
+        details.extend(case_details)
+        if not is_pass and mode == MODE_FAIL_FAST:
+            break
+    
+    _record_skipped(len(test_cases), errors, details)
+    return passed, errors, details
+
+def _run_script_case(code, function_name, idx, test_case, cwd, suite, errors, details):
+    """Run the generated script of one test case and return whether it passed"""
+    # Prepare input arguments (pre-built for registered suites)
+    preamble = ''
+    if suite is None:
+        input_args = build_argument_source(test_case.get('input', {}))
+    elif suite.call_refs[idx] is not None:
+        preamble, input_args = fixtures.call_source(suite.fixture_path, suite.call_refs[idx])
+    else:
+        input_args = suite.argument_sources[idx]
+    
+    # Create test script
+    if function_name:
+        # Function-based code
+        test_script = f"""
+{code}
+{preamble}
+# Test the function
+result = {function_name}({input_args})
+print(repr(result))
+"""
+    else:
+        # Script-based code - wrap it
+        test_script = f"""
+{code}
+
+# If code doesn't define a function, try to capture output
+# This is a simplified approach - assumes code prints or returns result
+"""
+    
+    try:
+        # Run test
+        result = run_test_script(test_script, cwd)
+        
+        verdict = script_verdict(result)
+        if verdict is not None:
+            _record_failure(idx, verdict, result.stderr, errors, details)
+            return False
+        
+        # Parse output the same way as batched results (never eval untrusted output)
+        actual_output = sandbox_worker.parse_output(result.stdout)
+        
+        if suite is not None and suite.expected_refs[idx] is not None:
+            expected_output = fixtures.load_value(suite.fixture_path, suite.expected_refs[idx])
+            is_match = compare_outputs(actual_output, expected_output)
+            _record_match(idx, suite.detail_cases[idx], is_match, fixtures.preview(actual_output), details)
+            return is_match
+        
+        return _record_output(idx, suite.detail_cases[idx] if suite is not None else test_case, actual_output, details)
+            
+    except subprocess.TimeoutExpired:
+        _record_failure(idx, VERDICT_TIME_LIMIT, None, errors, details)
+    except Exception as e:
+        errors.append(f"Test {idx + 1}: {str(e)}")
+        details.append({
+            'test_case': idx + 1,
+            'passed': False,
+            'verdict': VERDICT_RUNTIME_ERROR,
+            'error': str(e)
+        })
+    return False
+
+def _parallelism():
+    """Workers one submission may use in parallel mode"""
+    return EVALUATION_PARALLELISM or os.cpu_count() or 1
+
+def _record_output(idx, test_case, actual_output, details):
+    """Compare an actual output against the test case and record the detail"""
+    is_match = compare_outputs(actual_output, test_case.get('output'))
+    _record_match(idx, test_case, is_match, actual_output, details)
+    return is_match
+
+def _record_match(idx, test_case, is_match, actual_output, details):
+    details.append({
+        'test_case': idx + 1,
+        'passed': is_match,
+        'verdict': VERDICT_ACCEPTED if is_match else VERDICT_WRONG_ANSWER,
+        'input': test_case.get('input', {}),
+        'expected': test_case.get('output'),
+        'actual': actual_output
+    })
+
+def _record_failure(idx, verdict, error, errors, details):
+    """Record a test case that produced no output; resource limits replace the error"""
+    if verdict == VERDICT_TIME_LIMIT:
+        summary = 'Timeout'
+        error = f'Timeout (exceeded {TEST_TIMEOUT} seconds)'
+    elif verdict == VERDICT_MEMORY_LIMIT:
+        summary = 'Memory limit exceeded'
+        error = f'{summary} ({SANDBOX_MEMORY_LIMIT_MB} MB)'
+    elif verdict == VERDICT_OUTPUT_LIMIT:
+        summary = 'Output limit exceeded'
+        error = f'{summary} ({SANDBOX_MAX_OUTPUT_BYTES} bytes)'
+    else:
+        summary = f'Execution error - {error}'
+    errors.append(f"Test {idx + 1}: {summary}")
+    details.append({
+        'test_case': idx + 1,
+        'passed': False,
+        'verdict': verdict,
+        'error': error
+    })
+
+def _record_skipped(total, errors, details):
+    """Report the cases a fail-fast run did not reach as failed"""
+    if len(details) == total:
+        return
+    first = len(details) + 1
+    tests = f"Test {total}" if first == total else f"Tests {first}-{total}"
+    errors.append(f"{tests}: Skipped after test {len(details)} failed")
+    for idx in range(len(details), total):
+        details.append({
+            'test_case': idx + 1,
+            'passed': False,
+            'verdict': VERDICT_SKIPPED,
+            'error': 'Skipped after an earlier failure'
+        })
+
+def script_verdict(result):
+    """
+    Classify a finished test script
+
+    Returns:
+        None if the script exited normally within its limits, otherwise the
+        failure verdict (TLE, OLE, MLE or RE)
+    """
+    if result.returncode == _CPU_LIMIT_RETURNCODE:
+        return VERDICT_TIME_LIMIT
+    # Writes stop at the output limit, so a capture that reached it was cut off
+    if SANDBOX_MAX_OUTPUT_BYTES and max(
+            len(result.stdout.encode('utf-8', errors='replace')),
+            len(result.stderr.encode('utf-8', errors='replace'))) >= SANDBOX_MAX_OUTPUT_BYTES:
+        return VERDICT_OUTPUT_LIMIT
+    if result.returncode != 0:
+        last_line = result.stderr.strip().rpartition('\n')[2]
+        if last_line.startswith('MemoryError'):
+            return VERDICT_MEMORY_LIMIT
+        return VERDICT_RUNTIME_ERROR
+    return None
+
+def run_test_script(test_script, cwd):
+    """
+    Run a generated test script, preferring the pre-warmed sandbox pool
+
+    Returns:
+        subprocess.CompletedProcess with captured stdout/stderr
+
+    Raises:
+        subprocess.TimeoutExpired: If the script exceeds TEST_TIMEOUT
+    """
+    if sandbox.is_supported():
+        try:
+            outcome = sandbox.get_pool().run_scripts([test_script], timeout=TEST_TIMEOUT, cwd=cwd)[0]
+        except sandbox.SandboxError:
+            outcome = None
+        
+        if outcome is not None:
+            if outcome['status'] == 'timeout':
+                raise subprocess.TimeoutExpired(test_script, TEST_TIMEOUT)
+            return subprocess.CompletedProcess(
+                [sys.executable, '-c', test_script],
+                outcome['returncode'],
+                outcome['stdout'],
+                outcome['stderr']
+            )
+    
+    # Fall back to a fresh interpreter per test, under the sandbox limits.
+    # Output goes to files so RLIMIT_FSIZE caps it before it reaches memory.
+    limits = sandbox.execution_limits(TEST_TIMEOUT)
+    start = time.perf_counter()
+    try:
+        with tempfile.TemporaryFile() as stdout_file, tempfile.TemporaryFile() as stderr_file:
+            completed = subprocess.run(
+                [sys.executable, '-c', test_script],
+                stdout=stdout_file,
+                stderr=stderr_file,
+                timeout=TEST_TIMEOUT,
+                cwd=cwd,
+                preexec_fn=functools.partial(sandbox_worker.apply_limits, limits) if os.name == 'posix' else None
+            )
+            return subprocess.CompletedProcess(
+                completed.args, completed.returncode, _read_capture(stdout_file), _read_capture(stderr_file)
+            )
+    finally:
+        observe(SANDBOX_EXEC_LATENCY, time.perf_counter() - start, 'subprocess')
+
+def _read_capture(capture_file):
+    capture_file.seek(0)
+    return capture_file.read().decode('utf-8', errors='replace')
 
 def compare_outputs(actual, expected):
     """
@@ -185,24 +519,3 @@ def compare_outputs(actual, expected):
     
     # Direct comparison
     return actual == expected
-
-def evaluate_code_simple(code, expected_output_str):
-    """
-    Simple code evaluation - just check if code runs without errors
-    """
-    try:
-        exec(code)
-        return {
-            'is_correct': True,
-            'passed': 1,
-            'total': 1,
-            'score': 100
-        }
-    except Exception as e:
-        return {
-            'is_correct': False,
-            'passed': 0,
-            'total': 1,
-            'score': 0,
-            'errors': [str(e)]
-        }
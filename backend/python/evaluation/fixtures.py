@@ -0,0 +1,147 @@
+"""
+Test Fixtures
+Large test case inputs and expected outputs stored once as binary files
+
+Values of a registered suite whose marshalled size reaches
+FIXTURE_MIN_BYTES are written to one file per suite and handed to the
+sandbox as ``{"offset", "length"}`` references instead of being embedded
+in every request or generated script. Sandbox children map the file and
+unmarshal only the values they need, so the bytes are shared through the
+page cache by every worker and never recompiled as source.
+
+Expected list outputs are stored in chunks of FIXTURE_CHUNK_ITEMS items,
+``{"chunks": [[offset, length], ...], "count": n}``, so they can be
+compared against a result chunk by chunk, stopping at the first mismatch.
+
+Files are named by suite digest and interpreter (marshal is only stable
+within one Python version) and are written atomically, so any process can
+recreate them from the suite and concurrent writers are harmless.
+"""
+
+import marshal
+import mmap
+import os
+import sys
+import tempfile
+
+from config import FIXTURE_CHUNK_ITEMS, FIXTURE_DIR, FIXTURE_MIN_BYTES
+
+MAGIC = b'AIFIX1\n\0'
+
+# Results compared against a fixture are reported as a repr cut to this length
+PREVIEW_CHARS = 1000
+
+def fixture_path(digest):
+    directory = FIXTURE_DIR or os.path.join(tempfile.gettempdir(), 'ai-service-fixtures')
+    return os.path.join(directory, f'{digest}-{sys.implementation.cache_tag}.fx')
+
+def build_fixtures(digest, calls, outputs):
+    """
+    Move large call arguments and expected outputs of a suite to a fixture file
+
+    Args:
+        digest: Suite content digest
+        calls: Sandbox call arguments per case (``{"args": ...}`` / ``{"kwargs": ...}``)
+        outputs: Expected output per case
+
+    Returns:
+        Tuple of (path or None if nothing was large enough, call refs,
+        expected refs) with None refs for values kept inline
+    """
+    blobs = []
+    offset = len(MAGIC)
+
+    def add(data):
+        nonlocal offset
+        blobs.append(data)
+        ref = [offset, len(data)]
+        offset += len(data)
+        return ref
+
+    call_refs = []
+    for call in calls:
+        data = marshal.dumps(call)
+        if len(data) >= FIXTURE_MIN_BYTES:
+            offset_, length = add(data)
+            call_refs.append({'offset': offset_, 'length': length})
+        else:
+            call_refs.append(None)
+
+    expected_refs = []
+    for output in outputs:
+        data = marshal.dumps(output)
+        if len(data) < FIXTURE_MIN_BYTES:
+            expected_refs.append(None)
+        elif isinstance(output, list):
+            expected_refs.append({
+                'chunks': [
+                    add(marshal.dumps(output[start:start + FIXTURE_CHUNK_ITEMS]))
+                    for start in range(0, len(output), FIXTURE_CHUNK_ITEMS)
+                ],
+                'count': len(output)
+            })
+        else:
+            offset_, length = add(data)
+            expected_refs.append({'offset': offset_, 'length': length})
+
+    if not blobs:
+        return None, call_refs, expected_refs
+
+    path = fixture_path(digest)
+    if not os.path.exists(path):
+        _write_atomic(path, blobs)
+    return path, call_refs, expected_refs
+
+def load_value(path, ref):
+    """Read one referenced value back (for callers outside the sandbox)"""
+    with open(path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if 'chunks' in ref:
+                value = []
+                for offset, length in ref['chunks']:
+                    value.extend(marshal.loads(mapped[offset:offset + length]))
+                return value
+            return marshal.loads(mapped[ref['offset']:ref['offset'] + ref['length']])
+
+def call_source(path, ref):
+    """
+    Source that loads a fixture's call arguments in a generated test script
+
+    Returns:
+        Tuple of (preamble statements, argument list for the call)
+    """
+    preamble = (
+        "import marshal as __fixture_marshal, mmap as __fixture_mmap\n"
+        f"with open({path!r}, 'rb') as __fixture_file:\n"
+        "    __fixture_map = __fixture_mmap.mmap(__fixture_file.fileno(), 0, access=__fixture_mmap.ACCESS_READ)\n"
+        f"__fixture_call = __fixture_marshal.loads(__fixture_map[{ref['offset']}:{ref['offset'] + ref['length']}])\n"
+    )
+    return preamble, "*__fixture_call.get('args', ()), **__fixture_call.get('kwargs', {})"
+
+def preview(value, limit=PREVIEW_CHARS):
+    """Shortened repr of a result compared against a fixture"""
+    text = repr(value)
+    return text if len(text) <= limit else text[:limit] + '...'
+
+def describe(ref):
+    """Placeholder shown in result details instead of a fixture value"""
+    length = sum(length for _, length in ref['chunks']) if 'chunks' in ref else ref['length']
+    return {'fixture_bytes': length}
+
+def _write_atomic(path, blobs):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        # Test scripts read the file as the sandbox user
+        os.fchmod(fd, 0o644)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(MAGIC)
+            for blob in blobs:
+                f.write(blob)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
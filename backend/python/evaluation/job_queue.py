@@ -0,0 +1,219 @@
+"""
+Evaluation Job Queue
+Bounded local queue that runs coding evaluations on background executors
+"""
+
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from config import (
+    EVAL_QUEUE_MAX_SIZE,
+    EVAL_QUEUE_EXECUTORS,
+    EVAL_JOB_RETENTION
+)
+from evaluation.problems import evaluate_submission
+
+class QueueFullError(Exception):
+    """Raised when the queue cannot accept more jobs"""
+
+class _Job:
+    """A single queued evaluation"""
+
+    def __init__(self, payload):
+        self.job_id = uuid.uuid4().hex
+        self.payload = payload
+        self.status = 'queued'
+        self.result = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.done = threading.Event()
+        self._enqueued = time.monotonic()
+        self._started = None
+        self.wait_time = None
+        self.run_time = None
+
+    def to_dict(self):
+        job = {
+            'job_id': self.job_id,
+            'status': self.status,
+            'submitted_at': self.submitted_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'wait_time': self.wait_time,
+            'run_time': self.run_time
+        }
+        if self.status == 'completed':
+            job['result'] = self.result
+        elif self.status == 'failed':
+            job['error'] = self.error
+        return job
+
+class EvaluationQueue:
+    """
+    Bounded queue consumed by a fixed number of executor threads
+
+    Finished jobs are kept for polling until ``retention`` newer jobs have
+    finished.
+    """
+
+    def __init__(self, handler, max_size=1000, executors=4, retention=10000):
+        self.handler = handler
+        self.max_size = max_size
+        self.executors = executors
+        self.retention = retention
+
+        self._queue = queue.Queue(maxsize=max_size)
+        self._jobs = {}
+        self._finished = OrderedDict()
+        self._lock = threading.Lock()
+        self._threads = []
+        self._running = 0
+
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.total_wait_time = 0.0
+        self.total_run_time = 0.0
+        self.max_wait_time = 0.0
+
+    def submit(self, payload):
+        """
+        Enqueue a job
+
+        Returns:
+            Job ID
+
+        Raises:
+            QueueFullError: If the queue is at capacity
+        """
+        self._ensure_started()
+        job = _Job(payload)
+        with self._lock:
+            self._jobs[job.job_id] = job
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                del self._jobs[job.job_id]
+                self.rejected += 1
+            raise QueueFullError('Evaluation queue is full')
+        with self._lock:
+            self.submitted += 1
+        return job.job_id
+
+    def get(self, job_id, wait=0):
+        """
+        Return the job as a dictionary, or None if unknown
+
+        Args:
+            job_id: Job ID returned by submit
+            wait: Seconds to wait for the job to finish (long-poll)
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        if wait > 0:
+            job.done.wait(wait)
+        return job.to_dict()
+
+    def stats(self):
+        """Return queue depth, throughput counters and timing averages"""
+        with self._lock:
+            finished = self.completed + self.failed
+            return {
+                'queue_depth': self._queue.qsize(),
+                'max_size': self.max_size,
+                'executors': self.executors,
+                'running': self._running,
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'failed': self.failed,
+                'rejected': self.rejected,
+                'avg_wait_time': round(self.total_wait_time / finished, 4) if finished else 0.0,
+                'max_wait_time': round(self.max_wait_time, 4),
+                'avg_run_time': round(self.total_run_time / finished, 4) if finished else 0.0
+            }
+
+    def _ensure_started(self):
+        if self._threads:
+            return
+        with self._lock:
+            if self._threads:
+                return
+            for idx in range(self.executors):
+                thread = threading.Thread(
+                    target=self._work,
+                    name=f'evaluation-executor-{idx + 1}',
+                    daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            job.status = 'running'
+            job.started_at = time.time()
+            job._started = time.monotonic()
+            job.wait_time = round(job._started - job._enqueued, 4)
+            with self._lock:
+                self._running += 1
+
+            try:
+                job.result = self.handler(job.payload)
+                job.status = 'completed'
+            except Exception as e:
+                job.error = str(e)
+                job.status = 'failed'
+
+            job.finished_at = time.time()
+            job.run_time = round(time.monotonic() - job._started, 4)
+            self._finish(job)
+            job.done.set()
+            self._queue.task_done()
+
+    def _finish(self, job):
+        with self._lock:
+            self._running -= 1
+            if job.status == 'completed':
+                self.completed += 1
+            else:
+                self.failed += 1
+            self.total_wait_time += job.wait_time
+            self.total_run_time += job.run_time
+            self.max_wait_time = max(self.max_wait_time, job.wait_time)
+
+            self._finished[job.job_id] = job
+            while len(self._finished) > self.retention:
+                expired_id, _ = self._finished.popitem(last=False)
+                self._jobs.pop(expired_id, None)
+
+def run_coding_job(payload):
+    """Evaluate a queued coding submission"""
+    return evaluate_submission(
+        payload.get('response', ''), payload.get('test_cases', {}), payload.get('problem'), payload.get('mode')
+    )
+
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+def get_job_queue():
+    """Return the shared coding evaluation queue"""
+    global _job_queue
+    if _job_queue is None:
+        with _job_queue_lock:
+            if _job_queue is None:
+                _job_queue = EvaluationQueue(
+                    run_coding_job,
+                    max_size=EVAL_QUEUE_MAX_SIZE,
+                    executors=EVAL_QUEUE_EXECUTORS,
+                    retention=EVAL_JOB_RETENTION
+                )
+    return _job_queue
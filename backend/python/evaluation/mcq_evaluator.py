@@ -3,6 +3,19 @@ MCQ Evaluator
 Evaluates multiple choice question responses
 """
 
+import threading
+from collections import OrderedDict
+from itertools import chain, islice, repeat
+
+import numpy as np
+
+from config import MCQ_ANSWER_KEY_CACHE_SIZE
+from metrics import timed
+
+# Code of unanswered questions and answers matching no key entry
+NO_MATCH = -1
+
+@timed('evaluate_mcq')
 def evaluate_mcq(response, correct_answer):
     """
     Evaluate MCQ response
@@ -15,8 +28,8 @@ def evaluate_mcq(response, correct_answer):
         Dictionary with evaluation results
     """
     # Normalize for comparison
-    response_normalized = response.strip().lower()
-    correct_normalized = correct_answer.strip().lower()
+    response_normalized = normalize_answer(response)
+    correct_normalized = normalize_answer(correct_answer)
     
     is_correct = response_normalized == correct_normalized
     
@@ -26,3 +39,129 @@ def evaluate_mcq(response, correct_answer):
         'correct_answer': correct_answer,
         'score': 100 if is_correct else 0
     }
+
+def normalize_answer(answer):
+    """Normalize an answer for comparison"""
+    return answer.strip().lower()
+
+class AnswerKeyIndex:
+    """
+    Answer key for one assessment, normalized once for bulk grading
+    
+    Every distinct normalized key answer gets an integer code; candidate
+    answers are mapped to the same codes, so grading is an integer
+    array comparison.
+    """
+    
+    def __init__(self, assessment_id, correct_answers):
+        self.assessment_id = assessment_id
+        self.correct_answers = list(correct_answers)
+        self.codes = {}
+        self.key_codes = np.array([
+            self.codes.setdefault(normalize_answer(str(a)), len(self.codes))
+            for a in self.correct_answers
+        ], dtype=np.int32)
+    
+    def __len__(self):
+        return len(self.correct_answers)
+    
+    def grade(self, answers):
+        """
+        Grade a matrix of candidate answers
+        
+        Args:
+            answers: List of per-candidate answer lists (None for unanswered;
+                     short rows are treated as unanswered at the end)
+        
+        Returns:
+            Boolean array of shape (candidates, questions)
+        """
+        question_count = len(self.correct_answers)
+        if not answers or not question_count:
+            return np.zeros((len(answers), question_count), dtype=bool)
+        
+        # Each distinct answer text is normalized once per call
+        codes = self.codes
+        seen = {}
+        
+        def encode(answer):
+            if answer is None:
+                return NO_MATCH
+            text = answer if isinstance(answer, str) else str(answer)
+            code = seen.get(text)
+            if code is None:
+                code = seen[text] = codes.get(normalize_answer(text), NO_MATCH)
+            return code
+        
+        # Rows are padded with unanswered questions or trimmed to the key length
+        encoded = np.fromiter(
+            (
+                encode(answer)
+                for row in answers
+                for answer in islice(chain(row, repeat(None)), question_count)
+            ),
+            dtype=np.int32,
+            count=len(answers) * question_count
+        ).reshape(len(answers), question_count)
+        return encoded == self.key_codes
+
+class AnswerKeyCache:
+    """Bounded LRU cache of answer key indexes by assessment ID"""
+    
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._keys = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def register(self, assessment_id, correct_answers):
+        index = AnswerKeyIndex(assessment_id, correct_answers)
+        with self._lock:
+            self._keys[assessment_id] = index
+            self._keys.move_to_end(assessment_id)
+            while len(self._keys) > self.max_entries:
+                self._keys.popitem(last=False)
+        return index
+    
+    def get(self, assessment_id):
+        with self._lock:
+            index = self._keys.get(assessment_id)
+            if index is not None:
+                self._keys.move_to_end(assessment_id)
+            return index
+
+answer_keys = AnswerKeyCache(MCQ_ANSWER_KEY_CACHE_SIZE)
+
+@timed('evaluate_mcq_bulk')
+def evaluate_mcq_bulk(index, answers, candidate_ids=None, include_details=False):
+    """
+    Grade many candidates' MCQ answers against a precompiled answer key
+    
+    Args:
+        index: AnswerKeyIndex for the assessment
+        answers: List of per-candidate answer lists, in question order
+        candidate_ids: Optional candidate IDs parallel to answers
+        include_details: Include per-question correctness
+    
+    Returns:
+        List of per-candidate result dictionaries
+    """
+    if candidate_ids is not None and len(candidate_ids) != len(answers):
+        raise ValueError('candidate_ids must have one entry per answer row')
+    
+    total = len(index)
+    correct = index.grade(answers)
+    correct_counts = correct.sum(axis=1).tolist()
+    
+    results = []
+    for row, correct_count in enumerate(correct_counts):
+        result = {
+            'candidate_id': candidate_ids[row] if candidate_ids is not None else None,
+            'correct': correct_count,
+            'total': total,
+            'score': (correct_count / total * 100) if total > 0 else 0
+        }
+        if include_details:
+            result['results'] = correct[row].tolist()
+        results.append(result)
+    
+    return results
@@ -0,0 +1,180 @@
+"""
+Submission Pre-flight
+Parses a submission once, in-process, before anything reaches the sandbox
+
+Syntax errors and disallowed imports are rejected here, the entry point is
+resolved from the AST rather than by scanning text, and the compiled module
+is cached as marshalled bytecode so sandbox workers can skip compiling it.
+"""
+
+import ast
+import hashlib
+import marshal
+import threading
+from collections import OrderedDict
+
+from config import PREFLIGHT_BLOCKED_IMPORTS, PREFLIGHT_CACHE_SIZE
+from metrics import PREFLIGHT_REJECTIONS, timed
+
+# Filename used for compiled submissions, matching ``python -c`` tracebacks
+SOURCE_FILENAME = '<string>'
+
+class Preflight:
+    """
+    Outcome of checking one submission
+
+    Attributes:
+        error: Rejection message, or None if the submission may run
+        reason: Short rejection category ('syntax', 'import', 'entry_point')
+        function_name: Resolved entry point, or None for script-style code
+        bytecode: Marshalled module code object, or None if rejected
+    """
+
+    __slots__ = ('error', 'reason', 'function_name', 'bytecode')
+
+    def __init__(self, error=None, reason=None, function_name=None, bytecode=None):
+        self.error = error
+        self.reason = reason
+        self.function_name = function_name
+        self.bytecode = bytecode
+
+    @property
+    def ok(self):
+        return self.error is None
+
+class PreflightCache:
+    """Bounded LRU of pre-flight outcomes keyed by source digest"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            outcome = self._entries.get(key)
+            if outcome is not None:
+                self._entries.move_to_end(key)
+            return outcome
+
+    def put(self, key, outcome):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = outcome
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+_cache = PreflightCache(PREFLIGHT_CACHE_SIZE)
+
+@timed('preflight')
+def preflight(code, function_name=None):
+    """
+    Check a submission and compile it once
+
+    Args:
+        code: Submitted source code
+        function_name: Entry point requested by the test suite, if any
+
+    Returns:
+        Preflight outcome (shared between callers; do not mutate)
+    """
+    key = hashlib.sha256(code.encode('utf-8', errors='surrogatepass')).hexdigest()
+    if function_name:
+        key = f'{key}:{function_name}'
+
+    outcome = _cache.get(key)
+    if outcome is None:
+        outcome = _check(code, function_name)
+        _cache.put(key, outcome)
+
+    if not outcome.ok:
+        PREFLIGHT_REJECTIONS.inc(outcome.reason)
+    return outcome
+
+def _check(code, function_name):
+    try:
+        tree = ast.parse(code, SOURCE_FILENAME)
+    except (SyntaxError, ValueError) as e:
+        return Preflight(_format_syntax_error(e), 'syntax')
+
+    blocked = find_blocked_imports(tree)
+    if blocked:
+        return Preflight(f"Import of {', '.join(blocked)} is not allowed", 'import')
+
+    if function_name:
+        if function_name not in _top_level_functions(tree):
+            return Preflight(f"Function '{function_name}' is not defined", 'entry_point')
+    else:
+        function_name = resolve_entry_point(tree)
+
+    try:
+        # Errors such as 'return' outside a function surface only when compiling
+        module = compile(tree, SOURCE_FILENAME, 'exec')
+    except (SyntaxError, ValueError) as e:
+        return Preflight(_format_syntax_error(e), 'syntax')
+
+    return Preflight(function_name=function_name, bytecode=marshal.dumps(module))
+
+def resolve_entry_point(tree):
+    """
+    Pick the function the test cases should call
+
+    Only top-level definitions count. When several are defined, helpers
+    called by other top-level code are skipped; if that still leaves more
+    than one, the first definition wins.
+
+    Returns:
+        Function name, or None if the module defines no top-level function
+    """
+    functions = _top_level_functions(tree)
+    if not functions:
+        return None
+
+    called = set()
+    for node in tree.body:
+        for child in ast.walk(node):
+            if isinstance(child, ast.Call) and isinstance(child.func, ast.Name):
+                if child.func.id != getattr(node, 'name', None):
+                    called.add(child.func.id)
+
+    candidates = [name for name in functions if name not in called]
+    return (candidates or functions)[0]
+
+def find_blocked_imports(tree):
+    """Return the sorted blocked top-level modules imported anywhere in the tree"""
+    blocked = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom):
+            names = [node.module] if node.module and not node.level else []
+        elif isinstance(node, ast.Call) and _is_dynamic_import(node.func) and node.args:
+            argument = node.args[0]
+            names = [argument.value] if isinstance(argument, ast.Constant) and isinstance(argument.value, str) else []
+        else:
+            continue
+
+        for name in names:
+            root = name.split('.')[0]
+            if root in PREFLIGHT_BLOCKED_IMPORTS:
+                blocked.add(root)
+    return sorted(blocked)
+
+def _is_dynamic_import(func):
+    if isinstance(func, ast.Name):
+        return func.id == '__import__'
+    return isinstance(func, ast.Attribute) and func.attr == 'import_module'
+
+def _top_level_functions(tree):
+    return [
+        node.name for node in tree.body
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))
+    ]
+
+def _format_syntax_error(e):
+    if isinstance(e, SyntaxError):
+        location = f' (line {e.lineno})' if e.lineno else ''
+        return f'{type(e).__name__}: {e.msg}{location}'
+    return f'{type(e).__name__}: {e}'
@@ -0,0 +1,321 @@
+"""
+Problem Registry
+Versioned coding problem test suites, uploaded once and referenced by
+``problem_id@version`` in evaluation requests
+
+Suites are validated when registered and turned into the executor-ready
+form (sandbox call arguments and generated-call source) once, instead of
+on every submission. Each upload with different content creates the next
+version; re-uploading the latest content returns the existing version.
+Suites are persisted with the service storage when it is enabled, so every
+process of a pre-fork server sees the same versions.
+"""
+
+import hashlib
+import json
+import keyword
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from config import PROBLEM_CACHE_SIZE
+from storage import get_storage
+from evaluation import fixtures
+from evaluation.code_evaluator import (
+    build_argument_source,
+    build_call_arguments,
+    evaluate_code,
+    evaluate_suite
+)
+
+PROBLEM_ID_PATTERN = re.compile(r'^[A-Za-z0-9_.:-]{1,255}$')
+FUNCTION_NAME_PATTERN = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+class ProblemNotFoundError(LookupError):
+    """Raised when a problem reference names no registered suite"""
+
+class TestSuite:
+    """One version of a problem's test cases in executor-ready form"""
+
+    def __init__(self, problem_id, version, test_cases, function_name=None, digest=None, created_at=None):
+        self.problem_id = problem_id
+        self.version = version
+        self.test_cases = test_cases
+        self.function_name = function_name
+        self.digest = digest or suite_digest(test_cases, function_name)
+        self.created_at = created_at if created_at is not None else time.time()
+
+        # Built once here and reused by every submission
+        inputs = [test_case.get('input', {}) for test_case in test_cases]
+        calls = [build_call_arguments(test_input) for test_input in inputs]
+        self.fixture_path, self.call_refs, self.expected_refs = fixtures.build_fixtures(
+            self.digest, calls, [test_case.get('output') for test_case in test_cases]
+        )
+
+        # Large values are passed to the sandbox by fixture reference and
+        # shown as placeholders in result details
+        self.cases = []
+        self.argument_sources = []
+        self.detail_cases = []
+        for test_case, test_input, call, call_ref, expected_ref in zip(
+                test_cases, inputs, calls, self.call_refs, self.expected_refs):
+            case = call if call_ref is None else {'call_ref': call_ref}
+            detail = test_case
+            if call_ref is not None:
+                detail = dict(detail, input=fixtures.describe(call_ref))
+            if expected_ref is not None:
+                case = dict(case, expected_ref=expected_ref)
+                detail = dict(detail, output=fixtures.describe(expected_ref))
+            self.cases.append(case)
+            self.argument_sources.append(build_argument_source(test_input) if call_ref is None else None)
+            self.detail_cases.append(detail)
+
+    def ensure_fixtures(self):
+        """Recreate the fixture file if it has been removed since the suite was built"""
+        if self.fixture_path is not None and not os.path.exists(self.fixture_path):
+            fixtures.build_fixtures(
+                self.digest,
+                [build_call_arguments(test_case.get('input', {})) for test_case in self.test_cases],
+                [test_case.get('output') for test_case in self.test_cases]
+            )
+
+    @property
+    def ref(self):
+        return f'{self.problem_id}@{self.version}'
+
+    def describe(self, include_cases=False):
+        description = {
+            'problem_id': self.problem_id,
+            'version': self.version,
+            'ref': self.ref,
+            'digest': self.digest,
+            'function_name': self.function_name,
+            'test_case_count': len(self.test_cases),
+            'created_at': self.created_at
+        }
+        if self.fixture_path is not None:
+            description['fixture_cases'] = sum(
+                1 for call_ref, expected_ref in zip(self.call_refs, self.expected_refs)
+                if call_ref is not None or expected_ref is not None
+            )
+        if include_cases:
+            description['test_cases'] = self.test_cases
+        return description
+
+def suite_digest(test_cases, function_name=None):
+    """Content digest of a suite, independent of its problem ID and version"""
+    canonical = json.dumps(
+        {'function_name': function_name, 'test_cases': test_cases},
+        sort_keys=True, separators=(',', ':')
+    )
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+def validate_suite(problem_id, test_cases, function_name=None):
+    """
+    Check an uploaded suite
+
+    Args:
+        problem_id: Problem identifier
+        test_cases: List of ``{"input": ..., "output": ...}`` dictionaries,
+            or a dictionary with a ``test_cases`` list
+        function_name: Optional entry point the suite calls
+
+    Returns:
+        The list of test cases
+
+    Raises:
+        ValueError: Describing the first problem found
+    """
+    if not isinstance(problem_id, str) or not PROBLEM_ID_PATTERN.match(problem_id):
+        raise ValueError('Problem IDs may only contain letters, digits, "_", ".", ":" and "-"')
+
+    if isinstance(test_cases, dict):
+        test_cases = test_cases.get('test_cases')
+    if not isinstance(test_cases, list) or not test_cases:
+        raise ValueError('test_cases must be a non-empty list')
+
+    for idx, test_case in enumerate(test_cases):
+        if not isinstance(test_case, dict) or 'output' not in test_case:
+            raise ValueError(f'Test case {idx + 1} must be an object with an "output"')
+        test_input = test_case.get('input', {})
+        if isinstance(test_input, dict):
+            # Object inputs become keyword arguments of the generated call
+            for key in test_input:
+                if not isinstance(key, str) or not key.isidentifier() or keyword.iskeyword(key):
+                    raise ValueError(f'Test case {idx + 1} input key {key!r} is not a valid argument name')
+
+    if function_name is not None and (
+            not isinstance(function_name, str) or not FUNCTION_NAME_PATTERN.match(function_name)):
+        raise ValueError('function_name must be a Python identifier')
+
+    return test_cases
+
+def parse_reference(ref):
+    """
+    Split ``problem_id@version`` (or a bare ``problem_id`` for the latest)
+
+    Returns:
+        Tuple of (problem_id, version or None)
+
+    Raises:
+        ValueError: If the reference is malformed
+    """
+    if not isinstance(ref, str):
+        raise ValueError('Problem reference must be a string')
+
+    problem_id, _, version = ref.partition('@')
+    if not PROBLEM_ID_PATTERN.match(problem_id):
+        raise ValueError(f'Invalid problem reference: {ref}')
+    if not version or version == 'latest':
+        return problem_id, None
+    if not version.isdigit() or int(version) < 1:
+        raise ValueError(f'Invalid problem version: {version}')
+    return problem_id, int(version)
+
+class ProblemRegistry:
+    """
+    Problem suites by ID and version
+
+    Storage (when enabled) is the source of truth and a bounded LRU keeps
+    parsed suites in memory. Without storage every version is kept in memory.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._suites = OrderedDict()  # (problem_id, version) -> TestSuite
+        self._memory = {}  # problem_id -> {version: TestSuite}, without storage
+        self._lock = threading.Lock()
+        self._register_lock = threading.Lock()
+
+    def register(self, problem_id, test_cases, function_name=None):
+        """
+        Store a suite as the problem's next version
+
+        Returns:
+            Tuple of (TestSuite, created) where ``created`` is False when the
+            content matched the latest version and that version was returned
+
+        Raises:
+            ValueError: If the suite is invalid
+        """
+        test_cases = validate_suite(problem_id, test_cases, function_name)
+        digest = suite_digest(test_cases, function_name)
+        storage = get_storage()
+
+        with self._register_lock:
+            # One retry covers another process taking the same version number
+            for attempt in range(2):
+                latest = self._load(problem_id, None, storage)
+                if latest is not None and latest.digest == digest:
+                    return latest, False
+
+                suite = TestSuite(
+                    problem_id, latest.version + 1 if latest is not None else 1,
+                    test_cases, function_name, digest
+                )
+                if storage is None:
+                    with self._lock:
+                        self._memory.setdefault(problem_id, {})[suite.version] = suite
+                    break
+                try:
+                    storage.save_problem_suite(
+                        problem_id, suite.version, digest, function_name,
+                        json.dumps(test_cases), suite.created_at
+                    )
+                    break
+                except Exception:
+                    if attempt:
+                        raise
+
+            self._cache(suite)
+        return suite, True
+
+    def get(self, problem_id, version=None):
+        """Return a suite version (the latest if None), or None"""
+        return self._load(problem_id, version, get_storage())
+
+    def resolve(self, ref):
+        """
+        Return the suite for a ``problem_id@version`` reference
+
+        Raises:
+            ValueError: If the reference is malformed
+            ProblemNotFoundError: If no such suite is registered
+        """
+        problem_id, version = parse_reference(ref)
+        suite = self.get(problem_id, version)
+        if suite is None:
+            raise ProblemNotFoundError(f'Problem not found: {ref}')
+        suite.ensure_fixtures()
+        return suite
+
+    def versions(self, problem_id):
+        """Return ``[{"version", "digest", "created_at"}]``, oldest first"""
+        storage = get_storage()
+        if storage is None:
+            with self._lock:
+                rows = [
+                    (suite.version, suite.digest, suite.created_at)
+                    for suite in self._memory.get(problem_id, {}).values()
+                ]
+        else:
+            rows = storage.load_problem_versions(problem_id)
+        return [
+            {'version': version, 'digest': digest, 'created_at': created_at}
+            for version, digest, created_at in sorted(rows)
+        ]
+
+    def _load(self, problem_id, version, storage):
+        """Look a suite up in memory, then storage"""
+        if storage is None:
+            with self._lock:
+                versions = self._memory.get(problem_id)
+                if not versions:
+                    return None
+                return versions.get(max(versions) if version is None else version)
+
+        if version is None:
+            versions = storage.load_problem_versions(problem_id)
+            if not versions:
+                return None
+            version = versions[-1][0]
+
+        with self._lock:
+            suite = self._suites.get((problem_id, version))
+            if suite is not None:
+                self._suites.move_to_end((problem_id, version))
+                return suite
+
+        row = storage.load_problem_suite(problem_id, version)
+        if row is None:
+            return None
+        version, digest, function_name, test_cases_json, created_at = row
+        suite = TestSuite(problem_id, version, json.loads(test_cases_json), function_name, digest, created_at)
+        self._cache(suite)
+        return suite
+
+    def _cache(self, suite):
+        key = (suite.problem_id, suite.version)
+        with self._lock:
+            self._suites[key] = suite
+            self._suites.move_to_end(key)
+            while len(self._suites) > self.max_entries:
+                self._suites.popitem(last=False)
+
+problems = ProblemRegistry(PROBLEM_CACHE_SIZE)
+
+def evaluate_submission(code, test_cases=None, problem=None, mode=None):
+    """
+    Evaluate code against a registered suite when ``problem`` is given,
+    otherwise against the inline ``test_cases``, with the given execution
+    mode ('sequential', 'parallel' or 'fail_fast')
+
+    Raises:
+        ValueError: If the problem reference or mode is malformed
+        ProblemNotFoundError: If the referenced suite does not exist
+    """
+    if problem:
+        return evaluate_suite(code, problems.resolve(problem), mode)
+    return evaluate_code(code, test_cases or {}, mode)
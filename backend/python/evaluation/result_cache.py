@@ -0,0 +1,164 @@
+"""
+Result Cache
+Content-addressed cache for code evaluation results
+"""
+
+import copy
+import hashlib
+import json
+import os
+import pickle
+import sys
+import threading
+from collections import OrderedDict
+
+from config import CODE_RESULT_CACHE_SIZE, CODE_RESULT_CACHE_DIR
+
+# Bump when evaluation semantics change so stale results are not reused
+EVALUATOR_VERSION = '3'
+
+RUNTIME_VERSION = f"{sys.implementation.cache_tag}:{sys.version}:{EVALUATOR_VERSION}"
+
+def normalize_source(code):
+    """
+    Normalize source code so trivially different submissions share a key
+
+    Line endings are unified, trailing whitespace is dropped and leading or
+    trailing blank lines are removed.
+    """
+    lines = code.replace('\r\n', '\n').replace('\r', '\n').split('\n')
+    return '\n'.join(line.rstrip() for line in lines).strip('\n')
+
+def make_cache_key(code, test_cases, *extra):
+    """
+    Build the cache key for a submission
+
+    Args:
+        code: Submitted source code
+        test_cases: List of test case dictionaries
+        extra: Additional values that affect the result (e.g. execution mode)
+
+    Returns:
+        Hex digest identifying (normalized source, test cases, runtime version)
+    """
+    digest = hashlib.sha256()
+    digest.update(RUNTIME_VERSION.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(normalize_source(code).encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(json.dumps(test_cases, sort_keys=True, separators=(',', ':'), default=repr).encode('utf-8'))
+    for value in extra:
+        digest.update(b'\0')
+        digest.update(repr(value).encode('utf-8'))
+    return digest.hexdigest()
+
+class ResultCache:
+    """
+    Bounded LRU cache of evaluation results
+
+    Entries evicted from memory are written to ``spill_dir`` when it is set
+    and promoted back on the next lookup.
+    """
+
+    def __init__(self, max_entries=1024, spill_dir=None):
+        self.max_entries = max_entries
+        self.spill_dir = spill_dir
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    def get(self, key):
+        """Return a copy of the cached result, or None"""
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(result)
+
+        result = self._load_spilled(key)
+        with self._lock:
+            if result is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._store(key, result)
+        return copy.deepcopy(result)
+
+    def put(self, key, result):
+        """Store a copy of the result"""
+        result = copy.deepcopy(result)
+        with self._lock:
+            self._store(key, result)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Return hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0
+            }
+
+    def _store(self, key, result):
+        """Insert under the lock, evicting least recently used entries"""
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            evicted_key, evicted = self._entries.popitem(last=False)
+            self.evictions += 1
+            self._spill(evicted_key, evicted)
+
+    def _spill_path(self, key):
+        return os.path.join(self.spill_dir, f"{key}.pickle")
+
+    def _spill(self, key, result):
+        if not self.spill_dir:
+            return
+        path = self._spill_path(key)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, 'wb') as f:
+                pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, path)
+        except OSError:
+            pass
+
+    def _load_spilled(self, key):
+        if not self.spill_dir:
+            return None
+        try:
+            with open(self._spill_path(key), 'rb') as f:
+                return pickle.load(f)
+        except (OSError, pickle.PickleError, EOFError):
+            return None
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_result_cache():
+    """Return the shared result cache, or None when caching is disabled"""
+    global _cache
+    if CODE_RESULT_CACHE_SIZE <= 0:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResultCache(CODE_RESULT_CACHE_SIZE, CODE_RESULT_CACHE_DIR or None)
+    return _cache
@@ -0,0 +1,403 @@
+"""
+Sandbox Pool
+Pre-warmed pool of long-lived Python worker processes for code evaluation
+"""
+
+import atexit
+import base64
+import functools
+import json
+import logging
+import os
+import queue
+import select
+import subprocess
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from config import (
+    SANDBOX_POOL_SIZE,
+    SANDBOX_MAX_JOBS_PER_WORKER,
+    SANDBOX_MAX_OPEN_FILES,
+    SANDBOX_MAX_OUTPUT_BYTES,
+    SANDBOX_MAX_PROCESSES,
+    SANDBOX_MEMORY_LIMIT_MB,
+    SANDBOX_SUITE_CACHE_SIZE,
+    SANDBOX_UID_BASE
+)
+from metrics import (
+    SANDBOX_ACQUIRE_LATENCY,
+    SANDBOX_EXEC_LATENCY,
+    SANDBOX_SPAWN_LATENCY,
+    observe
+)
+
+logger = logging.getLogger(__name__)
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sandbox_worker.py')
+
+# Extra time the pool waits for a worker beyond the per-script timeouts
+WORKER_GRACE_SECONDS = 5
+
+class SandboxError(Exception):
+    """Raised when a sandbox worker fails or stops responding"""
+
+class _Worker:
+    """Handle on a single worker process"""
+
+    def __init__(self, suite_cache_size=0):
+        start = time.perf_counter()
+        self.process = subprocess.Popen(
+            [sys.executable, '-u', WORKER_SCRIPT, str(suite_cache_size)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            close_fds=True
+        )
+        observe(SANDBOX_SPAWN_LATENCY, time.perf_counter() - start)
+        self.jobs = 0
+        self._buffer = b''
+        # Mirror of the worker's suite LRU; both see the same request sequence
+        self.suite_cache_size = suite_cache_size
+        self._suites = OrderedDict()
+
+    def has_suite(self, suite_id):
+        """Record a use of ``suite_id`` and return whether the worker already holds it"""
+        if suite_id in self._suites:
+            self._suites.move_to_end(suite_id)
+            return True
+        if self.suite_cache_size > 0:
+            self._suites[suite_id] = True
+            while len(self._suites) > self.suite_cache_size:
+                self._suites.popitem(last=False)
+        return False
+
+    def send(self, payload):
+        self.process.stdin.write(json.dumps(payload).encode('utf-8') + b'\n')
+        self.process.stdin.flush()
+
+    def receive(self, deadline):
+        """Read the next response line, failing once the deadline has passed"""
+        fd = self.process.stdout.fileno()
+        while b'\n' not in self._buffer:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise SandboxError('Sandbox worker did not respond in time')
+            ready, _, _ = select.select([fd], [], [], remaining)
+            if not ready:
+                continue
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                raise SandboxError('Sandbox worker exited unexpectedly')
+            self._buffer += chunk
+
+        line, self._buffer = self._buffer.split(b'\n', 1)
+        return json.loads(line)
+
+    def cancel(self, timeout):
+        """Stop the running request and discard its remaining responses, each due within ``timeout`` seconds"""
+        self.send({'op': 'stop'})
+        while not self.receive(time.monotonic() + timeout).get('done'):
+            pass
+
+    def is_alive(self):
+        return self.process.poll() is None
+
+    def close(self):
+        try:
+            self.process.stdin.close()
+            self.process.wait(timeout=1)
+        except Exception:
+            self.process.kill()
+            self.process.wait()
+
+class SandboxPool:
+    """
+    Pool of pre-started sandbox workers
+
+    Workers are started eagerly so interpreter startup happens before the
+    first submission arrives. Each worker is recycled after
+    ``max_jobs_per_worker`` jobs or as soon as it misbehaves.
+    """
+
+    def __init__(self, size, max_jobs_per_worker=100, memory_limit_mb=512, suite_cache_size=64):
+        self.size = size
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.memory_limit_mb = memory_limit_mb
+        self.suite_cache_size = suite_cache_size
+        self._idle = queue.Queue()
+        self._closed = False
+        self.spawned = size
+        self.replaced = 0
+        self._stats_lock = threading.Lock()
+
+        for _ in range(size):
+            self._idle.put(_Worker(suite_cache_size))
+
+    def run_scripts(self, scripts, timeout=5, cwd=None):
+        """
+        Run scripts in a worker, each in its own forked child
+
+        Args:
+            scripts: List of Python source strings
+            timeout: Wall-clock timeout per script in seconds
+            cwd: Working directory for the scripts
+
+        Returns:
+            List of result dictionaries with ``status`` ('ok' or 'timeout')
+            and, for completed scripts, ``returncode``, ``stdout`` and ``stderr``
+        """
+        return list(self._request({
+            'op': 'scripts',
+            'scripts': scripts,
+            'timeout': timeout,
+            'cwd': cwd,
+            'limits': self._limits(timeout)
+        }, timeout))
+
+    def run_batch(self, code, function_name, cases, timeout=5, cwd=None, bytecode=None, suite_id=None,
+                  fixtures=None, parallelism=1):
+        """
+        Load the code once and call ``function_name`` for every case
+
+        Args:
+            code: Python source of the submission
+            function_name: Function to call for each case
+            cases: List of ``{"args": [...]}`` or ``{"kwargs": {...}}``
+            timeout: Wall-clock timeout per case in seconds
+            cwd: Working directory for the execution
+            bytecode: Marshalled code object of ``code`` to load instead of
+                compiling it (must come from this interpreter version)
+            suite_id: Stable identifier of ``cases``; workers keep recently
+                used suites, so the cases are only sent to each worker once
+            fixtures: Fixture file that ``call_ref`` and ``expected_ref``
+                entries of the cases point into (see evaluation.fixtures)
+            parallelism: Number of workers (at most the pool size) to split
+                the cases over in contiguous ranges, each loading the code once
+
+        Returns:
+            List of result dictionaries in case order with ``status``
+            ('ok', 'error' or 'timeout') and either ``result`` (repr of the
+            returned value) or ``error``. Cases with an ``expected_ref`` are
+            compared in the sandbox and also carry ``match``, with ``result``
+            shortened to a preview
+        """
+        results = [None] * len(cases)
+        failures = []
+
+        def run_range(start, stop):
+            try:
+                for message in self.stream_batch(code, function_name, cases, timeout, cwd, bytecode,
+                                                 suite_id, fixtures, start, stop):
+                    results[message['case']] = message
+            except SandboxError as e:
+                failures.append(e)
+
+        count = max(1, min(parallelism, self.size, len(cases)))
+        bounds = [len(cases) * idx // count for idx in range(count + 1)]
+        threads = [
+            threading.Thread(target=run_range, args=(bounds[idx], bounds[idx + 1]), daemon=True)
+            for idx in range(1, count)
+        ]
+        for thread in threads:
+            thread.start()
+        run_range(bounds[0], bounds[1])
+        for thread in threads:
+            thread.join()
+
+        if failures:
+            raise failures[0]
+        if any(result is None for result in results):
+            raise SandboxError('Sandbox worker returned an incomplete batch')
+        return results
+
+    def stream_batch(self, code, function_name, cases, timeout=5, cwd=None, bytecode=None, suite_id=None,
+                     fixtures=None, start=0, stop=None):
+        """
+        Like ``run_batch`` in one worker, but yields each case result of
+        ``cases[start:stop]`` as it arrives. Closing the generator early stops
+        the batch and keeps the worker.
+        """
+        payload = {
+            'op': 'batch',
+            'code': code,
+            'function': function_name,
+            'cases': cases,
+            'timeout': timeout,
+            'cwd': cwd,
+            'limits': self._limits(timeout)
+        }
+        if bytecode is not None:
+            payload['bytecode'] = base64.b64encode(bytecode).decode('ascii')
+        if suite_id is not None:
+            payload['suite'] = suite_id
+        if fixtures is not None:
+            payload['fixtures'] = fixtures
+        if start or stop is not None:
+            payload['start'] = start
+            payload['stop'] = stop
+        return self._request(payload, timeout)
+
+    def _request(self, payload, timeout):
+        """Send a request to an idle worker and yield its responses"""
+        worker = self._acquire()
+        healthy = False
+        start = time.perf_counter()
+        try:
+            if payload.get('suite') is not None and worker.has_suite(payload['suite']):
+                payload = {key: value for key, value in payload.items() if key != 'cases'}
+            worker.send(payload)
+            while True:
+                # Each response must arrive within one execution timeout (two
+                # for the first case of a batch, which includes loading the code)
+                deadline = time.monotonic() + 2 * timeout + WORKER_GRACE_SECONDS
+                message = worker.receive(deadline)
+                if message.get('done'):
+                    break
+                if message.get('status') == 'sandbox_error':
+                    # The sandbox failed, not the submission; let the caller fall back
+                    raise SandboxError(message['error'])
+                yield message
+            healthy = True
+        except GeneratorExit:
+            # The caller stopped reading; the worker can be reused once it has stopped
+            try:
+                worker.cancel(2 * timeout + WORKER_GRACE_SECONDS)
+                healthy = True
+            except (OSError, ValueError, SandboxError):
+                pass
+            raise
+        except (OSError, ValueError) as e:
+            raise SandboxError(f'Sandbox worker failed: {e}')
+        finally:
+            observe(SANDBOX_EXEC_LATENCY, time.perf_counter() - start, payload.get('op', 'scripts'))
+            self._release(worker, healthy)
+
+    def stats(self):
+        """Return pool size, idle workers and worker replacement counters"""
+        return {
+            'size': self.size,
+            'idle_workers': self._idle.qsize(),
+            'spawned': self.spawned,
+            'replaced': self.replaced
+        }
+
+    def shutdown(self):
+        """Stop all idle workers"""
+        self._closed = True
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            worker.close()
+
+    def _limits(self, timeout):
+        return execution_limits(timeout, self.memory_limit_mb)
+
+    def _acquire(self):
+        start = time.perf_counter()
+        worker = self._idle.get()
+        observe(SANDBOX_ACQUIRE_LATENCY, time.perf_counter() - start)
+        if not worker.is_alive():
+            worker = self._spawn()
+        return worker
+
+    def _spawn(self):
+        """Start a replacement worker"""
+        with self._stats_lock:
+            self.spawned += 1
+            self.replaced += 1
+        return _Worker(self.suite_cache_size)
+
+    def _release(self, worker, healthy):
+        worker.jobs += 1
+        if not healthy or worker.jobs >= self.max_jobs_per_worker:
+            if healthy:
+                worker.close()
+            else:
+                worker.process.kill()
+                worker.process.wait()
+            if self._closed:
+                return
+            worker = self._spawn()
+        elif self._closed:
+            worker.close()
+            return
+        self._idle.put(worker)
+
+_pool = None
+_pool_lock = threading.Lock()
+_pool_size = SANDBOX_POOL_SIZE
+
+def execution_limits(timeout, memory_limit_mb=SANDBOX_MEMORY_LIMIT_MB):
+    """Resource limits of one execution, as applied by sandbox_worker.apply_limits"""
+    limits = {
+        'cpu_seconds': int(timeout) + 1,
+        'processes': SANDBOX_MAX_PROCESSES,
+        'uid_base': sandbox_uid_base(),
+        'open_files': SANDBOX_MAX_OPEN_FILES,
+        'output_bytes': SANDBOX_MAX_OUTPUT_BYTES
+    }
+    if memory_limit_mb:
+        limits['memory_bytes'] = memory_limit_mb * 1024 * 1024
+    return limits
+
+@functools.lru_cache(maxsize=None)
+def sandbox_uid_base():
+    """
+    SANDBOX_UID_BASE if executions can switch to it, else -1
+
+    Checked once by importing a standard library module as that user, so an
+    interpreter it cannot read disables the switch instead of failing every
+    submission that imports something.
+    """
+    if SANDBOX_UID_BASE < 0 or not hasattr(os, 'geteuid') or os.geteuid() != 0:
+        return -1
+    try:
+        check = subprocess.run(
+            [sys.executable, '-c', 'import fractions'],
+            user=SANDBOX_UID_BASE, group=SANDBOX_UID_BASE, extra_groups=[],
+            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+            timeout=30
+        )
+        error = check.stderr.decode('utf-8', errors='replace').strip() if check.returncode else None
+    except (OSError, subprocess.SubprocessError) as e:
+        error = str(e)
+    if error:
+        logger.warning('Sandboxed code keeps running as root without a process limit: '
+                       'uid %d cannot run %s (%s)', SANDBOX_UID_BASE, sys.executable, error)
+        return -1
+    return SANDBOX_UID_BASE
+
+def is_supported():
+    """Whether the pool can run on this platform"""
+    return hasattr(os, 'fork') and SANDBOX_POOL_SIZE > 0
+
+def pool_stats():
+    """Stats of the shared pool, or None if it has not been started"""
+    return _pool.stats() if _pool is not None else None
+
+def set_pool_size(size):
+    """Size the shared pool before its first use (e.g. to split SANDBOX_POOL_SIZE across server workers)"""
+    global _pool_size
+    with _pool_lock:
+        if _pool is not None:
+            raise RuntimeError('The sandbox pool has already been started')
+        _pool_size = size
+
+def get_pool():
+    """Return the shared sandbox pool, starting it on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = SandboxPool(
+                    _pool_size,
+                    max_jobs_per_worker=SANDBOX_MAX_JOBS_PER_WORKER,
+                    memory_limit_mb=SANDBOX_MEMORY_LIMIT_MB,
+                    suite_cache_size=SANDBOX_SUITE_CACHE_SIZE
+                )
+                atexit.register(_pool.shutdown)
+    return _pool
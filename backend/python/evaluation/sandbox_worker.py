@@ -0,0 +1,676 @@
+"""
+Sandbox Worker
+Long-lived Python process that executes candidate code for the sandbox pool.
+
+The worker is started once by ``evaluation.sandbox`` and reads JSON requests
+from stdin, one per line. Every script is run in a forked child so candidate
+code never touches the worker's own interpreter state, while the expensive
+interpreter startup is paid only once per worker.
+
+This file must only depend on the standard library.
+"""
+
+import ast
+import base64
+import builtins
+import errno
+import json
+import marshal
+import mmap
+import os
+import select
+import signal
+import sys
+import tempfile
+import time
+import traceback
+from collections import OrderedDict
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    resource = None
+
+# Modules commonly used by submissions, imported once so forked children
+# inherit them already loaded
+PRELOADED_MODULES = (
+    'bisect', 'collections', 'functools', 'heapq', 'itertools',
+    'math', 're', 'string'
+)
+
+# Results compared against a fixture are reported as a repr cut to this
+# length (matches evaluation.fixtures.PREVIEW_CHARS)
+PREVIEW_CHARS = 1000
+
+# Test suites kept by ID so the pool sends each one once per worker. The pool
+# mirrors this LRU, so its size comes from the pool on the command line.
+suites = OrderedDict()
+suite_cache_size = 0
+
+class LineReader:
+    """
+    Unbuffered line reader over a file descriptor
+
+    Lines are split here rather than by a buffered file object, so bytes
+    already read are always visible in ``buffer`` and ``select`` on ``fd``
+    only reports data that has not been read yet.
+    """
+
+    def __init__(self, fd):
+        self.fd = fd
+        self.buffer = b''
+        self.eof = False
+
+    def fileno(self):
+        return self.fd
+
+    def has_line(self):
+        """True when readline() would return without blocking"""
+        return b'\n' in self.buffer or self.eof
+
+    def fill(self):
+        """Read whatever the descriptor has available"""
+        chunk = os.read(self.fd, 65536)
+        if chunk:
+            self.buffer += chunk
+        else:
+            self.eof = True
+
+    def readline(self):
+        """Next line including its newline, or b'' at end of file"""
+        while not self.has_line():
+            self.fill()
+        if b'\n' in self.buffer:
+            line, self.buffer = self.buffer.split(b'\n', 1)
+            return line + b'\n'
+        line, self.buffer = self.buffer, b''
+        return line
+
+    def __iter__(self):
+        while True:
+            line = self.readline()
+            if not line:
+                return
+            yield line
+
+# Requests from the pool; a batch also watches it for stop messages
+requests = LineReader(0)
+
+def main():
+    """Serve requests from stdin until the pool closes the pipe"""
+    global suite_cache_size
+    if len(sys.argv) > 1:
+        suite_cache_size = int(sys.argv[1])
+
+    for name in PRELOADED_MODULES:
+        __import__(name)
+
+    # Keep a private handle on the protocol channel and point fd 1 at stderr,
+    # so nothing printed by accident can corrupt the response stream
+    channel = os.fdopen(os.dup(1), 'wb')
+    os.dup2(2, 1)
+
+    for line in requests:
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        if request.get('op') == 'stop':
+            # Arrived after the request it was meant to stop had finished
+            continue
+        for response in handle_request(request, channel.fileno()):
+            channel.write(json.dumps(response).encode('utf-8') + b'\n')
+            channel.flush()
+
+def handle_request(request, channel_fd):
+    """
+    Execute one pool request
+
+    Yields one response dictionary per script or test case followed by a
+    final ``{"done": true}`` marker. A batch ends early, still with the
+    marker, when the pool sends ``{"op": "stop"}`` while it runs.
+    """
+    timeout = request.get('timeout', 5)
+    cwd = request.get('cwd') or tempfile.gettempdir()
+    limits = request.get('limits', {})
+
+    if request.get('op') == 'batch':
+        code = request['code']
+        if request.get('bytecode'):
+            # Pre-compiled by the pool's pre-flight check with this interpreter
+            code = marshal.loads(base64.b64decode(request['bytecode']))
+        yield from run_batch(
+            code, request['function'], _request_cases(request),
+            timeout, cwd, limits, channel_fd, request.get('fixtures'),
+            request.get('start', 0), request.get('stop')
+        )
+    else:
+        for script in request.get('scripts', []):
+            yield run_script(script, timeout, cwd, limits, channel_fd)
+
+    yield {'done': True}
+
+def _request_cases(request):
+    """Cases sent with the request, or those kept for its suite"""
+    suite_id = request.get('suite')
+    if suite_id is None:
+        return request.get('cases', [])
+
+    if 'cases' in request:
+        cases = request['cases']
+        if suite_cache_size > 0:
+            suites[suite_id] = cases
+    else:
+        # A miss means the pool and worker disagree; exiting makes the pool
+        # replace this worker and the evaluator fall back to per-script runs
+        cases = suites[suite_id]
+    if suite_id in suites:
+        suites.move_to_end(suite_id)
+        while len(suites) > suite_cache_size:
+            suites.popitem(last=False)
+    return cases
+
+def run_script(script, timeout, cwd, limits, channel_fd):
+    """Run a script in a forked child, mirroring ``python -c script``"""
+    stdout_file = tempfile.TemporaryFile()
+    stderr_file = tempfile.TemporaryFile()
+    exit_read, exit_write = os.pipe()
+
+    pid = os.fork()
+    if pid == 0:
+        os.close(exit_read)
+        _run_child(script, cwd, limits, stdout_file, stderr_file, channel_fd)
+
+    os.close(exit_write)
+    try:
+        # The child holds the write end open, so EOF means it has exited
+        ready, _, _ = select.select([exit_read], [], [], timeout)
+        timed_out = not ready
+        if timed_out:
+            _kill_group(pid)
+        _, status = os.waitpid(pid, 0)
+    finally:
+        os.close(exit_read)
+        reap_user(sandbox_uid(limits, pid))
+
+    # A script killed for exceeding its CPU time is reported as a timeout
+    if timed_out or _returncode(status) == -signal.SIGXCPU:
+        stdout_file.close()
+        stderr_file.close()
+        return {'status': 'timeout'}
+
+    return {
+        'status': 'ok',
+        'returncode': _returncode(status),
+        'stdout': _read_output(stdout_file),
+        'stderr': _read_output(stderr_file)
+    }
+
+def run_batch(code, function_name, cases, timeout, cwd, limits, channel_fd, fixtures=None, start=0, stop=None):
+    """
+    Load the code (source or code object) once in a forked child and call
+    the function for each case in ``cases[start:stop]``
+
+    Cases may reference their call arguments (``call_ref``) and expected
+    output (``expected_ref``) in the ``fixtures`` file instead of carrying
+    them; referenced outputs are compared in the child.
+
+    Yields one result per case in order. If the child dies or stops
+    responding, the current case is reported and a fresh child continues
+    with the remaining cases. Errors caused by a resource limit carry a
+    ``verdict`` ('MLE' or 'OLE'); cases killed for exceeding their CPU time
+    are reported as timeouts. A stop request from the pool kills the child
+    and ends the batch.
+    """
+    stop = len(cases) if stop is None else min(stop, len(cases))
+    next_case = start
+    while next_case < stop:
+        stderr_file = tempfile.TemporaryFile()
+        result_read, result_write = os.pipe()
+
+        pid = os.fork()
+        if pid == 0:
+            os.close(result_read)
+            _run_batch_child(
+                code, function_name, cases, next_case, stop, timeout,
+                cwd, limits, stderr_file, result_write, channel_fd, fixtures
+            )
+
+        os.close(result_write)
+        reader = LineReader(result_read)
+        try:
+            while next_case < stop:
+                message = _next_result(reader, pid, timeout)
+                if message is None:
+                    return
+                if 'case' not in message:
+                    # The child stopped before finishing the current case
+                    message['case'] = next_case
+                    if message['status'] == 'error' and message['returncode'] == -signal.SIGXCPU:
+                        message = {'case': next_case, 'status': 'timeout'}
+                    elif message['status'] == 'error':
+                        message['error'] = _read_output(stderr_file) or \
+                            f"Process exited with code {message['returncode']}"
+                    yield message
+                    next_case += 1
+                    break
+                yield message
+                next_case = message['case'] + 1
+            else:
+                os.waitpid(pid, 0)
+        finally:
+            os.close(result_read)
+            reap_user(sandbox_uid(limits, pid))
+            if not stderr_file.closed:
+                stderr_file.close()
+
+def _next_result(reader, pid, timeout):
+    """
+    Read the next case result from a batch child
+
+    If the child stops responding it is killed and reaped, and a result
+    without a ``case`` key is returned for the case it was running. If the
+    pool asks to stop (or goes away) the child is killed and None returned.
+    """
+    # The child may spend one timeout loading the code and one (plus the
+    # grace it allows a case process) on the case before it reports
+    deadline = time.monotonic() + 2 * timeout + 2
+    while not (requests.has_line() or reader.has_line()):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            _kill_group(pid)
+            os.waitpid(pid, 0)
+            return {'status': 'timeout'}
+        ready, _, _ = select.select([reader, requests], [], [], remaining)
+        for source in ready:
+            source.fill()
+
+    if requests.has_line():
+        # Nothing else is sent while a request runs, so this is a stop
+        requests.readline()
+        _kill_group(pid)
+        os.waitpid(pid, 0)
+        return None
+
+    line = reader.readline()
+    if not line:
+        _, status = os.waitpid(pid, 0)
+        return {'status': 'error', 'returncode': _returncode(status)}
+
+    return json.loads(line)
+
+class _CaseTimeout(BaseException):
+    """Raised inside a batch process when loading or a case exceeds its timeout"""
+
+def _raise_timeout(signum, frame):
+    raise _CaseTimeout()
+
+def _run_batch_child(code, function_name, cases, start, stop, timeout, cwd, limits,
+                     stderr_file, result_fd, channel_fd, fixtures=None):
+    """
+    Body of the forked batch child. Never returns.
+
+    The child loads the submission once and then forks a fresh process from
+    that pristine state for every case, so module globals changed by one case
+    are never seen by the next, as when each case runs its own script.
+    """
+    exit_code = 1
+    cpu_seconds = limits.get('cpu_seconds')
+    if cpu_seconds:
+        # Loading plus forking every case; each case process gets its own
+        # allowance of cpu_seconds
+        limits = dict(limits, cpu_seconds=cpu_seconds * (stop - start + 1))
+    if limits.get('processes'):
+        # The child itself counts against its sandbox user, so its case
+        # processes get the same allowance as a script
+        limits = dict(limits, processes=limits['processes'] + 1)
+    try:
+        # Mapped before _prepare_child may switch to the sandbox user
+        fixture_view = _map_fixtures(fixtures) if fixtures else None
+        _prepare_child(cwd, limits, None, stderr_file, channel_fd)
+        results = os.fdopen(result_fd, 'w')
+        signal.signal(signal.SIGALRM, _raise_timeout)
+
+        def emit(index, **fields):
+            fields['case'] = index
+            results.write(json.dumps(fields) + '\n')
+            results.flush()
+
+        # Load the submission once; loading counts against the first case.
+        # What it prints is part of every case's output, as in a script.
+        namespace = {'__name__': '__main__', '__builtins__': builtins}
+        load_output = tempfile.TemporaryFile()
+        try:
+            os.dup2(load_output.fileno(), 1)
+            signal.setitimer(signal.ITIMER_REAL, timeout)
+            if isinstance(code, str):
+                code = compile(code, '<string>', 'exec')
+            exec(code, namespace)
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            function = namespace[function_name]
+            sys.stdout.flush()
+        except _CaseTimeout:
+            for index in range(start, stop):
+                emit(index, status='timeout')
+            exit_code = 0
+            return
+        except BaseException as e:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            error = _error_fields(e)
+            for index in range(start, stop):
+                emit(index, **error)
+            exit_code = 0
+            return
+        printed = _read_output(load_output)
+
+        for index in range(start, stop):
+            try:
+                fields = _run_case(function, cases[index], printed, fixture_view, timeout, limits)
+            except OSError as e:
+                # No case process could be started; the pool reports this as
+                # a sandbox failure instead of a verdict on the submission
+                emit(index, status='sandbox_error', error=f'Could not start a case process: {e}')
+                exit_code = 0
+                return
+            emit(index, **fields)
+
+        exit_code = 0
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(exit_code)
+
+def _run_case(function, case, printed, fixture_view, timeout, limits):
+    """Run one case in a process forked from the loaded submission and return its result fields"""
+    output_file = tempfile.TemporaryFile()
+    report_file = tempfile.TemporaryFile()
+    stderr_file = tempfile.TemporaryFile()
+    exit_read, exit_write = os.pipe()
+
+    pid = os.fork()
+    if pid == 0:
+        os.close(exit_read)
+        _run_case_child(function, case, printed, fixture_view, timeout, limits,
+                        output_file, report_file, stderr_file)
+
+    os.close(exit_write)
+    try:
+        # The case process holds the write end open, so EOF means it has exited
+        ready, _, _ = select.select([exit_read], [], [], timeout + 1)
+        if not ready:
+            os.kill(pid, signal.SIGKILL)
+        _, status = os.waitpid(pid, 0)
+    finally:
+        os.close(exit_read)
+        output_file.close()
+
+    report = _read_output(report_file)
+    stderr = _read_output(stderr_file)
+    if not ready or _returncode(status) == -signal.SIGXCPU:
+        return {'status': 'timeout'}
+    if report:
+        return json.loads(report)
+    return {'status': 'error', 'error': stderr or f"Process exited with code {_returncode(status)}"}
+
+def _run_case_child(function, case, printed, fixture_view, timeout, limits, output_file, report_file, stderr_file):
+    """Body of a forked case process. Never returns."""
+    exit_code = 1
+    try:
+        os.dup2(output_file.fileno(), 1)
+        os.dup2(stderr_file.fileno(), 2)
+        cpu_seconds = limits.get('cpu_seconds')
+        if cpu_seconds and resource is not None:
+            # CPU time counters start from zero in a forked process
+            _lower_limit(resource.RLIMIT_CPU, cpu_seconds, cpu_seconds + 1)
+        fields = _call_case(function, case, printed, fixture_view, timeout, limits.get('output_bytes'), output_file)
+        report_file.write(json.dumps(fields).encode('utf-8'))
+        report_file.flush()
+        exit_code = 0
+    finally:
+        os._exit(exit_code)
+
+def _call_case(function, case, printed, fixture_view, timeout, output_bytes, output_file):
+    """Call the function for one case and return the result fields"""
+    try:
+        call = case
+        if 'call_ref' in case:
+            call = _load_fixture(fixture_view, case['call_ref'])
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+        value = function(*call.get('args', []), **call.get('kwargs', {}))
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        sys.stdout.flush()
+    except _CaseTimeout:
+        return {'status': 'timeout'}
+    except BaseException as e:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        return _error_fields(e)
+
+    output_file.seek(0)
+    printed += output_file.read().decode('utf-8', errors='replace')
+    if printed:
+        # A test script prints the repr after whatever the code printed, and
+        # its whole output is parsed; do the same so both paths agree
+        value = parse_output(printed + repr(value))
+
+    if 'expected_ref' in case:
+        return {
+            'status': 'ok', 'result': _preview(value),
+            'match': bool(_matches_fixture(fixture_view, case['expected_ref'], value))
+        }
+    result = repr(value)
+    if output_bytes and len(result) > output_bytes:
+        return {
+            'status': 'error', 'verdict': 'OLE',
+            'error': f'Result of {len(result)} characters exceeds the output limit'
+        }
+    return {'status': 'ok', 'result': result}
+
+def parse_output(output):
+    """
+    Value printed by a test script: its stripped output as a Python literal,
+    or the text itself if it is not one (shared with evaluation.code_evaluator)
+    """
+    text = output.strip()
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        return text
+
+def _error_fields(e):
+    """Result fields for an exception raised by candidate code"""
+    fields = {'status': 'error', 'error': _format_exception(e)}
+    if isinstance(e, MemoryError):
+        fields['verdict'] = 'MLE'
+    elif isinstance(e, OSError) and e.errno == errno.EFBIG:
+        # Raised by writes beyond RLIMIT_FSIZE (Python ignores SIGXFSZ)
+        fields['verdict'] = 'OLE'
+    return fields
+
+def _map_fixtures(path):
+    """Map a fixture file read-only; values are unmarshalled straight from it"""
+    with open(path, 'rb') as f:
+        return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+def _load_fixture(view, ref):
+    return marshal.loads(view[ref['offset']:ref['offset'] + ref['length']])
+
+def _matches_fixture(view, ref, actual):
+    """
+    Compare a result with a fixture value like compare_outputs in
+    evaluation.code_evaluator, one chunk at a time for chunked lists
+    """
+    if 'chunks' not in ref:
+        return _matches(actual, _load_fixture(view, ref))
+
+    if not isinstance(actual, list) or len(actual) != ref['count']:
+        return False
+    position = 0
+    for offset, length in ref['chunks']:
+        chunk = marshal.loads(view[offset:offset + length])
+        if actual[position:position + len(chunk)] != chunk:
+            return False
+        position += len(chunk)
+    return True
+
+def _matches(actual, expected):
+    if isinstance(expected, (int, float)) and isinstance(actual, (int, float)):
+        return abs(actual - expected) < 0.0001
+    return actual == expected
+
+def _preview(value):
+    text = repr(value)
+    return text if len(text) <= PREVIEW_CHARS else text[:PREVIEW_CHARS] + '...'
+
+def _format_exception(e):
+    """Format an exception raised by candidate code, hiding worker frames"""
+    tb = e.__traceback__
+    while tb is not None and tb.tb_frame.f_code.co_filename == __file__:
+        tb = tb.tb_next
+    return ''.join(traceback.format_exception(type(e), e, tb))
+
+def _prepare_child(cwd, limits, stdout_file, stderr_file, channel_fd):
+    """Isolate a freshly forked child from the worker"""
+    os.setpgid(0, 0)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+
+    # Candidate code must not be able to talk to the pool
+    os.close(channel_fd)
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 0)
+    os.dup2(devnull if stdout_file is None else stdout_file.fileno(), 1)
+    os.dup2(stderr_file.fileno(), 2)
+    os.close(devnull)
+
+    os.chdir(cwd)
+    apply_limits(limits)
+
+def _run_child(script, cwd, limits, stdout_file, stderr_file, channel_fd):
+    """Body of the forked child. Never returns."""
+    exit_code = 1
+    try:
+        _prepare_child(cwd, limits, stdout_file, stderr_file, channel_fd)
+        sys.argv = ['-c']
+        exit_code = _exec_script(script)
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(exit_code)
+
+def _exec_script(script):
+    """Execute the script like the interpreter would and return the exit code"""
+    namespace = {'__name__': '__main__', '__builtins__': builtins}
+    try:
+        exec(compile(script, '<string>', 'exec'), namespace)
+    except SystemExit as e:
+        if e.code is None:
+            return 0
+        if isinstance(e.code, int):
+            return e.code
+        print(e.code, file=sys.stderr)
+        return 1
+    except BaseException as e:
+        # Skip this frame so the traceback matches ``python -c``
+        traceback.print_exception(type(e), e, e.__traceback__.tb_next)
+        return 1
+    return 0
+
+def apply_limits(limits):
+    """
+    Apply resource limits to the current (child) process
+
+    ``limits`` holds ``cpu_seconds``, ``memory_bytes`` (address space),
+    ``processes``, ``open_files`` and ``output_bytes`` (size of any file
+    written, including captured output); missing or zero values are left
+    unlimited. The kernel counts processes per user (and ignores the limit
+    for root), so ``processes`` only applies once the process has switched
+    to the dedicated user ``sandbox_uid`` picks for it; under a shared user
+    it would count the service's own processes.
+    """
+    uid = sandbox_uid(limits, os.getpid())
+    if uid is not None:
+        os.setgroups([])
+        os.setgid(uid)
+        os.setuid(uid)
+
+    if resource is None:
+        return
+
+    cpu_seconds = limits.get('cpu_seconds')
+    if cpu_seconds:
+        _lower_limit(resource.RLIMIT_CPU, cpu_seconds, cpu_seconds + 1)
+
+    for name, key in (
+            ('RLIMIT_AS', 'memory_bytes'),
+            ('RLIMIT_NPROC', 'processes'),
+            ('RLIMIT_NOFILE', 'open_files'),
+            ('RLIMIT_FSIZE', 'output_bytes')):
+        if key == 'processes' and uid is None:
+            continue
+        value = limits.get(key)
+        if value and hasattr(resource, name):
+            _lower_limit(getattr(resource, name), value, value)
+
+def sandbox_uid(limits, pid):
+    """
+    Unprivileged uid (also used as gid) for the execution rooted at ``pid``
+
+    Each execution gets its own uid, so its process count and any processes
+    it leaves behind are its own. None unless running as root with
+    ``uid_base`` set.
+    """
+    uid_base = limits.get('uid_base', -1)
+    if uid_base < 0 or os.geteuid() != 0:
+        return None
+    return uid_base + pid
+
+def reap_user(uid):
+    """Kill every process left running as a sandbox uid"""
+    if uid is None:
+        return
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os.setuid(uid)
+            # Signals every process of this uid except the caller
+            os.kill(-1, signal.SIGKILL)
+        except OSError:
+            pass
+        finally:
+            os._exit(0)
+    os.waitpid(pid, 0)
+
+def _lower_limit(which, soft, hard):
+    """Set a limit, never above the current hard limit (which cannot be raised)"""
+    _, current = resource.getrlimit(which)
+    if current != resource.RLIM_INFINITY:
+        soft, hard = min(soft, current), min(hard, current)
+    resource.setrlimit(which, (soft, hard))
+
+def _kill_group(pid):
+    """Kill the child and anything it spawned"""
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except OSError:
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except OSError:
+            pass
+
+def _returncode(status):
+    """Convert a wait status to a subprocess-style return code"""
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+def _read_output(output_file):
+    output_file.seek(0)
+    data = output_file.read()
+    output_file.close()
+    return data.decode('utf-8', errors='replace')
+
+if __name__ == '__main__':
+    main()
@@ -3,23 +3,63 @@ Python AI Service - Flask Application
 Main entry point for AI/ML evaluation services
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
+from itertools import islice
+import math
 import sys
 import os
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(__file__))
 
-from config import FLASK_HOST, FLASK_PORT, FLASK_DEBUG
+from config import (
+    FLASK_HOST,
+    FLASK_PORT,
+    FLASK_DEBUG,
+    EVAL_JOB_MAX_WAIT,
+    LEADERBOARD_SNAPSHOT_PATH,
+    STREAM_BATCH_SIZE
+)
+import metrics
+import profiling
+import serialization
 from ai_engine.scoring import calculate_score
-from ai_engine.ranking import rank_candidates
-from ai_engine.behavioral import analyze_behavior
-from evaluation.code_evaluator import evaluate_code
-from evaluation.mcq_evaluator import evaluate_mcq
+from ai_engine.batch_scoring import calculate_scores_batch, iter_scores_batched
+from ai_engine.incremental import score_states
+from ai_engine.streaming import EventBatchError, behavior_stream
+from ai_engine.ranking import rank_candidates, select_ranked, iter_ranking_rows
+from ai_engine.explanations import explanations
+from storage import (
+    append_responses,
+    resolve_rank_candidates,
+    resolve_responses,
+    store_response_histories,
+    store_scores
+)
+from ai_engine.leaderboard import get_leaderboards
+from ai_engine.behavioral import analyze_behavior, analyze_behavior_batch
+from evaluation.problems import problems, evaluate_submission, ProblemNotFoundError
+from evaluation.code_evaluator import resolve_mode
+from evaluation.mcq_evaluator import evaluate_mcq, evaluate_mcq_bulk, answer_keys
+from evaluation import sandbox
+from evaluation.job_queue import get_job_queue, QueueFullError
+from evaluation.result_cache import get_result_cache
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
+metrics.init_app(app)  # Per-route request metrics and /metrics
+serialization.init_app(app)  # Fast JSON, MessagePack and gzip for all routes
+profiling.init_app(app)  # Opt-in request profiles and /admin/profiles
+
+# Cache hit ratios and queue depths, read when /metrics is scraped
+metrics.register_stats('ai_code_result_cache', 'Code evaluation result cache',
+                       lambda: get_result_cache().stats() if get_result_cache() is not None else None)
+metrics.register_stats('ai_evaluation_queue', 'Asynchronous evaluation queue',
+                       lambda: get_job_queue().stats())
+metrics.register_stats('ai_sandbox_pool', 'Sandbox worker pool', sandbox.pool_stats)
+metrics.register_stats('ai_behavior_stream', 'Streaming behavioral analytics',
+                       lambda: {'pending_events': behavior_stream.events.qsize()})
 
 @app.route('/health', methods=['GET'])
 def health_check():
@@ -45,23 +85,27 @@ def evaluate():
                 "difficulty": str,
                 "domain": str
             }
-        ]
+        ],
+        "role_match": str   (optional, records the candidate for role rankings)
     }
+    Without "responses", the candidate's stored responses are scored.
     """
     try:
         data = request.get_json()
+        responses = resolve_responses(data)
         
-        if not data or 'responses' not in data:
+        if responses is None:
             return jsonify({
                 'success': False,
                 'message': 'Invalid request data'
             }), 400
         
         candidate_id = data.get('candidate_id')
-        responses = data.get('responses', [])
         
         # Calculate scores
         scores = calculate_score(responses)
+        explanations.update_scores(candidate_id, scores)
+        store_scores([{'candidate_id': candidate_id, 'scores': scores}], data.get('role_match'))
         
         return jsonify({
             'success': True,
@@ -75,6 +119,147 @@ def evaluate():
             'message': str(e)
         }), 500
 
+@app.route('/ai/evaluate/batch', methods=['POST'])
+def evaluate_batch():
+    """
+    Evaluate responses for many candidates at once
+    Expected JSON:
+    {
+        "candidates": [
+            {
+                "candidate_id": int,
+                "responses": [...]
+            }
+        ],
+        "role_match": str   (optional, records the candidates for role rankings)
+    }
+    """
+    try:
+        data = request.get_json()
+        
+        if not data or 'candidates' not in data:
+            return jsonify({
+                'success': False,
+                'message': 'Invalid request data'
+            }), 400
+        
+        candidates = data.get('candidates', [])
+        
+        # Calculate scores for all candidates in one pass
+        results = calculate_scores_batch(candidates)
+        for result in results:
+            explanations.update_scores(result['candidate_id'], result['scores'])
+        
+        store_response_histories(candidates)
+        store_scores(results, data.get('role_match'))
+        
+        return jsonify({
+            'success': True,
+            'results': results
+        }), 200
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
+
+@app.route('/ai/evaluate/stream', methods=['POST'])
+def evaluate_stream():
+    """
+    Score many candidates, streaming results back as each chunk completes
+    Accepts NDJSON (Content-Type: application/x-ndjson), one candidate per line:
+        {"candidate_id": int, "responses": [...]}
+    or the same JSON body as /ai/evaluate/batch.
+    
+    Responds with NDJSON, one {"candidate_id": int, "scores": {...}} line per
+    candidate in input order. An error ends the stream with a
+    {"success": false, "message": str} line.
+    """
+    try:
+        candidates = _request_records('candidates')
+        
+        if candidates is None:
+            return jsonify({
+                'success': False,
+                'message': 'Invalid request data'
+            }), 400
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
+    
+    def generate():
+        try:
+            for results in iter_scores_batched(candidates, STREAM_BATCH_SIZE):
+                for result in results:
+                    explanations.update_scores(result['candidate_id'], result['scores'])
+                store_scores(results)
+                yield serialization.dumps_ndjson(results)
+        except Exception as e:
+            yield serialization.dumps_ndjson([{'success': False, 'message': str(e)}])
+    
+    return Response(stream_with_context(generate()), mimetype=serialization.NDJSON_MIMETYPE)
+
+@app.route('/ai/evaluate/incremental', methods=['POST'])
+def evaluate_incremental():
+    """
+    Apply new responses to a candidate's running scores
+    Expected JSON:
+    {
+        "candidate_id": int,
+        "responses": [...],          (only the new responses)
+        "state": {...},              (optional, resume from a serialized state)
+        "reset": bool,               (optional, start from an empty state)
+        "include_state": bool        (optional, return the serialized state)
+    }
+    """
+    try:
+        data = request.get_json()
+        
+        if not data or 'candidate_id' not in data:
+            return jsonify({
+                'success': False,
+                'message': 'Invalid request data'
+            }), 400
+        
+        candidate_id = data.get('candidate_id')
+        responses = data.get('responses', [])
+        state, _ = score_states.apply(
+            candidate_id,
+            responses,
+            state=data.get('state'),
+            reset=data.get('reset', False)
+        )
+        
+        # Feed live behavioral analytics
+        for response in responses:
+            behavior_stream.publish({**response, 'candidate_id': candidate_id})
+        
+        scores = state.scores()
+        explanations.update_scores(candidate_id, scores)
+        
+        append_responses(candidate_id, responses)
+        store_scores([{'candidate_id': candidate_id, 'scores': scores}])
+        
+        result = {
+            'success': True,
+            'candidate_id': candidate_id,
+            'scores': scores
+        }
+        if data.get('include_state'):
+            result['state'] = state.to_dict()
+        
+        return jsonify(result), 200
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
+
 @app.route('/ai/rank', methods=['POST'])
 def rank():
     """
@@ -91,26 +276,149 @@ def rank():
                 }
             }
         ],
-        "role_match": str
+        "role_match": str,
+        "top_k": int,      (optional, number of rows to return)
+        "offset": int      (optional, rows to skip)
     }
+    Instead of "candidates", "candidate_ids": [int] ranks stored scores for
+    those candidates, and "role_match" alone ranks every stored candidate
+    recorded for the role.
     """
     try:
         data = request.get_json()
+        candidates = resolve_rank_candidates(data)
         
-        if not data or 'candidates' not in data:
+        if candidates is None:
             return jsonify({
                 'success': False,
                 'message': 'Invalid request data'
             }), 400
         
-        candidates = data.get('candidates', [])
         role_match = data.get('role_match', 'General')
+        top_k = data.get('top_k')
+        offset = data.get('offset', 0)
+        
+        if (top_k is not None and (not isinstance(top_k, int) or top_k < 0)) or \
+                not isinstance(offset, int) or offset < 0:
+            return jsonify({
+                'success': False,
+                'message': 'top_k and offset must be non-negative integers'
+            }), 400
         
         # Generate rankings
-        rankings = rank_candidates(candidates, role_match)
+        rankings = rank_candidates(candidates, role_match, top_k=top_k, offset=offset)
+        
+        return jsonify({
+            'success': True,
+            'total': len(candidates),
+            'offset': offset,
+            'rankings': rankings
+        }), 200
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
+
+@app.route('/ai/rank/stream', methods=['POST'])
+def rank_stream():
+    """
+    Rank a large candidate pool read incrementally
+    Accepts NDJSON (Content-Type: application/x-ndjson), one candidate per line:
+        {"candidate_id": int, "scores": {...}}
+    or the same JSON body as /ai/rank.
+    Query parameters: role_match, top_k (required), offset
+    
+    Only offset + top_k candidates are held in memory. Responds with NDJSON,
+    one ranked row per line; X-Total-Count carries the pool size.
+    """
+    try:
+        role_match = request.args.get('role_match', 'General')
+        top_k = request.args.get('top_k', type=int)
+        offset = request.args.get('offset', 0, type=int)
+        
+        if top_k is None or top_k < 0 or offset < 0:
+            return jsonify({
+                'success': False,
+                'message': 'top_k is required; top_k and offset must be non-negative integers'
+            }), 400
+        
+        candidates = _request_records('candidates')
+        
+        if candidates is None:
+            return jsonify({
+                'success': False,
+                'message': 'Invalid request data'
+            }), 400
+        
+        total = 0
+        
+        def counted():
+            nonlocal total
+            for candidate in candidates:
+                total += 1
+                yield candidate
+        
+        # Bounded selection completes before the first row is sent
+        pool = counted()
+        selected = select_ranked(pool, top_k=top_k, offset=offset)
+        # top_k=0 selects without reading the pool; count (and validate) it anyway
+        for _ in pool:
+            pass
+        
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
+    
+    def generate():
+        rows = iter_ranking_rows(selected, role_match, offset=offset)
+        while True:
+            chunk = list(islice(rows, STREAM_BATCH_SIZE))
+            if not chunk:
+                return
+            yield serialization.dumps_ndjson(chunk)
+    
+    response = Response(generate(), mimetype=serialization.NDJSON_MIMETYPE)
+    response.headers['X-Total-Count'] = str(total)
+    return response
+
+@app.route('/ai/leaderboard/<role_match>', methods=['GET'])
+def get_leaderboard(role_match):
+    """
+    Get a page of a role leaderboard
+    Query parameters:
+        offset: rows to skip (default 0)
+        limit: rows to return (default 50)
+    """
+    try:
+        offset = request.args.get('offset', 0, type=int)
+        limit = request.args.get('limit', 50, type=int)
+        
+        if offset < 0 or limit < 0:
+            return jsonify({
+                'success': False,
+                'message': 'offset and limit must be non-negative integers'
+            }), 400
+        
+        registry = get_leaderboards()
+        with registry.lock:
+            leaderboard = registry.get(role_match)
+            total = len(leaderboard) if leaderboard else 0
+            rankings = leaderboard.range(offset, limit) if leaderboard else []
         
         return jsonify({
             'success': True,
+            'role_match': role_match,
+            'total': total,
+            'offset': offset,
             'rankings': rankings
         }), 200
         
@@ -120,6 +428,132 @@ def rank():
             'message': str(e)
         }), 500
 
+@app.route('/ai/leaderboard/<role_match>/candidates', methods=['POST'])
+def upsert_leaderboard_candidates(role_match):
+    """
+    Insert or update candidates on a role leaderboard
+    Expected JSON:
+    {
+        "candidates": [
+            {
+                "candidate_id": int,
+                "scores": {...},          (or)
+                "overall_score": float
+            }
+        ]
+    }
+    """
+    try:
+        data = request.get_json()
+        
+        if not data or 'candidates' not in data:
+            return jsonify({
+                'success': False,
+                'message': 'Invalid request data'
+            }), 400
+        
+        # Validate every score before touching the leaderboard so a bad
+        # entry does not leave the batch half applied
+        candidates = data.get('candidates', [])
+        for candidate in candidates:
+            overall_score = candidate.get('overall_score')
+            if overall_score is None:
+                continue
+            try:
+                valid = math.isfinite(float(overall_score))
+            except (TypeError, ValueError):
+                valid = False
+            if not valid:
+                return jsonify({
+                    'success': False,
+                    'message': f"Invalid overall_score for candidate {candidate.get('candidate_id')}: {overall_score!r}"
+                }), 400
+        
+        registry = get_leaderboards()
+        with registry.lock:
+            leaderboard = registry.get(role_match, create=True)
+            for candidate in candidates:
+                leaderboard.upsert(
+                    candidate.get('candidate_id'),
+                    scores=candidate.get('scores'),
+                    overall_score=candidate.get('overall_score')
+                )
+            total = len(leaderboard)
+        
+        return jsonify({
+            'success': True,
+            'role_match': role_match,
+            'updated': len(candidates),
+            'total': total
+        }), 200
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
+
+@app.route('/ai/leaderboard/<role_match>/candidates/<int:candidate_id>', methods=['GET', 'DELETE'])
+def leaderboard_candidate(role_match, candidate_id):
+    """Get a candidate's rank on a role leaderboard, or remove it"""
+    try:
+        registry = get_leaderboards()
+        with registry.lock:
+            leaderboard = registry.get(role_match)
+            if request.method == 'DELETE':
+                found = bool(leaderboard) and leaderboard.remove(candidate_id)
+                row = None
+            else:
+                row = leaderboard.get(candidate_id) if leaderboard else None
+                found = row is not None
+            total = len(leaderboard) if leaderboard else 0
+        
+        if not found:
+            return jsonify({
+                'success': False,
+                'message': 'Candidate not found on leaderboard'
+            }), 404
+        
+        result = {
+            'success': True,
+            'role_match': role_match,
+            'total': total
+        }
+        if row is not None:
+            result['ranking'] = row
+        
+        return jsonify(result), 200
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
+
+@app.route('/ai/leaderboard/snapshot', methods=['POST'])
+def snapshot_leaderboards():
+    """Write all leaderboards to the configured snapshot file"""
+    if not LEADERBOARD_SNAPSHOT_PATH:
+        return jsonify({
+            'success': False,
+            'message': 'LEADERBOARD_SNAPSHOT_PATH is not configured'
+        }), 400
+    
+    try:
+        registry = get_leaderboards()
+        registry.snapshot(LEADERBOARD_SNAPSHOT_PATH)
+        
+        return jsonify({
+            'success': True,
+            'leaderboards': registry.roles()
+        }), 200
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
+
 @app.route('/ai/analyze', methods=['POST'])
 def analyze():
     """
@@ -129,21 +563,23 @@ def analyze():
         "candidate_id": int,
         "responses": [...]
     }
+    Without "responses", the candidate's stored responses are analyzed.
     """
     try:
         data = request.get_json()
+        responses = resolve_responses(data, store=False)
         
-        if not data or 'responses' not in data:
+        if responses is None:
             return jsonify({
                 'success': False,
                 'message': 'Invalid request data'
             }), 400
         
         candidate_id = data.get('candidate_id')
-        responses = data.get('responses', [])
         
         # Analyze behavior
         analysis = analyze_behavior(candidate_id, responses)
+        explanations.update_behavior(candidate_id, analysis)
         
         return jsonify({
             'success': True,
@@ -157,17 +593,138 @@ def analyze():
             'message': str(e)
         }), 500
 
+@app.route('/ai/analyze/batch', methods=['POST'])
+def analyze_batch():
+    """
+    Behavioral analysis for many candidates
+    Expected JSON:
+    {
+        "candidates": [
+            {
+                "candidate_id": int,
+                "responses": [...]
+            }
+        ]
+    }
+    """
+    try:
+        data = request.get_json()
+        
+        if not data or 'candidates' not in data:
+            return jsonify({
+                'success': False,
+                'message': 'Invalid request data'
+            }), 400
+        
+        # Analyze behavior for all candidates
+        analyses = analyze_behavior_batch(data.get('candidates', []))
+        for analysis in analyses:
+            explanations.update_behavior(analysis['candidate_id'], analysis)
+        
+        return jsonify({
+            'success': True,
+            'analyses': analyses
+        }), 200
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
+
+@app.route('/ai/analyze/stream/events', methods=['POST'])
+def ingest_behavior_events():
+    """
+    Feed response events into live behavioral analytics
+    Accepts NDJSON (Content-Type: application/x-ndjson), one event per line,
+    or JSON:
+    {
+        "events": [
+            {
+                "candidate_id": int,
+                "is_correct": bool,
+                "time_taken": int,
+                "difficulty": str,
+                "submitted_at": str
+            }
+        ]
+    }
+    """
+    try:
+        if request.mimetype == 'application/x-ndjson':
+            consumed = behavior_stream.consume_ndjson(request.stream)
+        else:
+            data = request.get_json()
+            
+            if not data or 'events' not in data:
+                return jsonify({
+                    'success': False,
+                    'message': 'Invalid request data'
+                }), 400
+            
+            consumed = behavior_stream.consume_many(data.get('events', []))
+        
+        return jsonify({
+            'success': True,
+            'consumed': consumed
+        }), 200
+        
+    except EventBatchError as e:
+        # JSON batches are all or nothing; NDJSON reports how far it got
+        return jsonify({
+            'success': False,
+            'message': str(e),
+            'consumed': e.consumed
+        }), 400
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
+
+@app.route('/ai/analyze/stream/<int:candidate_id>', methods=['GET'])
+def live_behavior(candidate_id):
+    """Current live behavioral metrics for a candidate"""
+    analysis = behavior_stream.snapshot(candidate_id)
+    
+    if analysis is None:
+        return jsonify({
+            'success': False,
+            'message': 'No events received for candidate'
+        }), 404
+    
+    return jsonify({
+        'success': True,
+        'candidate_id': candidate_id,
+        'analysis': analysis
+    }), 200
+
 @app.route('/ai/explain/<int:candidate_id>', methods=['GET'])
 def explain(candidate_id):
     """
     Get explainable insights for a candidate
+    Served from the explanation cache, which is refreshed whenever the
+    candidate is scored (/ai/evaluate, batch, stream, incremental) or
+    analyzed (/ai/analyze, batch).
     """
     try:
-        # Placeholder - will be implemented with actual data
+        explanation = explanations.get(candidate_id)
+        
+        if explanation is None:
+            return jsonify({
+                'success': False,
+                'message': 'No scores available for candidate'
+            }), 404
+        
         return jsonify({
             'success': True,
             'candidate_id': candidate_id,
-            'explanation': 'Score breakdown and ranking explanation will be provided here'
+            'explanation': explanation
         }), 200
         
     except Exception as e:
@@ -185,7 +742,10 @@ def evaluate_response():
         "type": "mcq" or "coding",
         "response": "answer text or code",
         "correct_answer": "correct answer" (for MCQ),
-        "test_cases": {...} (for coding)
+        "test_cases": {...} (for coding),
+        "problem": "problem_id@version" (for coding, instead of test_cases;
+                   a bare problem_id uses the latest version),
+        "mode": "sequential", "parallel" or "fail_fast" (for coding, optional)
     }
     """
     try:
@@ -206,7 +766,7 @@ def evaluate_response():
             
         elif response_type == 'coding':
             test_cases = data.get('test_cases', {})
-            result = evaluate_code(response_text, test_cases)
+            result = evaluate_submission(response_text, test_cases, data.get('problem'), data.get('mode'))
             
         else:
             return jsonify({
@@ -219,12 +779,289 @@ def evaluate_response():
             'result': result
         }), 200
         
+    except ProblemNotFoundError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 404
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
             'message': str(e)
         }), 500
 
+@app.route('/evaluate/problems/<problem_id>', methods=['PUT'])
+def register_problem(problem_id):
+    """
+    Upload a problem's test suite as its next version
+    Expected JSON:
+    {
+        "test_cases": [{"input": ..., "output": ...}, ...],
+        "function_name": "solve"   (optional)
+    }
+    Uploading the latest version's content again returns that version.
+    """
+    try:
+        data = request.get_json()
+        
+        if not data or 'test_cases' not in data:
+            return jsonify({
+                'success': False,
+                'message': 'Invalid request data'
+            }), 400
+        
+        suite, created = problems.register(problem_id, data['test_cases'], data.get('function_name'))
+        
+        return jsonify({
+            'success': True,
+            'created': created,
+            'problem': suite.describe()
+        }), 201 if created else 200
+        
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
+
+@app.route('/evaluate/problems/<problem_id>', methods=['GET'])
+def get_problem(problem_id):
+    """
+    Describe a registered problem suite and list its versions
+    Query parameters:
+        version: suite version (default latest)
+        include_cases: include the test cases (default false)
+    """
+    try:
+        suite = problems.get(problem_id, request.args.get('version', type=int))
+        
+        if suite is None:
+            return jsonify({
+                'success': False,
+                'message': 'Problem not found'
+            }), 404
+        
+        include_cases = request.args.get('include_cases', 'false').lower() == 'true'
+        return jsonify({
+            'success': True,
+            'problem': suite.describe(include_cases),
+            'versions': problems.versions(problem_id)
+        }), 200
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
+
+@app.route('/evaluate/mcq/keys/<int:assessment_id>', methods=['PUT'])
+def register_mcq_answer_key(assessment_id):
+    """
+    Register the answer key for an MCQ assessment
+    Expected JSON:
+    {
+        "correct_answers": [str, ...]   (in question order)
+    }
+    """
+    try:
+        data = request.get_json()
+        
+        if not data or not isinstance(data.get('correct_answers'), list):
+            return jsonify({
+                'success': False,
+                'message': 'Invalid request data'
+            }), 400
+        
+        index = answer_keys.register(assessment_id, data['correct_answers'])
+        
+        return jsonify({
+            'success': True,
+            'assessment_id': assessment_id,
+            'questions': len(index)
+        }), 200
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
+
+@app.route('/evaluate/mcq/bulk', methods=['POST'])
+def evaluate_mcq_bulk_route():
+    """
+    Grade MCQ answers for many candidates at once
+    Expected JSON:
+    {
+        "assessment_id": int,
+        "answers": [[str, ...], ...],     (one row per candidate)
+        "candidate_ids": [int, ...],      (optional, parallel to answers)
+        "correct_answers": [str, ...],    (optional, registers the key)
+        "include_details": bool           (optional)
+    }
+    """
+    try:
+        data = request.get_json()
+        
+        if not data or 'assessment_id' not in data or not isinstance(data.get('answers'), list):
+            return jsonify({
+                'success': False,
+                'message': 'Invalid request data'
+            }), 400
+        
+        assessment_id = data['assessment_id']
+        if data.get('correct_answers') is not None:
+            index = answer_keys.register(assessment_id, data['correct_answers'])
+        else:
+            index = answer_keys.get(assessment_id)
+        
+        if index is None:
+            return jsonify({
+                'success': False,
+                'message': 'No answer key registered for assessment'
+            }), 404
+        
+        results = evaluate_mcq_bulk(
+            index,
+            data['answers'],
+            candidate_ids=data.get('candidate_ids'),
+            include_details=data.get('include_details', False)
+        )
+        
+        return jsonify({
+            'success': True,
+            'assessment_id': assessment_id,
+            'results': results
+        }), 200
+        
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
+
+@app.route('/evaluate/jobs', methods=['POST'])
+def submit_evaluation_job():
+    """
+    Queue a coding evaluation and return immediately
+    Expected JSON:
+    {
+        "response": "code",
+        "test_cases": {...},
+        "problem": "problem_id@version" (instead of test_cases),
+        "mode": "sequential", "parallel" or "fail_fast" (optional)
+    }
+    """
+    try:
+        data = request.get_json()
+        
+        if not data or 'response' not in data:
+            return jsonify({
+                'success': False,
+                'message': 'Invalid request data'
+            }), 400
+        
+        payload = {
+            'response': data.get('response', ''),
+            'test_cases': data.get('test_cases', {}),
+            'mode': resolve_mode(data.get('mode'))
+        }
+        if data.get('problem'):
+            # Pin the version now so a later upload cannot change a queued job
+            payload['problem'] = problems.resolve(data['problem']).ref
+        
+        job_id = get_job_queue().submit(payload)
+        
+        return jsonify({
+            'success': True,
+            'job_id': job_id,
+            'status': 'queued'
+        }), 202
+        
+    except ProblemNotFoundError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 404
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    except QueueFullError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 503
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
+
+@app.route('/evaluate/jobs/stats', methods=['GET'])
+def evaluation_job_stats():
+    """Queue depth, executor usage and wait/run times"""
+    return jsonify({
+        'success': True,
+        'stats': get_job_queue().stats()
+    }), 200
+
+@app.route('/evaluate/jobs/<job_id>', methods=['GET'])
+def get_evaluation_job(job_id):
+    """
+    Poll a queued evaluation
+    Query parameters:
+        wait: seconds to wait for completion (long-poll)
+    """
+    try:
+        wait = min(request.args.get('wait', 0, type=float), EVAL_JOB_MAX_WAIT)
+        job = get_job_queue().get(job_id, wait=wait)
+        
+        if job is None:
+            return jsonify({
+                'success': False,
+                'message': 'Job not found'
+            }), 404
+        
+        return jsonify({
+            'success': True,
+            'job': job
+        }), 200
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
+
+def _request_records(key):
+    """
+    Iterate request records lazily from NDJSON lines, or from the ``key``
+    list of a JSON body. Returns None if the JSON body has no ``key``.
+    """
+    if request.mimetype == serialization.NDJSON_MIMETYPE:
+        return serialization.iter_ndjson(request.stream)
+    
+    data = request.get_json()
+    if not data or key not in data:
+        return None
+    return iter(data.get(key, []))
+
 if __name__ == '__main__':
     print(f"Starting AI Service on {FLASK_HOST}:{FLASK_PORT}")
     app.run(host=FLASK_HOST, port=FLASK_PORT, debug=FLASK_DEBUG)
@@ -0,0 +1,359 @@
+"""
+Python AI Service - ASGI Application
+Async serving mode with the same routes and JSON contracts as app.py
+
+Coding evaluations and CPU-bound scoring, ranking and analysis are awaited
+on a thread pool so the event loop never blocks; payloads of at least
+ASGI_OFFLOAD_THRESHOLD responses go to a process pool instead. Routes without
+an async handler are served by the Flask app, as are requests that may be
+profiled (an X-Profile header, or a route covered by PROFILE_SAMPLE_RATE) so
+they go through the profiling hooks. CORS headers are computed by Flask-CORS
+from the same options it applies to app.py.
+
+Run from backend/python with:
+    uvicorn models.asgi:app --host 0.0.0.0 --port 5000
+"""
+
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(__file__))
+
+from asgiref.wsgi import WsgiToAsgi
+from flask_cors.core import get_cors_headers, get_cors_options
+from werkzeug.datastructures import Headers, MIMEAccept
+from werkzeug.http import parse_accept_header, parse_options_header
+
+from config import (
+    ASGI_PROCESS_WORKERS,
+    ASGI_THREAD_WORKERS,
+    ASGI_OFFLOAD_THRESHOLD,
+    PROFILE_ROUTES,
+    PROFILE_SAMPLE_RATE
+)
+from app import app as flask_app
+from metrics import observe_request
+from profiling import PROFILE_HEADER
+from serialization import decode_body, encode_body, gzip_body, negotiate_mimetype
+from storage import resolve_rank_candidates, resolve_responses, store_response_histories, store_scores
+from ai_engine.scoring import calculate_score
+from ai_engine.batch_scoring import calculate_scores_batch
+from ai_engine.ranking import rank_candidates
+from ai_engine.behavioral import analyze_behavior, analyze_behavior_batch
+from ai_engine.explanations import explanations
+from evaluation.problems import ProblemNotFoundError, evaluate_submission
+from evaluation.mcq_evaluator import evaluate_mcq
+
+class AsyncAIService:
+    """ASGI application with async handlers for the hot routes"""
+
+    def __init__(self, fallback):
+        self.fallback = WsgiToAsgi(fallback)
+        self.cors_options = get_cors_options(fallback)
+        self.routes = {
+            ('POST', '/ai/evaluate'): self.evaluate,
+            ('POST', '/ai/evaluate/batch'): self.evaluate_batch,
+            ('POST', '/ai/rank'): self.rank,
+            ('POST', '/ai/analyze'): self.analyze,
+            ('POST', '/ai/analyze/batch'): self.analyze_batch,
+            ('POST', '/evaluate/response'): self.evaluate_response,
+            ('GET', '/health'): self.health
+        }
+        self.process_pool = None
+        self.thread_pool = None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+
+        handler = None
+        if scope['type'] == 'http':
+            handler = self.routes.get((scope['method'], scope['path']))
+
+        headers = _decode_headers(scope) if handler is not None else None
+        if handler is None or _may_profile(scope['path'], headers):
+            await self.fallback(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        self._ensure_pools()
+        try:
+            if scope['method'] == 'POST':
+                try:
+                    data = await self._read_body(receive, headers.get('content-type', ''))
+                except ValueError:
+                    result, status = {'success': False, 'message': 'Invalid JSON body'}, 400
+                else:
+                    result, status = await handler(data)
+            else:
+                result, status = await handler()
+        except Exception as e:
+            result, status = {'success': False, 'message': str(e)}, 500
+
+        response_bytes = await self._send(send, headers, scope['method'], result, status)
+
+        content_length = headers.get('content-length')
+        observe_request(
+            scope['path'], scope['method'], status, time.perf_counter() - start,
+            int(content_length) if content_length and content_length.isdigit() else None,
+            response_bytes
+        )
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                self._ensure_pools()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def shutdown(self):
+        if self.process_pool is not None:
+            self.process_pool.shutdown(wait=False, cancel_futures=True)
+            self.process_pool = None
+        if self.thread_pool is not None:
+            self.thread_pool.shutdown(wait=False, cancel_futures=True)
+            self.thread_pool = None
+
+    # Route handlers
+
+    async def health(self):
+        return {
+            'status': 'healthy',
+            'service': 'AI Evaluation Engine'
+        }, 200
+
+    async def evaluate(self, data):
+        responses = await self._run_blocking(resolve_responses, data)
+        if responses is None:
+            return _invalid_request()
+
+        candidate_id = data.get('candidate_id')
+        scores = await self._run_cpu(len(responses), calculate_score, responses)
+        explanations.update_scores(candidate_id, scores)
+        await self._run_blocking(
+            store_scores, [{'candidate_id': candidate_id, 'scores': scores}], data.get('role_match')
+        )
+
+        return {
+            'success': True,
+            'candidate_id': candidate_id,
+            'scores': scores
+        }, 200
+
+    async def evaluate_batch(self, data):
+        if not data or 'candidates' not in data:
+            return _invalid_request()
+
+        candidates = data.get('candidates', [])
+        size = sum(len(c.get('responses') or []) for c in candidates)
+        results = await self._run_cpu(size, calculate_scores_batch, candidates)
+        for result in results:
+            explanations.update_scores(result['candidate_id'], result['scores'])
+
+        await self._run_blocking(store_response_histories, candidates)
+        await self._run_blocking(store_scores, results, data.get('role_match'))
+
+        return {
+            'success': True,
+            'results': results
+        }, 200
+
+    async def rank(self, data):
+        candidates = await self._run_blocking(resolve_rank_candidates, data)
+        if candidates is None:
+            return _invalid_request()
+
+        top_k = data.get('top_k')
+        offset = data.get('offset', 0)
+
+        if (top_k is not None and (not isinstance(top_k, int) or top_k < 0)) or \
+                not isinstance(offset, int) or offset < 0:
+            return {
+                'success': False,
+                'message': 'top_k and offset must be non-negative integers'
+            }, 400
+
+        rankings = await self._run_cpu(
+            len(candidates), rank_candidates,
+            candidates, data.get('role_match', 'General'), top_k, offset
+        )
+
+        return {
+            'success': True,
+            'total': len(candidates),
+            'offset': offset,
+            'rankings': rankings
+        }, 200
+
+    async def analyze(self, data):
+        responses = await self._run_blocking(resolve_responses, data, False)
+        if responses is None:
+            return _invalid_request()
+
+        candidate_id = data.get('candidate_id')
+        analysis = await self._run_cpu(len(responses), analyze_behavior, candidate_id, responses)
+        explanations.update_behavior(candidate_id, analysis)
+
+        return {
+            'success': True,
+            'candidate_id': candidate_id,
+            'analysis': analysis
+        }, 200
+
+    async def analyze_batch(self, data):
+        if not data or 'candidates' not in data:
+            return _invalid_request()
+
+        candidates = data.get('candidates', [])
+        size = sum(len(c.get('responses') or []) for c in candidates)
+        analyses = await self._run_cpu(size, analyze_behavior_batch, candidates)
+        for analysis in analyses:
+            explanations.update_behavior(analysis['candidate_id'], analysis)
+
+        return {
+            'success': True,
+            'analyses': analyses
+        }, 200
+
+    async def evaluate_response(self, data):
+        if not data:
+            return {
+                'success': False,
+                'message': 'No data provided'
+            }, 400
+
+        response_type = data.get('type')
+        response_text = data.get('response', '')
+
+        if response_type == 'mcq':
+            result = evaluate_mcq(response_text, data.get('correct_answer', ''))
+
+        elif response_type == 'coding':
+            # The sandbox blocks on pipes, not the CPU, so a thread is enough
+            loop = asyncio.get_running_loop()
+            try:
+                result = await loop.run_in_executor(
+                    self.thread_pool, evaluate_submission,
+                    response_text, data.get('test_cases', {}), data.get('problem'), data.get('mode')
+                )
+            except ProblemNotFoundError as e:
+                return {
+                    'success': False,
+                    'message': str(e)
+                }, 404
+            except ValueError as e:
+                return {
+                    'success': False,
+                    'message': str(e)
+                }, 400
+
+        else:
+            return {
+                'success': False,
+                'message': 'Invalid type. Must be "mcq" or "coding"'
+            }, 400
+
+        return {
+            'success': True,
+            'result': result
+        }, 200
+
+    # Helpers
+
+    def _ensure_pools(self):
+        if self.thread_pool is None:
+            self.thread_pool = ThreadPoolExecutor(
+                max_workers=ASGI_THREAD_WORKERS,
+                thread_name_prefix='asgi-evaluation'
+            )
+        if self.process_pool is None and ASGI_PROCESS_WORKERS > 0:
+            self.process_pool = ProcessPoolExecutor(
+                max_workers=ASGI_PROCESS_WORKERS,
+                initializer=_init_worker,
+                initargs=(list(sys.path),)
+            )
+
+    async def _run_cpu(self, size, func, *args):
+        """Run small payloads on the thread pool and large ones in the process pool"""
+        if self.process_pool is None or size < ASGI_OFFLOAD_THRESHOLD:
+            return await self._run_blocking(func, *args)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.process_pool, func, *args)
+
+    async def _run_blocking(self, func, *args):
+        """Run database and other blocking I/O on the thread pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.thread_pool, func, *args)
+
+    async def _read_body(self, receive, content_type):
+        chunks = []
+        more_body = True
+        while more_body:
+            message = await receive()
+            chunks.append(message.get('body', b''))
+            more_body = message.get('more_body', False)
+
+        body = b''.join(chunks)
+        if not body:
+            return None
+        return decode_body(body, parse_options_header(content_type)[0])
+
+    async def _send(self, send, request_headers, method, payload, status):
+        mimetype = negotiate_mimetype(
+            parse_accept_header(request_headers.get('accept'), MIMEAccept)
+        )
+        body, compressed = gzip_body(encode_body(payload, mimetype), request_headers.get('accept-encoding'))
+
+        headers = [
+            (b'content-type', mimetype.encode('ascii')),
+            (b'content-length', str(len(body)).encode('ascii')),
+            (b'vary', b'Accept, Accept-Encoding')
+        ]
+        cors_headers = get_cors_headers(self.cors_options, Headers(request_headers), method)
+        headers.extend(
+            (name.lower().encode('latin-1'), value.encode('latin-1'))
+            for name, value in cors_headers.items(multi=True)
+        )
+        if compressed:
+            headers.append((b'content-encoding', b'gzip'))
+
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': headers
+        })
+        await send({'type': 'http.response.body', 'body': body})
+        return len(body)
+
+def _decode_headers(scope):
+    return {
+        name.decode('latin-1').lower(): value.decode('latin-1')
+        for name, value in scope.get('headers', [])
+    }
+
+def _may_profile(path, headers):
+    """True when profiling.init_app could pick this request; the token and the draw are checked there"""
+    if PROFILE_HEADER.lower() in headers:
+        return True
+    return PROFILE_SAMPLE_RATE > 0 and (not PROFILE_ROUTES or path in PROFILE_ROUTES)
+
+def _invalid_request():
+    return {
+        'success': False,
+        'message': 'Invalid request data'
+    }, 400
+
+def _init_worker(path):
+    """Give process pool workers the same import path as the server"""
+    sys.path[:] = path
+
+app = AsyncAIService(flask_app)
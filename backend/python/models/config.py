@@ -28,3 +28,121 @@ SCORING_WEIGHTS = {
     'time_efficiency': 0.10,
     'learning_indicators': 0.10
 }
+
+# Code sandbox configuration
+# Number of pre-started worker processes (0 disables the pool)
+SANDBOX_POOL_SIZE = int(os.getenv('SANDBOX_POOL_SIZE', os.cpu_count() or 2))
+SANDBOX_MAX_JOBS_PER_WORKER = int(os.getenv('SANDBOX_MAX_JOBS_PER_WORKER', 100))
+SANDBOX_MEMORY_LIMIT_MB = int(os.getenv('SANDBOX_MEMORY_LIMIT_MB', 512))
+# Per-execution limits (0 disables): processes (only enforced together with
+# SANDBOX_UID_BASE), open files, and bytes of output a submission may write
+SANDBOX_MAX_PROCESSES = int(os.getenv('SANDBOX_MAX_PROCESSES', 1))
+# Opt-in: when the service runs as root, each execution switches to the
+# otherwise unused uid/gid SANDBOX_UID_BASE + its pid before the limits are
+# applied, so the process limit counts only that execution. Ignored, with a
+# warning, if that user cannot import the standard library (-1 disables)
+SANDBOX_UID_BASE = int(os.getenv('SANDBOX_UID_BASE', -1))
+SANDBOX_MAX_OPEN_FILES = int(os.getenv('SANDBOX_MAX_OPEN_FILES', 64))
+SANDBOX_MAX_OUTPUT_BYTES = int(os.getenv('SANDBOX_MAX_OUTPUT_BYTES', 4 * 1024 * 1024))
+# How a submission's test cases run unless the request chooses: 'sequential',
+# 'parallel' (spread over sandbox workers) or 'fail_fast' (stop at the first
+# failing case); and how many workers one parallel submission may use (0 means
+# one per CPU, capped at the pool size)
+EVALUATION_MODE = os.getenv('EVALUATION_MODE', 'sequential')
+EVALUATION_PARALLELISM = int(os.getenv('EVALUATION_PARALLELISM', 0))
+
+# Code evaluation result cache (size 0 disables, empty dir disables disk spill)
+CODE_RESULT_CACHE_SIZE = int(os.getenv('CODE_RESULT_CACHE_SIZE', 1024))
+CODE_RESULT_CACHE_DIR = os.getenv('CODE_RESULT_CACHE_DIR', '')
+
+# Asynchronous coding evaluation queue
+EVAL_QUEUE_MAX_SIZE = int(os.getenv('EVAL_QUEUE_MAX_SIZE', 1000))
+EVAL_QUEUE_EXECUTORS = int(os.getenv('EVAL_QUEUE_EXECUTORS', 4))
+EVAL_JOB_RETENTION = int(os.getenv('EVAL_JOB_RETENTION', 10000))
+# Upper bound for long-poll waits on job status, in seconds
+EVAL_JOB_MAX_WAIT = int(os.getenv('EVAL_JOB_MAX_WAIT', 30))
+
+# Incremental scoring state kept in memory (least recently used evicted first)
+INCREMENTAL_STATE_MAX_CANDIDATES = int(os.getenv('INCREMENTAL_STATE_MAX_CANDIDATES', 10000))
+
+# Leaderboard snapshot file (empty disables restore/snapshot on shutdown)
+LEADERBOARD_SNAPSHOT_PATH = os.getenv('LEADERBOARD_SNAPSHOT_PATH', '')
+
+# Streaming behavioral analytics
+BEHAVIOR_WINDOW_SIZE = int(os.getenv('BEHAVIOR_WINDOW_SIZE', 20))
+BEHAVIOR_STREAM_MAX_CANDIDATES = int(os.getenv('BEHAVIOR_STREAM_MAX_CANDIDATES', 50000))
+
+# Number of MCQ answer keys kept normalized in memory
+MCQ_ANSWER_KEY_CACHE_SIZE = int(os.getenv('MCQ_ANSWER_KEY_CACHE_SIZE', 256))
+
+# Async (ASGI) serving mode
+ASGI_PROCESS_WORKERS = int(os.getenv('ASGI_PROCESS_WORKERS', os.cpu_count() or 2))
+ASGI_THREAD_WORKERS = int(os.getenv('ASGI_THREAD_WORKERS', 64))
+# Payloads with at least this many responses/candidates go to the process pool
+ASGI_OFFLOAD_THRESHOLD = int(os.getenv('ASGI_OFFLOAD_THRESHOLD', 2000))
+
+# Pre-fork serving mode (0 workers means one per CPU core). Jobs, explanations,
+# leaderboards, incremental and streaming state and the in-memory problem
+# registry are per worker, so more than one worker also needs
+# SERVER_ALLOW_WORKER_STATE=True to confirm those endpoints are not relied on
+SERVER_WORKERS = int(os.getenv('SERVER_WORKERS', 1))
+SERVER_ALLOW_WORKER_STATE = os.getenv('SERVER_ALLOW_WORKER_STATE', 'False').lower() == 'true'
+# Recycle a worker after this many requests (0 disables)
+SERVER_MAX_REQUESTS = int(os.getenv('SERVER_MAX_REQUESTS', 0))
+# Seconds workers get to finish in-flight requests on shutdown or reload
+SERVER_GRACEFUL_TIMEOUT = int(os.getenv('SERVER_GRACEFUL_TIMEOUT', 30))
+
+# Wire format: 'orjson' (used when installed, debug mode included) or 'json'
+# (stdlib, indented in debug mode)
+JSON_LIBRARY = os.getenv('JSON_LIBRARY', 'orjson')
+# Gzip responses at least this large for clients that accept it (0 disables)
+RESPONSE_GZIP_MIN_BYTES = int(os.getenv('RESPONSE_GZIP_MIN_BYTES', 1024))
+RESPONSE_GZIP_LEVEL = int(os.getenv('RESPONSE_GZIP_LEVEL', 5))
+
+# Candidates scored per chunk by the NDJSON streaming endpoints
+STREAM_BATCH_SIZE = int(os.getenv('STREAM_BATCH_SIZE', 500))
+
+# Cached candidate explanations for /ai/explain
+EXPLANATION_CACHE_SIZE = int(os.getenv('EXPLANATION_CACHE_SIZE', 50000))
+EXPLANATION_TTL_SECONDS = int(os.getenv('EXPLANATION_TTL_SECONDS', 3600))
+
+# Persistence for responses, scores and roles: none (default), sqlite, mysql or
+# postgresql (mysql and postgresql connect with DB_CONFIG)
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'none')
+STORAGE_SQLITE_PATH = os.getenv('STORAGE_SQLITE_PATH', 'ai_service.db')
+STORAGE_POOL_SIZE = int(os.getenv('STORAGE_POOL_SIZE', 8))
+
+# Request, engine and sandbox metrics served on /metrics
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True').lower() == 'true'
+
+# Request profiling: requests carrying X-Profile plus X-Admin-Token are always
+# profiled, others are sampled at PROFILE_SAMPLE_RATE (0 disables sampling)
+PROFILE_ADMIN_TOKEN = os.getenv('PROFILE_ADMIN_TOKEN', '')
+PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', 0))
+# Comma-separated routes eligible for sampling (empty means all)
+PROFILE_ROUTES = [route for route in os.getenv('PROFILE_ROUTES', '').split(',') if route]
+# 'stack' (folded stack samples for flame graphs) or 'cprofile'
+PROFILE_MODE = os.getenv('PROFILE_MODE', 'stack')
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv('PROFILE_SAMPLE_INTERVAL_MS', 5))
+PROFILE_HISTORY_SIZE = int(os.getenv('PROFILE_HISTORY_SIZE', 50))
+
+# In-process pre-flight of code submissions: top-level modules that may not be
+# imported, and how many compiled submissions to keep
+PREFLIGHT_BLOCKED_IMPORTS = frozenset(
+    name.strip() for name in os.getenv(
+        'PREFLIGHT_BLOCKED_IMPORTS', 'ctypes,multiprocessing,pty,signal,socket,subprocess'
+    ).split(',') if name.strip()
+)
+PREFLIGHT_CACHE_SIZE = int(os.getenv('PREFLIGHT_CACHE_SIZE', 1024))
+
+# Coding problem registry: suites kept in memory per service process, and
+# suites each sandbox worker keeps so their cases are sent to it only once
+PROBLEM_CACHE_SIZE = int(os.getenv('PROBLEM_CACHE_SIZE', 256))
+SANDBOX_SUITE_CACHE_SIZE = int(os.getenv('SANDBOX_SUITE_CACHE_SIZE', 64))
+
+# Registered suite values at least this large (marshalled bytes) are stored in
+# memory-mapped fixture files and passed to the sandbox by reference
+FIXTURE_MIN_BYTES = int(os.getenv('FIXTURE_MIN_BYTES', 65536))
+FIXTURE_DIR = os.getenv('FIXTURE_DIR', '')
+# Items per chunk when comparing large list outputs
+FIXTURE_CHUNK_ITEMS = int(os.getenv('FIXTURE_CHUNK_ITEMS', 4096))
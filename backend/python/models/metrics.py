@@ -0,0 +1,344 @@
+"""
+Python AI Service - Metrics
+In-process counters and latency histograms in the Prometheus text format
+
+Recording is a lock plus a bisect per observation. Latency quantiles
+(p50/p95/p99) are estimated from histogram buckets at scrape time, and
+point-in-time values such as cache hit ratios and queue depths are read
+from collector callbacks only when /metrics is scraped.
+"""
+
+import functools
+import threading
+import time
+from bisect import bisect_left
+
+from config import METRICS_ENABLED
+
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+SIZE_BUCKETS = (
+    128, 512, 1024, 4096, 16384, 65536, 262144,
+    1048576, 4194304, 16777216, 67108864
+)
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    type = 'counter'
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = list(self._values.items())
+        return [(self.name, dict(zip(self.labels, key)), value) for key, value in values]
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels"""
+
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts (last is +Inf), sum, count]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][idx] += 1
+            series[1] += value
+            series[2] += 1
+
+    def time(self, *label_values):
+        """Context manager observing the elapsed seconds of its block"""
+        return _Timer(self, label_values)
+
+    def snapshot(self):
+        with self._lock:
+            return {key: (list(counts), total, count) for key, (counts, total, count) in self._series.items()}
+
+    def samples(self):
+        samples = []
+        for key, (counts, total, count) in self.snapshot().items():
+            labels = dict(zip(self.labels, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                samples.append((f'{self.name}_bucket', dict(labels, le=_format_value(bound)), cumulative))
+            samples.append((f'{self.name}_sum', labels, total))
+            samples.append((f'{self.name}_count', labels, count))
+        return samples
+
+    def quantile_samples(self):
+        """Bucket-interpolated quantile estimates, one series per label set"""
+        samples = []
+        for key, (counts, _, count) in self.snapshot().items():
+            if not count:
+                continue
+            labels = dict(zip(self.labels, key))
+            for q in QUANTILES:
+                samples.append((
+                    f'{self.name}_quantile',
+                    dict(labels, quantile=_format_value(q)),
+                    estimate_quantile(self.buckets, counts, count, q)
+                ))
+        return samples
+
+class _Timer:
+    def __init__(self, histogram, label_values):
+        self.histogram = histogram
+        self.label_values = label_values
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start, *self.label_values)
+
+def estimate_quantile(buckets, counts, count, q):
+    """Linear interpolation within the bucket holding the q-th observation"""
+    target = q * count
+    cumulative = 0
+    lower = 0.0
+    for bound, bucket_count in zip(buckets, counts):
+        if bucket_count and cumulative + bucket_count >= target:
+            return lower + (bound - lower) * (target - cumulative) / bucket_count
+        cumulative += bucket_count
+        lower = bound
+    # Falls in the +Inf bucket; the largest finite bound is the best estimate
+    return buckets[-1]
+
+class Registry:
+    """Metrics plus collector callbacks, rendered on scrape"""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def counter(self, name, documentation, labels=()):
+        return self._register(Counter(name, documentation, labels))
+
+    def histogram(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(name, documentation, labels, buckets))
+
+    def add_collector(self, collector):
+        """
+        Register a callback run on every scrape
+
+        The callback returns a list of (name, type, documentation, samples)
+        where samples is a list of (labels dict, value).
+        """
+        with self._lock:
+            self._collectors.append(collector)
+        return collector
+
+    def render(self):
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics)
+            collectors = list(self._collectors)
+
+        for metric in metrics:
+            _append_family(lines, metric.name, metric.type, metric.documentation, metric.samples())
+            if isinstance(metric, Histogram):
+                quantiles = metric.quantile_samples()
+                if quantiles:
+                    _append_family(
+                        lines, f'{metric.name}_quantile', 'gauge',
+                        f'{metric.documentation} (estimated quantiles)', quantiles
+                    )
+
+        for collector in collectors:
+            try:
+                families = collector()
+            except Exception:
+                continue
+            for name, metric_type, documentation, samples in families:
+                _append_family(
+                    lines, name, metric_type, documentation,
+                    [(name, labels, value) for labels, value in samples]
+                )
+
+        return '\n'.join(lines) + '\n'
+
+    def _register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+def _append_family(lines, name, metric_type, documentation, samples):
+    if not samples:
+        return
+    lines.append(f'# HELP {name} {documentation}')
+    lines.append(f'# TYPE {name} {metric_type}')
+    for sample_name, labels, value in samples:
+        if labels:
+            label_text = ','.join(f'{key}="{_escape(value_)}"' for key, value_ in labels.items())
+            lines.append(f'{sample_name}{{{label_text}}} {_format_value(value)}')
+        else:
+            lines.append(f'{sample_name} {_format_value(value)}')
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value)) if abs(value) < 1e15 else repr(value)
+    return repr(value) if isinstance(value, float) else str(value)
+
+registry = Registry()
+
+REQUEST_COUNT = registry.counter(
+    'ai_http_requests_total', 'HTTP requests by route, method and status',
+    ('route', 'method', 'status')
+)
+REQUEST_LATENCY = registry.histogram(
+    'ai_http_request_duration_seconds', 'HTTP request latency by route',
+    ('route', 'method')
+)
+REQUEST_SIZE = registry.histogram(
+    'ai_http_request_size_bytes', 'HTTP request body size by route',
+    ('route',), SIZE_BUCKETS
+)
+RESPONSE_SIZE = registry.histogram(
+    'ai_http_response_size_bytes', 'HTTP response body size by route',
+    ('route',), SIZE_BUCKETS
+)
+SERIALIZATION_LATENCY = registry.histogram(
+    'ai_serialization_duration_seconds', 'Request decoding and response encoding time',
+    ('operation', 'format')
+)
+ENGINE_LATENCY = registry.histogram(
+    'ai_engine_duration_seconds', 'Scoring, ranking, analysis and evaluation time by function',
+    ('function',)
+)
+PREFLIGHT_REJECTIONS = registry.counter(
+    'ai_preflight_rejections_total', 'Code submissions rejected before reaching the sandbox',
+    ('reason',)
+)
+STORAGE_WRITE_FAILURES = registry.counter(
+    'ai_storage_write_failures_total', 'Response and score writes that failed and were skipped',
+    ('operation',)
+)
+BEHAVIOR_STREAM_FAILURES = registry.counter(
+    'ai_behavior_stream_failures_total', 'Queued behavior events that failed to apply and were dropped',
+    ('error',)
+)
+SANDBOX_SPAWN_LATENCY = registry.histogram(
+    'ai_sandbox_spawn_duration_seconds', 'Time to start a sandbox worker process'
+)
+SANDBOX_ACQUIRE_LATENCY = registry.histogram(
+    'ai_sandbox_acquire_duration_seconds', 'Time spent waiting for an idle sandbox worker'
+)
+SANDBOX_EXEC_LATENCY = registry.histogram(
+    'ai_sandbox_exec_duration_seconds', 'Sandbox request execution time by operation',
+    ('operation',)
+)
+
+def timed(function_name):
+    """Decorator recording a function's duration in ``ai_engine_duration_seconds``"""
+    def decorator(func):
+        if not METRICS_ENABLED:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                ENGINE_LATENCY.observe(time.perf_counter() - start, function_name)
+        return wrapper
+    return decorator
+
+def observe(histogram, seconds, *label_values):
+    """Record a duration unless metrics are disabled"""
+    if METRICS_ENABLED:
+        histogram.observe(seconds, *label_values)
+
+def observe_request(route, method, status, seconds, request_bytes=None, response_bytes=None):
+    """Record one HTTP request"""
+    if not METRICS_ENABLED:
+        return
+    REQUEST_COUNT.inc(route, method, str(status))
+    REQUEST_LATENCY.observe(seconds, route, method)
+    if request_bytes is not None:
+        REQUEST_SIZE.observe(request_bytes, route)
+    if response_bytes is not None:
+        RESPONSE_SIZE.observe(response_bytes, route)
+
+def register_stats(prefix, documentation, stats):
+    """
+    Expose a ``stats()``-style callback as gauges on every scrape
+
+    Each numeric value in the returned dictionary becomes ``<prefix>_<key>``.
+    The callback may return None when the component has not started.
+    """
+    def collect():
+        values = stats()
+        if not values:
+            return []
+        return [
+            (f'{prefix}_{key}', 'gauge', f'{documentation}: {key.replace("_", " ")}', [({}, value)])
+            for key, value in values.items()
+            if isinstance(value, (int, float)) and not isinstance(value, bool)
+        ]
+    return registry.add_collector(collect)
+
+def init_app(app):
+    """Record per-route request metrics for a Flask app and serve /metrics"""
+    from flask import Response, g, request
+
+    if not METRICS_ENABLED:
+        return
+
+    @app.before_request
+    def start_request_timer():
+        g.metrics_start = time.perf_counter()
+
+    @app.after_request
+    def record_request_metrics(response):
+        start = g.pop('metrics_start', None)
+        if start is not None:
+            route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+            observe_request(
+                route, request.method, response.status_code,
+                time.perf_counter() - start,
+                request.content_length,
+                None if response.is_streamed else response.calculate_content_length()
+            )
+        return response
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics_endpoint():
+        """Prometheus text exposition of service metrics"""
+        return Response(registry.render(), content_type=CONTENT_TYPE)
@@ -0,0 +1,323 @@
+"""
+Python AI Service - Request Profiling
+Opt-in CPU profiles of selected requests, kept in memory for the admin endpoints
+
+A request is profiled when it carries ``X-Profile`` together with the admin
+token, or when it is picked by PROFILE_SAMPLE_RATE (optionally limited to
+PROFILE_ROUTES). Unprofiled requests pay one header lookup and, when a
+sample rate is set, one random draw.
+
+Two capture modes are supported:
+    stack     wall-clock stack samples taken every PROFILE_SAMPLE_INTERVAL_MS
+              by a shared background thread, stored as folded stacks
+              (``frame;frame;frame count``) ready for flamegraph.pl/speedscope
+    cprofile  deterministic cProfile of the request thread, downloadable as
+              a pstats dump for snakeviz/pstats
+
+Profiles cover the route function up to the response being built; for
+streamed responses the generator runs after the profile has been stored.
+"""
+
+import cProfile
+import hmac
+import io
+import itertools
+import marshal
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+from config import (
+    PROFILE_ADMIN_TOKEN,
+    PROFILE_HISTORY_SIZE,
+    PROFILE_MODE,
+    PROFILE_ROUTES,
+    PROFILE_SAMPLE_INTERVAL_MS,
+    PROFILE_SAMPLE_RATE
+)
+
+PROFILE_HEADER = 'X-Profile'
+PROFILE_ID_HEADER = 'X-Profile-Id'
+ADMIN_TOKEN_HEADER = 'X-Admin-Token'
+MODES = ('stack', 'cprofile')
+
+class StackSampler:
+    """
+    One daemon thread sampling the stacks of every registered thread
+
+    The thread only runs while at least one profiled request is active.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._stacks = {}  # thread id -> Counter of folded stacks
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self, thread_id):
+        with self._lock:
+            self._stacks[thread_id] = Counter()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+                self._thread.start()
+
+    def stop(self, thread_id):
+        with self._lock:
+            return self._stacks.pop(thread_id, Counter())
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self._lock:
+                if not self._stacks:
+                    self._thread = None
+                    return
+                for thread_id, stacks in self._stacks.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        stacks[_fold(frame)] += 1
+
+def _fold(frame):
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'.replace(';', ','))
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+class ProfileStore:
+    """The last ``max_entries`` profiles, newest first"""
+
+    def __init__(self, max_entries):
+        self._entries = deque(maxlen=max_entries)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def add(self, entry):
+        with self._lock:
+            entry['id'] = f'{os.getpid()}-{next(self._ids)}'
+            self._entries.appendleft(entry)
+        return entry['id']
+
+    def get(self, profile_id):
+        with self._lock:
+            return next((entry for entry in self._entries if entry['id'] == profile_id), None)
+
+    def list(self):
+        with self._lock:
+            return [_summary(entry) for entry in self._entries]
+
+    def clear(self):
+        with self._lock:
+            count = len(self._entries)
+            self._entries.clear()
+        return count
+
+def _summary(entry):
+    return {key: value for key, value in entry.items() if key not in ('stacks', 'stats')}
+
+class _Session:
+    """Profile of one request in progress"""
+
+    def __init__(self, mode, trigger):
+        self.mode = mode
+        self.trigger = trigger
+        self.profiler = None
+        self.thread_id = threading.get_ident()
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+
+        if mode == 'cprofile':
+            self.profiler = cProfile.Profile()
+            try:
+                self.profiler.enable()
+            except ValueError:
+                # Another profiler owns the interpreter hook; sample instead
+                self.profiler = None
+                self.mode = 'stack'
+        if self.mode == 'stack':
+            sampler.start(self.thread_id)
+
+    def finish(self):
+        duration = time.perf_counter() - self.start
+        entry = {
+            'mode': self.mode,
+            'trigger': self.trigger,
+            'pid': os.getpid(),
+            'started_at': self.started_at,
+            'duration_ms': round(duration * 1000, 3)
+        }
+        if self.profiler is not None:
+            self.profiler.disable()
+            self.profiler.create_stats()
+            entry['stats'] = self.profiler.stats
+            entry['functions'] = len(self.profiler.stats)
+        else:
+            stacks = sampler.stop(self.thread_id)
+            entry['stacks'] = stacks
+            entry['samples'] = sum(stacks.values())
+        return entry
+
+sampler = StackSampler(PROFILE_SAMPLE_INTERVAL_MS / 1000)
+profiles = ProfileStore(PROFILE_HISTORY_SIZE)
+
+def has_admin_token(token):
+    """True when admin profiling is configured and ``token`` matches it"""
+    return bool(PROFILE_ADMIN_TOKEN) and bool(token) and hmac.compare_digest(token, PROFILE_ADMIN_TOKEN)
+
+def choose_mode(header_value, route):
+    """
+    Decide whether to profile a request
+
+    Args:
+        header_value: The X-Profile header, already authorized, or None
+        route: Matched URL rule
+
+    Returns:
+        (mode, trigger) or None to leave the request alone
+    """
+    if header_value:
+        mode = header_value.strip().lower()
+        return (mode if mode in MODES else PROFILE_MODE), 'header'
+    if PROFILE_SAMPLE_RATE > 0 and (not PROFILE_ROUTES or route in PROFILE_ROUTES):
+        if random.random() < PROFILE_SAMPLE_RATE:
+            return PROFILE_MODE, 'sampled'
+    return None
+
+def render_stats(stats, sort='cumulative', limit=50):
+    """pstats text report of a cProfile stats dictionary"""
+    out = io.StringIO()
+    pstats.Stats(_StatsSource(stats), stream=out).sort_stats(sort).print_stats(limit)
+    return out.getvalue()
+
+class _StatsSource:
+    # pstats.Stats loads from any object with create_stats() and takes
+    # ownership of its stats, so hand it a copy
+    def __init__(self, stats):
+        self.stats = dict(stats)
+
+    def create_stats(self):
+        pass
+
+def render_folded(stacks):
+    """Folded stacks, one ``frame;frame count`` line per distinct stack"""
+    return ''.join(f'{stack} {count}\n' for stack, count in stacks.most_common())
+
+def init_app(app):
+    """Profile selected requests of a Flask app and serve /admin/profiles"""
+    from flask import Response, g, jsonify, request
+
+    @app.before_request
+    def start_profile():
+        header = request.headers.get(PROFILE_HEADER)
+        if header and not has_admin_token(request.headers.get(ADMIN_TOKEN_HEADER)):
+            header = None
+        if not header and PROFILE_SAMPLE_RATE <= 0:
+            return
+        route = request.url_rule.rule if request.url_rule is not None else None
+        if route is None or route.startswith('/admin/'):
+            return
+        choice = choose_mode(header, route)
+        if choice is not None:
+            g.profile_session = _Session(*choice)
+
+    @app.after_request
+    def store_profile(response):
+        session = g.pop('profile_session', None)
+        if session is not None:
+            entry = session.finish()
+            entry.update(
+                route=request.url_rule.rule,
+                method=request.method,
+                path=request.full_path.rstrip('?'),
+                status=response.status_code
+            )
+            response.headers[PROFILE_ID_HEADER] = profiles.add(entry)
+        return response
+
+    def authorized():
+        return has_admin_token(request.headers.get(ADMIN_TOKEN_HEADER))
+
+    def forbidden():
+        return jsonify({
+            'success': False,
+            'message': 'Invalid admin token'
+        }), 403
+
+    @app.route('/admin/profiles', methods=['GET', 'DELETE'])
+    def list_profiles():
+        """
+        List stored request profiles (newest first), or clear them
+        Requires the X-Admin-Token header
+        """
+        if not authorized():
+            return forbidden()
+
+        if request.method == 'DELETE':
+            return jsonify({
+                'success': True,
+                'cleared': profiles.clear()
+            }), 200
+
+        return jsonify({
+            'success': True,
+            'profiles': profiles.list()
+        }), 200
+
+    @app.route('/admin/profiles/<profile_id>', methods=['GET'])
+    def get_profile(profile_id):
+        """
+        Fetch one request profile
+        Requires the X-Admin-Token header
+        Query parameters:
+            format: report (default), folded (stack mode) or pstats (cprofile mode)
+            sort: pstats sort key for the report (default cumulative)
+            limit: functions shown in the report (default 50)
+        """
+        if not authorized():
+            return forbidden()
+
+        try:
+            entry = profiles.get(profile_id)
+            if entry is None:
+                return jsonify({
+                    'success': False,
+                    'message': 'Profile not found'
+                }), 404
+
+            output = request.args.get('format', 'report')
+            if 'stacks' in entry:
+                if output == 'folded':
+                    return Response(render_folded(entry['stacks']), mimetype='text/plain')
+                report = {'top_stacks': [
+                    {'stack': stack.split(';'), 'samples': count}
+                    for stack, count in entry['stacks'].most_common(request.args.get('limit', 50, type=int))
+                ]}
+            else:
+                if output == 'pstats':
+                    return Response(
+                        marshal.dumps(entry['stats']),
+                        mimetype='application/octet-stream',
+                        headers={'Content-Disposition': f'attachment; filename=profile-{profile_id}.pstats'}
+                    )
+                report = {'report': render_stats(
+                    entry['stats'],
+                    request.args.get('sort', 'cumulative'),
+                    request.args.get('limit', 50, type=int)
+                )}
+
+            return jsonify({
+                'success': True,
+                'profile': dict(_summary(entry), **report)
+            }), 200
+
+        except Exception as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 500
@@ -0,0 +1,218 @@
+"""
+Python AI Service - Wire Serialization
+Fast JSON, opt-in MessagePack and gzip compression for every route
+
+JSON goes through orjson when it is installed. Clients that send
+``Content-Type: application/msgpack`` or ``Accept: application/msgpack``
+get MessagePack instead (requires the ``msgpack`` package), and responses
+are gzip-compressed for clients that send ``Accept-Encoding: gzip``.
+"""
+
+import gzip
+import json
+import time
+
+from flask import Request, request
+from werkzeug.http import parse_accept_header
+from flask.json.provider import DefaultJSONProvider
+
+from config import JSON_LIBRARY, RESPONSE_GZIP_MIN_BYTES, RESPONSE_GZIP_LEVEL
+from metrics import SERIALIZATION_LATENCY, observe
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+JSON_MIMETYPE = 'application/json'
+NDJSON_MIMETYPE = 'application/x-ndjson'
+MSGPACK_MIMETYPE = 'application/msgpack'
+MSGPACK_MIMETYPES = (MSGPACK_MIMETYPE, 'application/x-msgpack')
+
+USE_ORJSON = orjson is not None and JSON_LIBRARY == 'orjson'
+
+if USE_ORJSON:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+def _default(obj):
+    """Fallback for types neither encoder handles natively"""
+    return DefaultJSONProvider.default(obj)
+
+def dumps_json(obj, sort_keys=True):
+    """Serialize ``obj`` to compact JSON bytes"""
+    if USE_ORJSON:
+        try:
+            options = _ORJSON_OPTIONS | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+            return orjson.dumps(obj, default=_default, option=options)
+        except TypeError:
+            # e.g. integers wider than 64 bits; the stdlib handles those
+            pass
+    return json.dumps(obj, default=_default, sort_keys=sort_keys, separators=(',', ':')).encode('utf-8')
+
+def loads_json(data):
+    if USE_ORJSON:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def iter_ndjson(lines):
+    """
+    Lazily parse JSON objects from an iterable of NDJSON lines (str or bytes)
+
+    Raises:
+        ValueError: If a line is not a JSON object
+    """
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            obj = loads_json(line)
+        except ValueError:
+            raise ValueError(f'Invalid JSON on line {line_number}')
+        if not isinstance(obj, dict):
+            raise ValueError(f'Line {line_number} is not a JSON object')
+        yield obj
+
+def dumps_ndjson(objs):
+    """Serialize an iterable of objects to one NDJSON chunk"""
+    return b''.join(dumps_json(obj) + b'\n' for obj in objs)
+
+def dumps_msgpack(obj):
+    return msgpack.packb(obj, default=_default, use_bin_type=True)
+
+def loads_msgpack(data):
+    return msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+def is_msgpack(mimetype):
+    return msgpack is not None and mimetype in MSGPACK_MIMETYPES
+
+def negotiate_mimetype(accept_mimetypes):
+    """
+    Pick the response format from a werkzeug ``MIMEAccept``; JSON unless
+    MessagePack is preferred, answering with the MessagePack type the client
+    named
+    """
+    if msgpack is None:
+        return JSON_MIMETYPE
+    return accept_mimetypes.best_match([JSON_MIMETYPE, *MSGPACK_MIMETYPES], default=JSON_MIMETYPE)
+
+def encode_body(obj, mimetype=JSON_MIMETYPE):
+    if mimetype in MSGPACK_MIMETYPES:
+        return dumps_msgpack(obj)
+    return dumps_json(obj)
+
+def decode_body(data, mimetype=JSON_MIMETYPE):
+    if is_msgpack(mimetype):
+        return loads_msgpack(data)
+    return loads_json(data)
+
+def gzip_body(data, accept_encoding):
+    """
+    Compress ``data`` if the client accepts gzip and it is large enough;
+    ``gzip;q=0`` (or ``*;q=0`` without gzip) refuses it
+
+    Returns:
+        Tuple of (body, compressed flag)
+    """
+    if RESPONSE_GZIP_MIN_BYTES <= 0 or len(data) < RESPONSE_GZIP_MIN_BYTES:
+        return data, False
+    if not parse_accept_header((accept_encoding or '').lower())['gzip']:
+        return data, False
+    return gzip.compress(data, compresslevel=RESPONSE_GZIP_LEVEL), True
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by orjson, answering in MessagePack when the
+    client asks for it
+    """
+
+    def dumps(self, obj, **kwargs):
+        if not USE_ORJSON or set(kwargs) - {'sort_keys', 'separators', 'default'}:
+            return super().dumps(obj, **kwargs)
+        return dumps_json(obj, sort_keys=kwargs.get('sort_keys', self.sort_keys)).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        start = time.perf_counter()
+        try:
+            if not USE_ORJSON or kwargs:
+                return super().loads(s, **kwargs)
+            return orjson.loads(s)
+        finally:
+            observe(SERIALIZATION_LATENCY, time.perf_counter() - start, 'decode', 'json')
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        start = time.perf_counter()
+
+        mimetype = negotiate_mimetype(request.accept_mimetypes)
+        if mimetype in MSGPACK_MIMETYPES:
+            response = self._app.response_class(dumps_msgpack(obj), mimetype=mimetype)
+            wire_format = 'msgpack'
+        elif not USE_ORJSON or self.compact is False:
+            # Unlike Flask's provider, debug mode does not switch orjson off
+            # (FLASK_DEBUG defaults to on here); set ``compact = False`` or
+            # JSON_LIBRARY=json for indented output
+            response = super().response(obj)
+            wire_format = 'json'
+        else:
+            response = self._app.response_class(
+                dumps_json(obj, sort_keys=self.sort_keys) + b'\n',
+                mimetype=self.mimetype
+            )
+            wire_format = 'json'
+
+        observe(SERIALIZATION_LATENCY, time.perf_counter() - start, 'encode', wire_format)
+
+        if msgpack is not None:
+            response.vary.add('Accept')
+        return response
+
+class WireRequest(Request):
+    """Request that also decodes MessagePack bodies in ``get_json``"""
+
+    _cached_msgpack = None
+
+    def get_json(self, force=False, silent=False, cache=True):
+        if not is_msgpack(self.mimetype):
+            return super().get_json(force=force, silent=silent, cache=cache)
+
+        if self._cached_msgpack is not None:
+            return self._cached_msgpack
+
+        start = time.perf_counter()
+        try:
+            data = loads_msgpack(self.get_data(cache=cache))
+        except Exception as e:
+            if silent:
+                return None
+            return self.on_json_loading_failed(e)
+        finally:
+            observe(SERIALIZATION_LATENCY, time.perf_counter() - start, 'decode', 'msgpack')
+
+        if cache:
+            self._cached_msgpack = data
+        return data
+
+def compress_response(response):
+    """``after_request`` hook applying gzip to eligible responses"""
+    if response.direct_passthrough or response.is_streamed or \
+            'Content-Encoding' in response.headers or \
+            response.status_code < 200 or response.status_code in (204, 304):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    body, compressed = gzip_body(response.get_data(), request.headers.get('Accept-Encoding'))
+    if compressed:
+        response.set_data(body)
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+def init_app(app):
+    """Install the fast JSON provider, MessagePack requests and gzip on ``app``"""
+    app.json = FastJSONProvider(app)
+    app.request_class = WireRequest
+    app.after_request(compress_response)
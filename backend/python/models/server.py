@@ -0,0 +1,339 @@
+"""
+Python AI Service - Pre-fork Server
+Runs N copies of the Flask app on one shared listening socket
+
+The app, config, scoring weights and shared caches are loaded once in the
+parent before forking, so workers start warm and share those pages
+copy-on-write. The kernel balances connections across workers accepting on
+the same socket.
+
+Signals handled by the parent:
+    SIGHUP           graceful reload (re-exec with new code, then retire old workers)
+    SIGTERM/SIGINT   graceful shutdown
+
+Stopping workers (shutdown, reload or SERVER_MAX_REQUESTS recycling) stop
+accepting connections and finish in-flight requests for up to
+SERVER_GRACEFUL_TIMEOUT seconds before exiting.
+
+In-memory state (evaluation jobs, explanations, leaderboards, incremental
+scores, behavior streams and, without storage, the problem registry) lives in
+each worker, and the kernel spreads connections across workers with no
+affinity. The server therefore runs one worker unless SERVER_ALLOW_WORKER_STATE
+confirms that those endpoints are not used. Workers split SANDBOX_POOL_SIZE
+between them.
+
+Each worker slot snapshots its leaderboards to LEADERBOARD_SNAPSHOT_PATH
+(``.<slot>`` with several workers) when it stops and restores that file when
+the slot starts again. On reload the previous workers are retired, and have
+written their snapshots, before the new ones start.
+
+Usage (from backend/python):
+    python -m models.server --workers 4 --port 5000
+"""
+
+import argparse
+import atexit
+import gc
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+import traceback
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(__file__))
+
+from werkzeug.serving import make_server
+from werkzeug.wsgi import ClosingIterator
+
+from config import (
+    FLASK_HOST,
+    FLASK_PORT,
+    LEADERBOARD_SNAPSHOT_PATH,
+    SANDBOX_POOL_SIZE,
+    SERVER_ALLOW_WORKER_STATE,
+    SERVER_WORKERS,
+    SERVER_MAX_REQUESTS,
+    SERVER_GRACEFUL_TIMEOUT
+)
+
+# Environment variables used to hand state across a reload (re-exec)
+LISTEN_FD_ENV = 'AI_SERVICE_LISTEN_FD'
+OLD_WORKERS_ENV = 'AI_SERVICE_OLD_WORKERS'
+
+def load_app():
+    """Import the app and warm shared state in the parent before forking"""
+    from app import app
+    from ai_engine.leaderboard import get_leaderboards
+    from evaluation.result_cache import get_result_cache
+
+    leaderboards = get_leaderboards()
+    get_result_cache()
+
+    # Workers write the snapshot themselves on shutdown; the master's copy
+    # never sees updates and must not overwrite theirs
+    if LEADERBOARD_SNAPSHOT_PATH:
+        atexit.unregister(leaderboards.snapshot)
+
+    # Keep warm objects out of future collections so workers don't touch
+    # (and copy) their pages
+    gc.collect()
+    gc.freeze()
+    return app
+
+def create_socket(host, port, backlog=2048):
+    """Return the listening socket, reusing the one inherited across a reload"""
+    inherited_fd = os.environ.pop(LISTEN_FD_ENV, None)
+    if inherited_fd is not None:
+        sock = socket.socket(fileno=int(inherited_fd))
+    else:
+        family = socket.AF_INET6 if ':' in host else socket.AF_INET
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((host, port))
+        sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+class RequestLimiter:
+    """WSGI wrapper that asks the worker to recycle after max_requests"""
+
+    def __init__(self, app, max_requests, on_limit):
+        self.app = app
+        self.max_requests = max_requests
+        self.on_limit = on_limit
+        self.handled = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        with self._lock:
+            self.handled += 1
+            reached = self.handled == self.max_requests
+        if reached:
+            self.on_limit()
+        return self.app(environ, start_response)
+
+class InFlightTracker:
+    """WSGI wrapper counting requests whose response has not been fully sent"""
+
+    def __init__(self, app):
+        self.app = app
+        self.active = 0
+        self._changed = threading.Condition()
+
+    def __call__(self, environ, start_response):
+        with self._changed:
+            self.active += 1
+        try:
+            response = self.app(environ, start_response)
+        except BaseException:
+            self._finish()
+            raise
+        # werkzeug closes the response once the last byte has been written
+        return ClosingIterator(response, self._finish)
+
+    def wait_idle(self, timeout):
+        """Wait until no request is in flight; return False on timeout"""
+        with self._changed:
+            return self._changed.wait_for(lambda: self.active == 0, timeout)
+
+    def _finish(self):
+        with self._changed:
+            self.active -= 1
+            self._changed.notify_all()
+
+class Arbiter:
+    """Parent process that forks, supervises and reloads workers"""
+
+    def __init__(self, app, sock, workers, max_requests=0, graceful_timeout=30):
+        self.app = app
+        self.sock = sock
+        self.worker_count = workers
+        self.max_requests = max_requests
+        self.graceful_timeout = graceful_timeout
+        self.workers = {}  # pid -> slot
+        self._signal = None
+
+    def run(self):
+        for signum in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, self._handle_signal)
+
+        old_workers = [int(pid) for pid in os.environ.pop(OLD_WORKERS_ENV, '').split(',') if pid]
+
+        # After a reload, retire the previous generation first so the new
+        # workers restore the snapshots it writes on the way out. The socket
+        # stays open, so connections wait in its backlog meanwhile.
+        if old_workers:
+            self._stop_workers(old_workers)
+
+        print(f"AI Service master {os.getpid()} starting {self.worker_count} workers")
+        self._spawn_missing()
+
+        while True:
+            if self._signal in (signal.SIGTERM, signal.SIGINT):
+                self._stop_workers(list(self.workers))
+                return
+            if self._signal == signal.SIGHUP:
+                self._reload()
+
+            self._reap()
+            self._spawn_missing()
+            time.sleep(0.5)
+
+    def _handle_signal(self, signum, frame):
+        self._signal = signum
+
+    def _spawn_missing(self):
+        free_slots = sorted(set(range(self.worker_count)) - set(self.workers.values()))
+        for slot in free_slots:
+            pid = os.fork()
+            if pid == 0:
+                exit_code = 0
+                try:
+                    self._run_worker(slot)
+                except BaseException:
+                    traceback.print_exc()
+                    exit_code = 1
+                finally:
+                    sys.stdout.flush()
+                    sys.stderr.flush()
+                    os._exit(exit_code)
+            self.workers[pid] = slot
+
+    def _reap(self):
+        while True:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            self.workers.pop(pid, None)
+
+    def _stop_workers(self, pids):
+        """Ask workers to finish in-flight requests, then force them down"""
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+        deadline = time.monotonic() + self.graceful_timeout
+        remaining = set(pids)
+        while remaining and time.monotonic() < deadline:
+            for pid in list(remaining):
+                try:
+                    done, _ = os.waitpid(pid, os.WNOHANG)
+                except ChildProcessError:
+                    done = pid
+                if done:
+                    remaining.discard(pid)
+                    self.workers.pop(pid, None)
+            time.sleep(0.1)
+
+        for pid in remaining:
+            try:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+            self.workers.pop(pid, None)
+
+    def _reload(self):
+        """Re-exec the master with the same socket; the new master retires us"""
+        print(f"AI Service master {os.getpid()} reloading")
+        os.environ[LISTEN_FD_ENV] = str(self.sock.fileno())
+        os.environ[OLD_WORKERS_ENV] = ','.join(str(pid) for pid in self.workers)
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.execv(sys.executable, sys.orig_argv)
+
+    def _snapshot_path(self, slot):
+        """Leaderboard snapshot of a worker slot, so workers never overwrite each other"""
+        if self.worker_count == 1:
+            return LEADERBOARD_SNAPSHOT_PATH
+        return f"{LEADERBOARD_SNAPSHOT_PATH}.{slot}"
+
+    def _run_worker(self, slot):
+        """Serve requests until told to stop. Runs in the forked child."""
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+
+        # The master restored its copy before the previous workers (of a
+        # reload or of this slot) wrote theirs, so always read the file again
+        if LEADERBOARD_SNAPSHOT_PATH and os.path.exists(self._snapshot_path(slot)):
+            from ai_engine.leaderboard import get_leaderboards
+            get_leaderboards().restore(self._snapshot_path(slot))
+
+        if SANDBOX_POOL_SIZE > 0:
+            from evaluation import sandbox
+            sandbox.set_pool_size(max(1, SANDBOX_POOL_SIZE // self.worker_count))
+
+        stopping = threading.Event()
+        tracker = InFlightTracker(self.app)
+        app = tracker
+        if self.max_requests > 0:
+            app = RequestLimiter(app, self.max_requests, lambda: stop())
+
+        host, port = self.sock.getsockname()[:2]
+        server = make_server(host, port, app, threaded=True, fd=self.sock.fileno())
+
+        def stop():
+            # shutdown() blocks until serve_forever returns, so never call
+            # it from the serving thread itself
+            if not stopping.is_set():
+                stopping.set()
+                threading.Thread(target=server.shutdown, daemon=True).start()
+
+        def watch_parent(parent_pid):
+            while not stopping.wait(1):
+                if os.getppid() != parent_pid:
+                    stop()
+
+        signal.signal(signal.SIGTERM, lambda signum, frame: stop())
+        threading.Thread(target=watch_parent, args=(os.getppid(),), daemon=True).start()
+
+        server.serve_forever()
+        # Request threads are daemons and would die with the process, so
+        # wait for in-flight requests before exiting
+        tracker.wait_idle(self.graceful_timeout)
+        server.server_close()
+
+        if LEADERBOARD_SNAPSHOT_PATH:
+            from ai_engine.leaderboard import get_leaderboards
+            get_leaderboards().snapshot(self._snapshot_path(slot))
+
+def main():
+    parser = argparse.ArgumentParser(description='Pre-fork server for the AI service')
+    parser.add_argument('--host', default=FLASK_HOST)
+    parser.add_argument('--port', type=int, default=FLASK_PORT)
+    parser.add_argument('--workers', type=int, default=SERVER_WORKERS or os.cpu_count() or 1)
+    parser.add_argument('--allow-worker-state', action='store_true', default=SERVER_ALLOW_WORKER_STATE,
+                        help='Run several workers even though in-memory state is per worker')
+    parser.add_argument('--max-requests', type=int, default=SERVER_MAX_REQUESTS,
+                        help='Recycle a worker after this many requests (0 disables)')
+    parser.add_argument('--graceful-timeout', type=int, default=SERVER_GRACEFUL_TIMEOUT)
+    args = parser.parse_args()
+
+    if args.workers > 1 and not args.allow_worker_state:
+        parser.error(
+            f'{args.workers} workers would each keep their own jobs, explanations, leaderboards, '
+            'incremental and streaming state and problem registry, and requests for them would '
+            'land on random workers; run one worker or pass --allow-worker-state '
+            '(SERVER_ALLOW_WORKER_STATE=True) if those endpoints are not used'
+        )
+
+    app = load_app()
+    sock = create_socket(args.host, args.port)
+    print(f"Starting AI Service on {args.host}:{args.port}")
+
+    Arbiter(
+        app, sock, args.workers,
+        max_requests=args.max_requests,
+        graceful_timeout=args.graceful_timeout
+    ).run()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,522 @@
+"""
+Python AI Service - Storage
+Persistence for candidate responses, scores, role membership and
+coding problem test suites
+
+Persistence is off unless STORAGE_BACKEND selects SQLite (stdlib), MySQL
+(pymysql) or PostgreSQL (psycopg2); the latter two use the connection
+settings in ``DB_CONFIG``. Connections are pooled, all statements are
+parameterized, and writes are bulk inserts or upserts.
+
+Responses and scores written as a side effect of scoring are best effort:
+failures are logged and counted, and never fail the request.
+"""
+
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from config import DB_CONFIG, STORAGE_BACKEND, STORAGE_SQLITE_PATH, STORAGE_POOL_SIZE
+from metrics import STORAGE_WRITE_FAILURES
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_COLUMNS = (
+    'candidate_id', 'assessment_id', 'domain', 'is_correct', 'time_taken',
+    'difficulty', 'submitted_at', 'response_text'
+)
+
+SCORE_COLUMNS = (
+    'candidate_id', 'domain', 'skill_score', 'accuracy_score', 'time_score',
+    'learning_score', 'total_score', 'updated_at'
+)
+
+# {id} is replaced with the backend's auto-increment primary key, which also
+# keeps responses in submission order. A candidate answers many questions of
+# one assessment, so responses have no natural unique key.
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS candidate_responses (
+        id {id},
+        candidate_id BIGINT NOT NULL,
+        assessment_id BIGINT,
+        domain VARCHAR(255) NOT NULL,
+        is_correct SMALLINT NOT NULL,
+        time_taken DOUBLE PRECISION,
+        difficulty VARCHAR(32),
+        submitted_at VARCHAR(64),
+        response_text TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS candidate_scores (
+        candidate_id BIGINT NOT NULL,
+        domain VARCHAR(255) NOT NULL,
+        skill_score DOUBLE PRECISION NOT NULL,
+        accuracy_score DOUBLE PRECISION NOT NULL,
+        time_score DOUBLE PRECISION NOT NULL,
+        learning_score DOUBLE PRECISION NOT NULL,
+        total_score DOUBLE PRECISION NOT NULL,
+        updated_at DOUBLE PRECISION NOT NULL,
+        PRIMARY KEY (candidate_id, domain)
+    )""",
+    """CREATE TABLE IF NOT EXISTS candidate_roles (
+        candidate_id BIGINT NOT NULL,
+        role_match VARCHAR(255) NOT NULL,
+        PRIMARY KEY (candidate_id, role_match)
+    )""",
+    """CREATE TABLE IF NOT EXISTS problem_suites (
+        problem_id VARCHAR(255) NOT NULL,
+        version INTEGER NOT NULL,
+        digest VARCHAR(64) NOT NULL,
+        function_name VARCHAR(255),
+        test_cases TEXT NOT NULL,
+        created_at DOUBLE PRECISION NOT NULL,
+        PRIMARY KEY (problem_id, version)
+    )"""
+]
+
+INDEXES = [
+    "CREATE INDEX idx_responses_candidate_domain ON candidate_responses (candidate_id, domain)",
+    "CREATE INDEX idx_scores_domain ON candidate_scores (domain, total_score)",
+    "CREATE INDEX idx_roles_role ON candidate_roles (role_match)"
+]
+
+class StorageError(Exception):
+    """Raised when the storage backend is unavailable or misconfigured"""
+
+class ConnectionPool:
+    """Fixed-size pool of DB-API connections created on demand"""
+
+    def __init__(self, connect, size=8):
+        self._connect = connect
+        self._idle = queue.LifoQueue()
+        self._slots = threading.Semaphore(size)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; commits on success and rolls back on error"""
+        self._slots.acquire()
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+
+            try:
+                yield conn
+                conn.commit()
+            except Exception:
+                try:
+                    conn.rollback()
+                except Exception:
+                    # Broken connection; drop it instead of returning it
+                    conn.close()
+                    raise
+                self._idle.put(conn)
+                raise
+            else:
+                self._idle.put(conn)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+class Storage:
+    """Responses, scores and role membership keyed by candidate, plus problem suites"""
+
+    def __init__(self, backend='sqlite', sqlite_path=':memory:', db_config=None, pool_size=8):
+        self.backend = backend
+        self.db_config = db_config or {}
+        self.sqlite_path = sqlite_path
+
+        if backend == 'sqlite':
+            self.placeholder = '?'
+            id_column = 'INTEGER PRIMARY KEY AUTOINCREMENT'
+            # An in-memory database only exists on its one connection
+            if sqlite_path == ':memory:':
+                pool_size = 1
+        elif backend == 'mysql':
+            self.placeholder = '%s'
+            id_column = 'BIGINT AUTO_INCREMENT PRIMARY KEY'
+        elif backend == 'postgresql':
+            self.placeholder = '%s'
+            id_column = 'BIGSERIAL PRIMARY KEY'
+        else:
+            raise StorageError(f"Unsupported storage backend: {backend}")
+
+        self.pool = ConnectionPool(self._connect, pool_size)
+        self._create_schema(id_column)
+
+    # Writes
+
+    def save_responses(self, candidate_id, responses):
+        """Append new responses to a candidate's history"""
+        self._executemany(
+            f"INSERT INTO candidate_responses ({', '.join(RESPONSE_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(RESPONSE_COLUMNS))})",
+            _response_rows([{'candidate_id': candidate_id, 'responses': responses}])
+        )
+
+    def replace_responses_bulk(self, candidates):
+        """
+        Store full response histories, replacing what each candidate had
+
+        Args:
+            candidates: List of dictionaries with ``candidate_id`` and ``responses``
+        """
+        candidates = [c for c in candidates if c.get('candidate_id') is not None]
+        candidate_ids = list(dict.fromkeys(c['candidate_id'] for c in candidates))
+        if not candidate_ids:
+            return
+
+        insert_sql = self._sql(
+            f"INSERT INTO candidate_responses ({', '.join(RESPONSE_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(RESPONSE_COLUMNS))})"
+        )
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            for chunk in _chunks(candidate_ids):
+                cursor.execute(
+                    self._sql(f"DELETE FROM candidate_responses WHERE candidate_id IN ({', '.join('?' * len(chunk))})"),
+                    chunk
+                )
+            rows = _response_rows(candidates)
+            if rows:
+                cursor.executemany(insert_sql, rows)
+
+    def save_scores(self, candidate_id, scores):
+        self.save_scores_bulk([{'candidate_id': candidate_id, 'scores': scores}])
+
+    def save_scores_bulk(self, results):
+        """
+        Store domain scores for ``[{"candidate_id": ..., "scores": {...}}]``,
+        replacing every score each candidate had (domains no longer scored
+        are dropped)
+        """
+        results = [r for r in results if r.get('candidate_id') is not None]
+        candidate_ids = list(dict.fromkeys(r['candidate_id'] for r in results))
+        if not candidate_ids:
+            return
+
+        now = time.time()
+        rows = [
+            (
+                result['candidate_id'], domain,
+                score['skill_score'], score['accuracy_score'], score['time_score'],
+                score['learning_score'], score['total_score'], now
+            )
+            for result in results
+            for domain, score in result['scores'].items()
+        ]
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            for chunk in _chunks(candidate_ids):
+                cursor.execute(
+                    self._sql(f"DELETE FROM candidate_scores WHERE candidate_id IN ({', '.join('?' * len(chunk))})"),
+                    chunk
+                )
+            if rows:
+                # Upsert in case a candidate appears more than once in ``results``
+                cursor.executemany(
+                    self._sql(self._upsert_sql('candidate_scores', SCORE_COLUMNS, ('candidate_id', 'domain'))),
+                    rows
+                )
+
+    def assign_role(self, candidate_ids, role_match):
+        rows = [(candidate_id, role_match) for candidate_id in candidate_ids if candidate_id is not None]
+        self._executemany(
+            self._upsert_sql('candidate_roles', ('candidate_id', 'role_match'), ('candidate_id', 'role_match')),
+            rows
+        )
+
+    def save_problem_suite(self, problem_id, version, digest, function_name, test_cases_json, created_at):
+        """
+        Insert one problem suite version
+
+        Raises the backend's integrity error if the version already exists.
+        """
+        self._executemany(
+            "INSERT INTO problem_suites (problem_id, version, digest, function_name, test_cases, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [(problem_id, version, digest, function_name, test_cases_json, created_at)]
+        )
+
+    # Reads
+
+    def load_responses(self, candidate_id, domain=None):
+        """Return a candidate's stored responses in insertion order"""
+        sql = f"SELECT {', '.join(RESPONSE_COLUMNS[1:])} FROM candidate_responses WHERE candidate_id = ?"
+        params = [candidate_id]
+        if domain is not None:
+            sql += " AND domain = ?"
+            params.append(domain)
+        sql += " ORDER BY id"
+
+        responses = []
+        for assessment_id, domain_, is_correct, time_taken, difficulty, submitted_at, response_text in \
+                self._query(sql, params):
+            response = {'domain': domain_, 'is_correct': bool(is_correct)}
+            for key, value in (
+                ('assessment_id', assessment_id),
+                ('time_taken', time_taken),
+                ('difficulty', difficulty),
+                ('submitted_at', submitted_at),
+                ('response_text', response_text)
+            ):
+                if value is not None:
+                    response[key] = value
+            responses.append(response)
+        return responses
+
+    def load_scores(self, candidate_ids):
+        """Return ``[{"candidate_id": ..., "scores": {...}}]`` for stored candidates, in input order"""
+        candidate_ids = list(candidate_ids)
+        if not candidate_ids:
+            return []
+
+        scores = {}
+        for chunk in _chunks(candidate_ids):
+            sql = (
+                f"SELECT {', '.join(SCORE_COLUMNS[:-1])} FROM candidate_scores "
+                f"WHERE candidate_id IN ({', '.join('?' * len(chunk))})"
+            )
+            self._collect_scores(self._query(sql, chunk), scores)
+
+        return [
+            {'candidate_id': candidate_id, 'scores': scores[candidate_id]}
+            for candidate_id in dict.fromkeys(candidate_ids)
+            if candidate_id in scores
+        ]
+
+    def load_role_scores(self, role_match):
+        """Return stored scores for every candidate assigned to ``role_match``"""
+        sql = (
+            f"SELECT {', '.join('s.' + column for column in SCORE_COLUMNS[:-1])} "
+            "FROM candidate_roles r JOIN candidate_scores s ON s.candidate_id = r.candidate_id "
+            "WHERE r.role_match = ? ORDER BY s.candidate_id"
+        )
+        scores = {}
+        self._collect_scores(self._query(sql, [role_match]), scores)
+        return [
+            {'candidate_id': candidate_id, 'scores': candidate_scores}
+            for candidate_id, candidate_scores in scores.items()
+        ]
+
+    def load_problem_suite(self, problem_id, version=None):
+        """
+        Return ``(version, digest, function_name, test_cases_json, created_at)``
+        for a version (the latest if None), or None if it does not exist
+        """
+        sql = "SELECT version, digest, function_name, test_cases, created_at FROM problem_suites WHERE problem_id = ?"
+        params = [problem_id]
+        if version is None:
+            sql += " ORDER BY version DESC LIMIT 1"
+        else:
+            sql += " AND version = ?"
+            params.append(version)
+        rows = self._query(sql, params)
+        return tuple(rows[0]) if rows else None
+
+    def load_problem_versions(self, problem_id):
+        """Return ``[(version, digest, created_at)]`` for a problem, oldest first"""
+        return [
+            tuple(row) for row in self._query(
+                "SELECT version, digest, created_at FROM problem_suites WHERE problem_id = ? ORDER BY version",
+                [problem_id]
+            )
+        ]
+
+    def close(self):
+        self.pool.close()
+
+    # Helpers
+
+    def _collect_scores(self, rows, scores):
+        for candidate_id, domain, skill, accuracy, time_score, learning, total in rows:
+            scores.setdefault(candidate_id, {})[domain] = {
+                'skill_score': skill,
+                'accuracy_score': accuracy,
+                'time_score': time_score,
+                'learning_score': learning,
+                'total_score': total
+            }
+
+    def _connect(self):
+        if self.backend == 'sqlite':
+            conn = sqlite3.connect(self.sqlite_path, check_same_thread=False, cached_statements=256)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            return conn
+
+        try:
+            if self.backend == 'mysql':
+                import pymysql
+                return pymysql.connect(**self.db_config)
+            import psycopg2
+            return psycopg2.connect(**self.db_config)
+        except ImportError:
+            raise StorageError(f"The {self.backend} storage backend requires its database driver")
+
+    def _create_schema(self, id_column):
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            for statement in SCHEMA:
+                cursor.execute(statement.format(id=id_column))
+
+        # MySQL has no CREATE INDEX IF NOT EXISTS, so tolerate existing ones
+        for statement in INDEXES:
+            if self.backend != 'mysql':
+                statement = statement.replace('CREATE INDEX', 'CREATE INDEX IF NOT EXISTS')
+            try:
+                with self.pool.connection() as conn:
+                    conn.cursor().execute(statement)
+            except Exception:
+                if self.backend != 'mysql':
+                    raise
+
+    def _upsert_sql(self, table, columns, keys):
+        placeholders = ', '.join('?' * len(columns))
+        updates = [column for column in columns if column not in keys]
+
+        if self.backend == 'mysql':
+            action = ', '.join(f"{column} = VALUES({column})" for column in updates or keys)
+            return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders}) ON DUPLICATE KEY UPDATE {action}"
+
+        action = 'NOTHING' if not updates else \
+            'UPDATE SET ' + ', '.join(f"{column} = excluded.{column}" for column in updates)
+        return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders}) ON CONFLICT ({', '.join(keys)}) DO {action}"
+
+    def _sql(self, sql):
+        """SQL is written with ``?`` markers and converted to the backend's style"""
+        if self.placeholder != '?':
+            sql = sql.replace('?', self.placeholder)
+        return sql
+
+    def _executemany(self, sql, rows):
+        if not rows:
+            return
+        with self.pool.connection() as conn:
+            conn.cursor().executemany(self._sql(sql), rows)
+
+    def _query(self, sql, params):
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(self._sql(sql), params)
+            return cursor.fetchall()
+
+def _response_rows(candidates):
+    return [
+        (
+            candidate.get('candidate_id'),
+            response.get('assessment_id'),
+            response.get('domain', 'general'),
+            1 if response.get('is_correct', False) else 0,
+            response.get('time_taken'),
+            response.get('difficulty'),
+            response.get('submitted_at'),
+            response.get('response_text')
+        )
+        for candidate in candidates
+        for response in candidate.get('responses') or []
+    ]
+
+def _chunks(values, size=500):
+    """Split ``values`` to stay well under the backends' bound parameter limits"""
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+_storage = None
+_storage_lock = threading.Lock()
+
+def get_storage():
+    """Return the shared storage, or None if persistence is disabled"""
+    global _storage
+    if _storage is None and STORAGE_BACKEND != 'none':
+        with _storage_lock:
+            if _storage is None:
+                _storage = Storage(
+                    STORAGE_BACKEND,
+                    sqlite_path=STORAGE_SQLITE_PATH,
+                    db_config=DB_CONFIG,
+                    pool_size=STORAGE_POOL_SIZE
+                )
+    return _storage
+
+def resolve_responses(data, store=True):
+    """
+    Responses for a scoring/analysis request body
+
+    Responses in the body are returned (and stored as the candidate's
+    history when ``store`` is set); with only ``candidate_id`` the stored
+    history is returned. None if neither applies.
+    """
+    if not data:
+        return None
+
+    candidate_id = data.get('candidate_id')
+
+    if 'responses' in data:
+        responses = data.get('responses', [])
+        if store and candidate_id is not None:
+            store_response_histories([{'candidate_id': candidate_id, 'responses': responses}])
+        return responses
+
+    storage = get_storage()
+    if storage is not None and candidate_id is not None:
+        return storage.load_responses(candidate_id)
+    return None
+
+def resolve_rank_candidates(data):
+    """Candidates from the request body, or stored scores by id or role"""
+    if not data:
+        return None
+    if 'candidates' in data:
+        return data.get('candidates', [])
+
+    storage = get_storage()
+    if storage is None:
+        return None
+    if 'candidate_ids' in data:
+        return storage.load_scores(data.get('candidate_ids') or [])
+    if 'role_match' in data:
+        return storage.load_role_scores(data.get('role_match'))
+    return None
+
+def store_response_histories(candidates):
+    """Replace stored response histories when storage is enabled (best effort)"""
+    with _best_effort('responses'):
+        storage = get_storage()
+        if storage is not None:
+            storage.replace_responses_bulk(candidates)
+
+def append_responses(candidate_id, responses):
+    """Add new responses to a stored history when storage is enabled (best effort)"""
+    with _best_effort('responses'):
+        storage = get_storage()
+        if storage is not None:
+            storage.save_responses(candidate_id, responses)
+
+def store_scores(results, role_match=None):
+    """Persist scores (and role membership) when storage is enabled (best effort)"""
+    with _best_effort('scores'):
+        storage = get_storage()
+        if storage is None:
+            return
+        storage.save_scores_bulk(results)
+        if role_match:
+            storage.assign_role([result['candidate_id'] for result in results], role_match)
+
+@contextmanager
+def _best_effort(operation):
+    """Log and count a failed side-effect write instead of raising it"""
+    try:
+        yield
+    except Exception:
+        STORAGE_WRITE_FAILURES.inc(operation)
+        logger.exception('Storage write of %s failed', operation)
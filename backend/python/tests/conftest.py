@@ -0,0 +1,15 @@
+"""
+Test configuration
+
+Run from backend/python:
+    python -m pytest tests
+"""
+
+import os
+import sys
+
+# Same import path the service uses (config lives in models/)
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (ROOT_DIR, os.path.join(ROOT_DIR, 'models')):
+    if path not in sys.path:
+        sys.path.append(path)
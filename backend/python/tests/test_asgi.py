@@ -0,0 +1,120 @@
+"""ASGI routes against the Flask routes they mirror"""
+
+import asyncio
+import json
+import random
+
+import pytest
+
+import asgi
+from app import app as flask_app
+
+def _responses(rng, count):
+    return [
+        {
+            'is_correct': rng.random() < 0.6,
+            'time_taken': rng.randint(5, 120),
+            'difficulty': rng.choice(['easy', 'medium', 'hard']),
+            'domain': rng.choice(['python', 'sql']),
+            'submitted_at': f'2024-01-01T00:{idx // 60:02d}:{idx % 60:02d}'
+        }
+        for idx in range(count)
+    ]
+
+async def _call(service, method, path, body=b'', headers=()):
+    scope = {
+        'type': 'http',
+        'method': method,
+        'path': path,
+        'raw_path': path.encode('ascii'),
+        'query_string': b'',
+        'root_path': '',
+        'scheme': 'http',
+        'server': ('testserver', 80),
+        'client': ('127.0.0.1', 1234),
+        'http_version': '1.1',
+        'headers': [(b'content-length', str(len(body)).encode('ascii')), *headers]
+    }
+    received = []
+
+    async def receive():
+        if received:
+            return {'type': 'http.disconnect'}
+        received.append(True)
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    await service(scope, receive, send)
+    start = messages[0]
+    body = b''.join(message.get('body', b'') for message in messages[1:])
+    return start['status'], dict(start['headers']), body
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(asgi, 'ASGI_PROCESS_WORKERS', 0)
+    monkeypatch.setattr(asgi, 'PROFILE_SAMPLE_RATE', 0)
+    service = asgi.AsyncAIService(flask_app)
+    yield service
+    service.shutdown()
+
+def _post(service, path, payload):
+    body = json.dumps(payload).encode('utf-8')
+    return asyncio.run(_call(service, 'POST', path, body, [(b'content-type', b'application/json')]))
+
+@pytest.mark.parametrize('path, payload', [
+    ('/ai/evaluate', {'candidate_id': 1, 'responses': _responses(random.Random(1), 40)}),
+    ('/ai/analyze', {'candidate_id': 2, 'responses': _responses(random.Random(2), 40)}),
+    ('/ai/evaluate/batch', {'candidates': [
+        {'candidate_id': idx, 'responses': _responses(random.Random(idx), 10)} for idx in range(3)
+    ]}),
+    ('/ai/rank', {'role_match': 'Backend', 'top_k': 2, 'offset': 1, 'candidates': [
+        {'candidate_id': idx, 'scores': {'python': 50 + idx % 3 * 10}} for idx in range(6)
+    ]}),
+    ('/ai/rank', {'candidates': [], 'top_k': -1}),
+    ('/evaluate/response', {'type': 'mcq', 'response': 'B', 'correct_answer': 'b'}),
+    ('/evaluate/response', {'type': 'essay'}),
+    ('/ai/evaluate', {'candidate_id': 3})
+])
+def test_routes_match_flask(service, path, payload):
+    async def no_fallback(scope, receive, send):
+        raise AssertionError(f"{scope['path']} was served by Flask")
+    service.fallback = no_fallback
+
+    status, headers, body = _post(service, path, payload)
+    expected = flask_app.test_client().post(path, json=payload)
+    assert status == expected.status_code
+    assert headers[b'content-type'] == b'application/json'
+    assert json.loads(body) == expected.get_json()
+
+def test_invalid_json_is_a_bad_request(service):
+    status, _, body = asyncio.run(_call(
+        service, 'POST', '/ai/analyze', b'{"candidate_id": ', [(b'content-type', b'application/json')]
+    ))
+    assert status == 400
+    assert json.loads(body) == {'success': False, 'message': 'Invalid JSON body'}
+
+def test_large_payloads_use_the_process_pool(monkeypatch):
+    monkeypatch.setattr(asgi, 'ASGI_PROCESS_WORKERS', 1)
+    monkeypatch.setattr(asgi, 'ASGI_OFFLOAD_THRESHOLD', 10)
+    monkeypatch.setattr(asgi, 'PROFILE_SAMPLE_RATE', 0)
+    service = asgi.AsyncAIService(flask_app)
+    try:
+        payload = {'candidate_id': 4, 'responses': _responses(random.Random(4), 30)}
+        status, _, body = _post(service, '/ai/analyze', payload)
+        assert service.process_pool is not None
+        assert status == 200
+        assert json.loads(body) == flask_app.test_client().post('/ai/analyze', json=payload).get_json()
+    finally:
+        service.shutdown()
+
+def test_other_routes_fall_back_to_flask(service):
+    status, _, body = asyncio.run(_call(service, 'GET', '/ai/leaderboard/Nobody'))
+    assert status == 200
+    assert json.loads(body)['total'] == 0
+
+    status, _, _ = asyncio.run(_call(service, 'GET', '/no/such/route'))
+    assert status == 404
@@ -0,0 +1,47 @@
+"""Vectorized batch scoring against the per-candidate scorer"""
+
+import random
+from datetime import datetime, timedelta
+
+from ai_engine.batch_scoring import calculate_scores_batch, iter_scores_batched
+from ai_engine.scoring import calculate_score
+
+def random_candidate(rng, candidate_id):
+    """Mixed domains and difficulties, missing fields and tied timestamps"""
+    start = datetime(2024, 1, 1)
+    responses = []
+    for _ in range(rng.randint(0, 30)):
+        response = {'is_correct': rng.random() < 0.6}
+        if rng.random() < 0.9:
+            response['domain'] = rng.choice(['python', 'sql', 'dsa'])
+        if rng.random() < 0.9:
+            response['difficulty'] = rng.choice(['easy', 'medium', 'hard', 'expert'])
+        if rng.random() < 0.8:
+            response['time_taken'] = rng.choice([0, rng.randint(1, 900), round(rng.uniform(1, 900), 3)])
+        if rng.random() < 0.9:
+            response['submitted_at'] = (start + timedelta(minutes=rng.randint(0, 20))).isoformat()
+        responses.append(response)
+    return {'candidate_id': candidate_id, 'responses': responses}
+
+def test_matches_calculate_score():
+    rng = random.Random(5)
+    candidates = [random_candidate(rng, candidate_id) for candidate_id in range(3000)]
+
+    results = calculate_scores_batch(candidates)
+
+    assert [result['candidate_id'] for result in results] == list(range(3000))
+    for candidate, result in zip(candidates, results):
+        assert result['scores'] == calculate_score(candidate['responses'])
+
+def test_chunked_matches_single_batch():
+    rng = random.Random(6)
+    candidates = [random_candidate(rng, candidate_id) for candidate_id in range(250)]
+
+    chunks = list(iter_scores_batched(iter(candidates), batch_size=100))
+
+    assert [len(chunk) for chunk in chunks] == [100, 100, 50]
+    assert [result for chunk in chunks for result in chunk] == calculate_scores_batch(candidates)
+
+def test_empty_input():
+    assert calculate_scores_batch([]) == []
+    assert calculate_scores_batch([{'candidate_id': 1, 'responses': []}]) == [{'candidate_id': 1, 'scores': {}}]
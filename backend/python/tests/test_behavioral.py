@@ -0,0 +1,68 @@
+"""Fused behavioral analysis against the per-metric reference functions"""
+
+import json
+import random
+from datetime import datetime, timedelta
+
+from ai_engine.behavioral import (
+    analyze_behavior,
+    analyze_behavior_batch,
+    analyze_response_patterns,
+    calculate_adaptability,
+    calculate_improvement_trend,
+    calculate_learning_curve
+)
+
+def reference_analysis(candidate_id, responses):
+    """analyze_behavior as composed from the separate metric functions"""
+    if not responses:
+        return {
+            'candidate_id': candidate_id,
+            'improvement_trend': 0.0,
+            'adaptability_score': 50.0,
+            'learning_curve': 50.0,
+            'response_pattern': {}
+        }
+    sorted_responses = sorted(responses, key=lambda x: x.get('submitted_at', ''))
+    return {
+        'candidate_id': candidate_id,
+        'improvement_trend': round(calculate_improvement_trend(sorted_responses), 2),
+        'adaptability_score': round(calculate_adaptability(responses), 2),
+        'learning_curve': round(calculate_learning_curve(sorted_responses), 2),
+        'response_pattern': analyze_response_patterns(responses)
+    }
+
+def random_responses(rng):
+    """Responses submitted out of time order, with float times and gaps"""
+    start = datetime(2024, 1, 1)
+    responses = []
+    for _ in range(rng.randint(0, 40)):
+        response = {'is_correct': rng.random() < 0.6}
+        if rng.random() < 0.9:
+            response['difficulty'] = rng.choice(['easy', 'medium', 'hard'])
+        if rng.random() < 0.85:
+            response['time_taken'] = rng.choice([rng.uniform(0.1, 600), rng.randint(0, 600)])
+        if rng.random() < 0.9:
+            response['submitted_at'] = (start + timedelta(seconds=rng.randint(0, 10 ** 6))).isoformat()
+        responses.append(response)
+    return responses
+
+def test_matches_reference_exactly():
+    rng = random.Random(9)
+    for candidate_id in range(5000):
+        responses = random_responses(rng)
+        expected = reference_analysis(candidate_id, responses)
+        actual = analyze_behavior(candidate_id, responses)
+        # Compare serialized output so float bits and key order both count
+        assert json.dumps(actual) == json.dumps(expected), responses
+
+def test_batch_matches_single():
+    rng = random.Random(10)
+    candidates = [
+        {'candidate_id': candidate_id, 'responses': random_responses(rng)}
+        for candidate_id in range(200)
+    ]
+    assert analyze_behavior_batch(candidates) == [
+        analyze_behavior(candidate['candidate_id'], candidate['responses'])
+        for candidate in candidates
+    ]
@@ -0,0 +1,44 @@
+"""Code evaluation: batched sandbox runs against one script per test case"""
+
+import os
+import tempfile
+
+import pytest
+
+from evaluation import sandbox
+from evaluation.code_evaluator import _evaluate_batched, _evaluate_per_script
+
+pytestmark = pytest.mark.skipif(not sandbox.is_supported(), reason='sandbox pool needs os.fork')
+
+TEST_CASES = [{'input': {'n': n}, 'output': n} for n in range(4)]
+
+SUBMISSIONS = {
+    'correct': "def f(n):\n    return n\n",
+    'prints_in_function': "def f(n):\n    print('debug', n)\n    return n\n",
+    'prints_on_load': "print('loaded')\ndef f(n):\n    return n\n",
+    'module_state': "calls = []\ndef f(n):\n    calls.append(n)\n    return n if len(calls) == 1 else -1\n",
+    'wrong_type': "def f(n):\n    return str(n)\n",
+    'raises': "def f(n):\n    return 1 // (n - 2) and n\n",
+    'non_literal': "def f(n):\n    return {n} if n else set()\n",
+}
+
+def outcome(result):
+    passed, _, details = result
+    return passed, [(detail['verdict'], repr(detail.get('actual'))) for detail in details]
+
+@pytest.mark.parametrize('name', sorted(SUBMISSIONS))
+def test_batched_matches_per_script(name):
+    cwd = tempfile.gettempdir()
+    code = SUBMISSIONS[name]
+    assert outcome(_evaluate_batched(code, 'f', TEST_CASES, cwd)) == \
+        outcome(_evaluate_per_script(code, 'f', TEST_CASES, cwd))
+
+def test_cases_do_not_share_module_state():
+    passed, _, details = _evaluate_batched(SUBMISSIONS['module_state'], 'f', TEST_CASES, os.getcwd())
+    assert passed == len(TEST_CASES)
+    assert all(detail['verdict'] == 'AC' for detail in details)
+
+def test_printed_output_is_part_of_the_result():
+    passed, _, details = _evaluate_batched(SUBMISSIONS['prints_in_function'], 'f', TEST_CASES, os.getcwd())
+    assert passed == 0
+    assert details[1]['actual'] == 'debug 1\n1'
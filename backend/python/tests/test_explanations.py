@@ -0,0 +1,99 @@
+"""Cached explanations: rebuilt only after updates, expired by TTL"""
+
+import pytest
+
+import app as app_module
+from ai_engine import explanations as explanations_module
+from ai_engine.explanations import ExplanationCache, build_explanation
+
+def scores(total):
+    return {
+        'python': {
+            'skill_score': total, 'accuracy_score': total, 'time_score': total,
+            'learning_score': total, 'total_score': total
+        }
+    }
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(explanations_module, 'time', clock)
+    return clock
+
+@pytest.fixture
+def builds(monkeypatch):
+    calls = []
+
+    def counting_build(scores, behavior=None):
+        calls.append(scores)
+        return build_explanation(scores, behavior)
+
+    monkeypatch.setattr(explanations_module, 'build_explanation', counting_build)
+    return calls
+
+def test_explanations_are_built_once_per_update(clock, builds):
+    cache = ExplanationCache(ttl_seconds=60)
+    cache.update_scores(1, scores(80))
+
+    first = cache.get(1)
+    assert cache.get(1) is first
+    assert len(builds) == 1
+    assert first == build_explanation(scores(80))
+
+    cache.update_behavior(1, {'improvement_trend': 12.5})
+    second = cache.get(1)
+    assert len(builds) == 2
+    assert second['behavioral_highlights'] == ['Improved 12.5% over the assessment']
+
+    cache.invalidate(1)
+    assert cache.get(1) is None
+
+def test_behavior_alone_has_no_explanation(clock):
+    cache = ExplanationCache()
+    cache.update_behavior(1, {'improvement_trend': 20})
+    assert cache.get(1) is None
+    cache.update_scores(1, scores(50))
+    assert cache.get(1)['behavioral_highlights'] == ['Improved 20.0% over the assessment']
+
+def test_entries_expire_after_their_last_update(clock):
+    cache = ExplanationCache(ttl_seconds=60)
+    cache.update_scores(1, scores(70))
+
+    clock.now += 59
+    assert cache.get(1) is not None
+    # Reads do not extend the TTL; updates do
+    cache.update_behavior(1, {})
+    clock.now += 59
+    assert cache.get(1) is not None
+    clock.now += 1
+    assert cache.get(1) is None
+
+def test_least_recently_used_entries_are_evicted(clock):
+    cache = ExplanationCache(max_entries=2)
+    cache.update_scores(1, scores(10))
+    cache.update_scores(2, scores(20))
+    cache.get(1)
+    cache.update_scores(3, scores(30))
+
+    assert cache.get(2) is None
+    assert cache.get(1)['overall_score'] == 10
+    assert cache.get(3)['overall_score'] == 30
+
+def test_route_serves_the_explanation_of_the_last_scoring(monkeypatch):
+    monkeypatch.setattr(app_module, 'explanations', ExplanationCache())
+    client = app_module.app.test_client()
+    assert client.get('/ai/explain/7').status_code == 404
+
+    responses = [{'is_correct': True, 'time_taken': 30, 'difficulty': 'hard', 'domain': 'python'}] * 3
+    result = client.post('/ai/evaluate', json={'candidate_id': 7, 'responses': responses}).get_json()
+
+    response = client.get('/ai/explain/7')
+    assert response.status_code == 200
+    assert response.get_json()['explanation'] == build_explanation(result['scores'])
@@ -0,0 +1,68 @@
+"""Suites with fixture-backed inputs and outputs against the same cases inline"""
+
+import os
+import random
+
+import pytest
+
+from evaluation import code_evaluator, fixtures, problems, sandbox
+from evaluation.code_evaluator import evaluate_code, evaluate_suite
+
+SUBMISSIONS = {
+    'correct': "def solve(xs):\n    return sorted(xs)\n",
+    'wrong_last_item': "def solve(xs):\n    out = sorted(xs)\n    if len(out) > 100:\n        out[-1] += 1\n    return out\n",
+    'truncated': "def solve(xs):\n    return sorted(xs)[:150]\n",
+    'tuple': "def solve(xs):\n    return tuple(sorted(xs))\n",
+    'raises_on_large': "def solve(xs):\n    assert len(xs) < 100, 'too big'\n    return sorted(xs)\n",
+    'prints': "def solve(xs):\n    print(len(xs))\n    return sorted(xs)\n"
+}
+
+def _test_cases():
+    rng = random.Random(23)
+    cases = []
+    for size in (3, 300, 5, 1000):
+        xs = [rng.randint(-10**6, 10**6) for _ in range(size)]
+        cases.append({'input': {'xs': xs}, 'output': sorted(xs)})
+    return cases
+
+@pytest.fixture
+def small_fixtures(monkeypatch, tmp_path):
+    monkeypatch.setattr(fixtures, 'FIXTURE_MIN_BYTES', 256)
+    monkeypatch.setattr(fixtures, 'FIXTURE_CHUNK_ITEMS', 64)
+    monkeypatch.setattr(fixtures, 'FIXTURE_DIR', str(tmp_path))
+    monkeypatch.setattr(code_evaluator, 'get_result_cache', lambda: None)
+
+def _verdicts(result):
+    return result['passed'], [detail['verdict'] for detail in result['details']]
+
+@pytest.mark.parametrize('batched', [True, False])
+@pytest.mark.parametrize('mode', code_evaluator.EVALUATION_MODES)
+@pytest.mark.parametrize('name', sorted(SUBMISSIONS))
+def test_fixture_suite_matches_inline_cases(small_fixtures, monkeypatch, batched, mode, name):
+    if batched and not sandbox.is_supported():
+        pytest.skip('sandbox pool needs os.fork')
+    if not batched:
+        monkeypatch.setattr(sandbox, 'is_supported', lambda: False)
+
+    test_cases = _test_cases()
+    suite = problems.TestSuite('sort', 1, test_cases, 'solve')
+    assert suite.fixture_path is not None
+    assert [ref is not None for ref in suite.call_refs] == [False, True, False, True]
+    assert [ref is not None for ref in suite.expected_refs] == [False, True, False, True]
+
+    code = SUBMISSIONS[name]
+    inline = evaluate_code(code, {'test_cases': test_cases, 'function_name': 'solve'}, mode)
+    from_fixtures = evaluate_suite(code, suite, mode)
+    assert _verdicts(from_fixtures) == _verdicts(inline)
+    # Large values are shown as placeholders, never echoed back
+    for detail, call_ref in zip(from_fixtures['details'], suite.call_refs):
+        if call_ref is not None and 'input' in detail:
+            assert detail['input'] == fixtures.describe(call_ref)
+
+def test_removed_fixture_files_are_rebuilt(small_fixtures):
+    suite = problems.TestSuite('sort', 1, _test_cases(), 'solve')
+    expected = fixtures.load_value(suite.fixture_path, suite.expected_refs[3])
+
+    os.unlink(suite.fixture_path)
+    suite.ensure_fixtures()
+    assert fixtures.load_value(suite.fixture_path, suite.expected_refs[3]) == expected == _test_cases()[3]['output']
@@ -0,0 +1,49 @@
+"""Incremental scoring against calculate_score"""
+
+import json
+import random
+from datetime import datetime, timedelta
+
+from ai_engine.incremental import CandidateScoreState, HalfSplitCounter
+from ai_engine.scoring import calculate_score
+
+def random_responses(rng):
+    """Mostly in submission order, with late arrivals and tied timestamps"""
+    start = datetime(2024, 1, 1)
+    responses = []
+    for idx in range(rng.randint(1, 40)):
+        minute = idx if rng.random() < 0.8 else rng.randint(0, idx)
+        response = {
+            'domain': rng.choice(['python', 'sql']),
+            'is_correct': rng.random() < 0.6,
+            'difficulty': rng.choice(['easy', 'medium', 'hard']),
+            'time_taken': rng.randint(0, 900),
+            'submitted_at': (start + timedelta(minutes=minute)).isoformat()
+        }
+        responses.append(response)
+    return responses
+
+def test_resumed_state_matches_calculate_score():
+    rng = random.Random(6)
+    for _ in range(500):
+        responses = random_responses(rng)
+        state = CandidateScoreState()
+        applied = 0
+        while applied < len(responses):
+            chunk = responses[applied:applied + rng.randint(1, 5)]
+            # Round trip through the serialized form between requests
+            state = CandidateScoreState.from_dict(json.loads(json.dumps(state.to_dict())))
+            state.add_many(chunk)
+            applied += len(chunk)
+
+        assert state.scores() == calculate_score(responses)
+
+def test_half_split_follows_a_late_arrival_back_across_the_midpoint():
+    counter = HalfSplitCounter()
+    for key, is_correct in (('b', True), ('c', False), ('d', False), ('e', True)):
+        counter.add(key, is_correct)
+    assert (counter.first_correct, counter.second_correct) == (1, 1)
+
+    # Sorts first, so 'c' (wrong) is pushed out of the first half
+    counter.add('a', False)
+    assert (counter.first_size, counter.first_correct, counter.second_correct) == (2, 1, 1)
@@ -0,0 +1,111 @@
+"""Role leaderboards against the batch ranking"""
+
+import random
+
+import pytest
+
+from ai_engine import leaderboard as leaderboard_module
+from ai_engine.leaderboard import Leaderboard, LeaderboardRegistry
+from ai_engine.ranking import rank_candidates
+
+def _candidates(rng, count):
+    return [
+        {
+            'candidate_id': candidate_id,
+            # Few distinct scores so ties are common
+            'scores': {
+                'coding': rng.choice([40, 55, 70]),
+                'behavioral': {'total_score': rng.choice([50, 65, 80])}
+            }
+        }
+        for candidate_id in range(count)
+    ]
+
+def _ranks(rows):
+    return [(row['candidate_id'], row['overall_score'], row['rank_position']) for row in rows]
+
+def test_rank_and_range_match_batch_ranking():
+    rng = random.Random(8)
+    candidates = _candidates(rng, 60)
+    board = Leaderboard('Backend')
+    for candidate in candidates:
+        board.upsert(candidate['candidate_id'], scores=candidate['scores'])
+
+    expected = rank_candidates(candidates, 'Backend')
+    assert _ranks(board.range()) == _ranks(expected)
+    assert _ranks(board.range(10, 15)) == _ranks(expected[10:25])
+    assert board.range(100, 5) == []
+    for row in expected:
+        assert board.get(row['candidate_id'])['rank_position'] == row['rank_position']
+
+def test_updates_keep_first_insertion_for_ties():
+    board = Leaderboard('Backend')
+    assert board.upsert(1, overall_score=50) == 1
+    assert board.upsert(2, overall_score=50) == 2
+    assert board.upsert(3, overall_score=90) == 1
+    # Dropping to a tie places candidate 3 by its original insertion order
+    assert board.upsert(3, overall_score=50) == 3
+    assert board.upsert(2, overall_score=95) == 1
+    assert board.remove(2)
+    assert not board.remove(2)
+    assert _ranks(board.range()) == [(1, 50, 1), (3, 50, 2)]
+
+def test_overall_score_is_converted_to_float():
+    board = Leaderboard('Backend')
+    assert board.upsert(1, overall_score='72.456') == 1
+    assert board.get(1)['overall_score'] == 72.46
+    with pytest.raises(ValueError):
+        board.upsert(2, overall_score='high')
+    with pytest.raises(ValueError):
+        board.upsert(2, overall_score=float('nan'))
+    assert len(board) == 1
+
+def test_snapshot_round_trip(tmp_path):
+    rng = random.Random(9)
+    registry = LeaderboardRegistry()
+    for role in ('Backend', 'Frontend'):
+        board = registry.get(role, create=True)
+        for candidate in _candidates(rng, 20):
+            board.upsert(candidate['candidate_id'], scores=candidate['scores'])
+    registry.get('Backend').remove(3)
+
+    path = str(tmp_path / 'leaderboards.json')
+    registry.snapshot(path)
+    restored = LeaderboardRegistry()
+    restored.restore(path)
+
+    assert restored.roles() == registry.roles()
+    for role in ('Backend', 'Frontend'):
+        assert restored.get(role).range() == registry.get(role).range()
+
+    # Sequence numbers survive, so new candidates still rank after ties
+    for board in (registry, restored):
+        board.get('Backend').upsert(100, overall_score=55)
+    assert restored.get('Backend').range() == registry.get('Backend').range()
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(leaderboard_module, '_registry', LeaderboardRegistry())
+    import app
+    return app.app.test_client()
+
+def test_route_rejects_non_numeric_scores_without_partial_updates(client):
+    response = client.post('/ai/leaderboard/Backend/candidates', json={
+        'candidates': [
+            {'candidate_id': 1, 'overall_score': 80},
+            {'candidate_id': 2, 'overall_score': 'eighty'}
+        ]
+    })
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
+    assert client.get('/ai/leaderboard/Backend').get_json()['total'] == 0
+
+    response = client.post('/ai/leaderboard/Backend/candidates', json={
+        'candidates': [
+            {'candidate_id': 1, 'overall_score': '80'},
+            {'candidate_id': 2, 'overall_score': 90}
+        ]
+    })
+    assert response.status_code == 200
+    rankings = client.get('/ai/leaderboard/Backend?offset=1&limit=1').get_json()['rankings']
+    assert _ranks(rankings) == [(1, 80.0, 2)]
@@ -0,0 +1,41 @@
+"""Bulk MCQ grading against the single-answer evaluator"""
+
+import random
+
+import numpy as np
+
+from evaluation.mcq_evaluator import AnswerKeyIndex, evaluate_mcq, evaluate_mcq_bulk
+
+def test_bulk_grading_matches_evaluate_mcq():
+    rng = random.Random(11)
+    options = ['A', 'b', ' C ', 'd\n', 'True', 'false', '42', '']
+    key = [rng.choice(options) for _ in range(25)]
+    index = AnswerKeyIndex('quiz', key)
+
+    answers = []
+    for _ in range(300):
+        row = [rng.choice(options + [None, 'a ', 'B', 7]) for _ in range(rng.randint(0, 30))]
+        answers.append(row)
+
+    graded = index.grade(answers)
+
+    assert graded.shape == (300, 25)
+    for row, answer_row in enumerate(answers):
+        expected = [
+            idx < len(answer_row) and answer_row[idx] is not None
+            and evaluate_mcq(str(answer_row[idx]), correct)['is_correct']
+            for idx, correct in enumerate(key)
+        ]
+        assert graded[row].tolist() == expected
+
+def test_bulk_results_count_correct_answers():
+    index = AnswerKeyIndex('quiz', ['A', 'B', 'C', 'D'])
+
+    results = evaluate_mcq_bulk(index, [['a', ' b', None], ['A', 'B', 'C', 'D', 'E']], [1, 2], include_details=True)
+
+    assert results == [
+        {'candidate_id': 1, 'correct': 2, 'total': 4, 'score': 50.0, 'results': [True, True, False, False]},
+        {'candidate_id': 2, 'correct': 4, 'total': 4, 'score': 100.0, 'results': [True] * 4}
+    ]
+    assert index.grade([]).shape == (0, 4)
+    assert AnswerKeyIndex('empty', []).grade([['A']]).dtype == np.bool_
@@ -0,0 +1,81 @@
+"""Prometheus exposition and per-route request metrics"""
+
+import pytest
+
+import metrics
+from app import app
+from metrics import Registry, estimate_quantile
+
+def _sample_lines(text, name):
+    return [line for line in text.splitlines() if line.startswith(name)]
+
+def test_counters_and_histograms_render_in_the_text_format():
+    registry = Registry()
+    counter = registry.counter('test_events_total', 'Events', ('kind',))
+    histogram = registry.histogram('test_duration_seconds', 'Duration', buckets=(0.1, 1.0))
+    counter.inc('a "quoted"\nkind')
+    counter.inc('plain', amount=2)
+    for value in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(value)
+
+    text = registry.render()
+    assert '# TYPE test_events_total counter' in text
+    assert 'test_events_total{kind="a \\"quoted\\"\\nkind"} 1' in text
+    assert 'test_events_total{kind="plain"} 2' in text
+    assert _sample_lines(text, 'test_duration_seconds_bucket') == [
+        'test_duration_seconds_bucket{le="0.1"} 1',
+        'test_duration_seconds_bucket{le="1"} 3',
+        'test_duration_seconds_bucket{le="+Inf"} 4'
+    ]
+    assert 'test_duration_seconds_sum 6.05' in text
+    assert 'test_duration_seconds_count 4' in text
+    assert '# TYPE test_duration_seconds_quantile gauge' in text
+    assert 'test_duration_seconds_quantile{quantile="0.5"} 0.55' in text
+    assert text.endswith('\n')
+
+def test_quantiles_interpolate_within_buckets():
+    buckets = (1.0, 2.0, 4.0)
+    # 10 observations in (0, 1], 10 in (1, 2], none above
+    counts = [10, 10, 0, 0]
+    assert estimate_quantile(buckets, counts, 20, 0.25) == pytest.approx(0.5)
+    assert estimate_quantile(buckets, counts, 20, 0.75) == pytest.approx(1.5)
+    # Observations beyond the last bound report the largest finite bound
+    assert estimate_quantile(buckets, [0, 0, 0, 5], 5, 0.99) == 4.0
+
+def test_stats_collectors_are_read_on_scrape(monkeypatch):
+    registry = Registry()
+    monkeypatch.setattr(metrics, 'registry', registry)
+    state = {'hits': 3, 'hit_ratio': 0.75, 'enabled': True, 'name': 'x'}
+    metrics.register_stats('test_cache', 'Test cache', lambda: state)
+
+    def broken():
+        raise RuntimeError('collector failed')
+    registry.add_collector(broken)
+
+    text = registry.render()
+    assert 'test_cache_hits 3' in text
+    assert 'test_cache_hit_ratio 0.75' in text
+    assert 'test_cache_enabled' not in text
+    state['hits'] = 4
+    assert 'test_cache_hits 4' in registry.render()
+
+@pytest.mark.skipif(not metrics.METRICS_ENABLED, reason='metrics are disabled')
+def test_requests_are_recorded_by_route_template():
+    client = app.test_client()
+    requests = metrics.REQUEST_COUNT._values
+    explain_key = ('/ai/explain/<int:candidate_id>', 'GET', '404')
+    unmatched_key = ('unmatched', 'GET', '404')
+    before = requests.get(explain_key, 0), requests.get(unmatched_key, 0)
+
+    client.get('/ai/explain/123456')
+    client.get('/ai/explain/654321')
+    client.get('/no/such/route')
+
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.content_type == metrics.CONTENT_TYPE
+    assert (requests[explain_key], requests[unmatched_key]) == (before[0] + 2, before[1] + 1)
+
+    text = response.get_data(as_text=True)
+    assert f'ai_http_requests_total{{route="/ai/explain/<int:candidate_id>",method="GET",status="404"}} {before[0] + 2}' in text
+    assert 'ai_http_request_duration_seconds_quantile{route="/ai/explain/<int:candidate_id>",method="GET",quantile="0.99"}' in text
@@ -0,0 +1,89 @@
+"""Streaming NDJSON scoring and ranking against the JSON routes"""
+
+import json
+import random
+
+import pytest
+
+import app as app_module
+from serialization import NDJSON_MIMETYPE, iter_ndjson
+
+def _candidates(rng, count):
+    return [
+        {
+            'candidate_id': candidate_id,
+            'responses': [
+                {
+                    'is_correct': rng.random() < 0.6,
+                    'time_taken': rng.randint(5, 120),
+                    'difficulty': rng.choice(['easy', 'medium', 'hard']),
+                    'domain': rng.choice(['python', 'sql'])
+                }
+                for _ in range(rng.randint(0, 8))
+            ]
+        }
+        for candidate_id in range(count)
+    ]
+
+def _ndjson(records):
+    return ''.join(json.dumps(record) + '\n' for record in records)
+
+def _lines(response):
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+@pytest.fixture
+def client(monkeypatch):
+    # Several chunks per response
+    monkeypatch.setattr(app_module, 'STREAM_BATCH_SIZE', 3)
+    return app_module.app.test_client()
+
+def test_iter_ndjson_skips_blank_lines_and_reports_bad_ones():
+    assert list(iter_ndjson([b'{"a": 1}\n', b'\n', '{"b": 2}'])) == [{'a': 1}, {'b': 2}]
+    with pytest.raises(ValueError, match='Line 2 is not a JSON object'):
+        list(iter_ndjson(['{"a": 1}', '[1]']))
+    with pytest.raises(ValueError, match='Invalid JSON on line 1'):
+        list(iter_ndjson(['{"a": ']))
+
+def test_streamed_scores_match_the_batch_route(client):
+    candidates = _candidates(random.Random(15), 10)
+    expected = client.post('/ai/evaluate/batch', json={'candidates': candidates}).get_json()['results']
+
+    response = client.post('/ai/evaluate/stream', data=_ndjson(candidates), content_type=NDJSON_MIMETYPE)
+    assert response.mimetype == NDJSON_MIMETYPE
+    assert _lines(response) == expected
+
+    response = client.post('/ai/evaluate/stream', json={'candidates': candidates})
+    assert _lines(response) == expected
+
+def test_a_bad_line_ends_the_stream_with_an_error(client):
+    candidates = _candidates(random.Random(16), 4)
+    body = _ndjson(candidates[:3]) + 'not json\n' + _ndjson(candidates[3:])
+
+    lines = _lines(client.post('/ai/evaluate/stream', data=body, content_type=NDJSON_MIMETYPE))
+    assert [line['candidate_id'] for line in lines[:-1]] == [0, 1, 2]
+    assert lines[-1] == {'success': False, 'message': 'Invalid JSON on line 4'}
+
+@pytest.mark.parametrize('top_k, offset', [(5, 0), (4, 3), (10, 25), (0, 0)])
+def test_streamed_ranking_matches_the_rank_route(client, top_k, offset):
+    rng = random.Random(17)
+    candidates = [
+        {'candidate_id': idx, 'scores': {'python': rng.choice([40, 60, 80]), 'sql': rng.choice([50, 70])}}
+        for idx in range(30)
+    ]
+    expected = client.post('/ai/rank', json={
+        'candidates': candidates, 'role_match': 'Data', 'top_k': top_k, 'offset': offset
+    }).get_json()['rankings']
+
+    response = client.post(
+        f'/ai/rank/stream?role_match=Data&top_k={top_k}&offset={offset}',
+        data=_ndjson(candidates), content_type=NDJSON_MIMETYPE,
+        headers={'Accept-Encoding': 'gzip'}
+    )
+    assert response.status_code == 200
+    assert response.headers['X-Total-Count'] == '30'
+    assert 'Content-Encoding' not in response.headers
+    assert (_lines(response) if response.data else []) == expected
+
+def test_ranking_stream_requires_top_k(client):
+    response = client.post('/ai/rank/stream', data='', content_type=NDJSON_MIMETYPE)
+    assert response.status_code == 400
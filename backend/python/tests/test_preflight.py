@@ -0,0 +1,60 @@
+"""Pre-flight rejection before submissions reach the sandbox"""
+
+import json
+import marshal
+
+import pytest
+
+import metrics
+from evaluation import code_evaluator
+from evaluation.preflight import preflight
+
+def test_resolves_the_entry_point_and_compiles_once():
+    check = preflight("def helper(x):\n    return x\n\ndef solve(n):\n    return helper(n)\n")
+    assert check.ok
+    assert check.function_name == 'solve'
+    namespace = {}
+    exec(marshal.loads(check.bytecode), namespace)
+    assert namespace['solve'](3) == 3
+
+def test_missing_entry_point_is_rejected():
+    check = preflight("def solve(n):\n    return n\n", 'answer')
+    assert not check.ok
+    assert check.reason == 'entry_point'
+    assert "'answer'" in check.error
+
+@pytest.mark.parametrize('code', [
+    "import socket\ndef f(n):\n    return n\n",
+    "def f(n):\n    from socket import socket\n    return n\n",
+    "def f(n):\n    return __import__('socket') and n\n",
+    "import os.path, socket.timeout\ndef f(n):\n    return n\n"
+])
+def test_blocked_imports_are_rejected_anywhere(code):
+    check = preflight(code)
+    assert not check.ok
+    assert check.reason == 'import'
+    assert check.error == 'Import of socket is not allowed'
+
+def test_syntax_errors_report_the_line():
+    check = preflight("def f(n):\n    return n +\n")
+    assert check.reason == 'syntax'
+    assert '(line 2)' in check.error
+
+def test_rejections_are_counted_and_skip_the_sandbox(monkeypatch):
+    rejections = metrics.PREFLIGHT_REJECTIONS
+    before = rejections._values.get(('import',), 0)
+
+    def fail(*args, **kwargs):
+        raise AssertionError('rejected code must not be executed')
+    monkeypatch.setattr(code_evaluator, '_evaluate_batched', fail)
+    monkeypatch.setattr(code_evaluator, '_evaluate_per_script', fail)
+    monkeypatch.setattr(code_evaluator, 'get_result_cache', lambda: None)
+
+    test_cases = json.dumps({'test_cases': [{'input': {'n': 1}, 'output': 1}, {'input': {'n': 2}, 'output': 2}]})
+    result = code_evaluator.evaluate_code("import socket\ndef f(n):\n    return n\n", test_cases)
+
+    assert not result['is_correct']
+    assert result['total'] == 2
+    assert [detail['verdict'] for detail in result['details']] == ['CE', 'CE']
+    assert result['errors'] == ['Rejected before execution - Import of socket is not allowed']
+    assert rejections._values[('import',)] == before + 1
@@ -0,0 +1,56 @@
+"""Versioned problem registry"""
+
+import pytest
+
+import storage
+from storage import Storage
+from evaluation.problems import ProblemNotFoundError, ProblemRegistry, parse_reference
+
+SUITE = [{'input': {'a': 1, 'b': 2}, 'output': 3}]
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def registry(request, tmp_path, monkeypatch):
+    db = None
+    if request.param == 'sqlite':
+        db = Storage('sqlite', sqlite_path=str(tmp_path / 'ai_service.db'))
+    monkeypatch.setattr(storage, '_storage', db)
+    yield ProblemRegistry(max_entries=2)
+    if db is not None:
+        db.close()
+
+def test_new_content_creates_the_next_version(registry):
+    first, created = registry.register('add', SUITE, 'add')
+    assert (first.version, created) == (1, True)
+
+    same, created = registry.register('add', SUITE, 'add')
+    assert (same.version, created) == (1, False)
+
+    second, created = registry.register('add', SUITE + [{'input': {'a': 0, 'b': 0}, 'output': 0}], 'add')
+    assert (second.version, created) == (2, True)
+    assert [entry['version'] for entry in registry.versions('add')] == [1, 2]
+
+def test_references_resolve_versions(registry):
+    registry.register('add', SUITE)
+    registry.register('add', SUITE, 'add')
+
+    assert registry.resolve('add').version == 2
+    assert registry.resolve('add@latest').version == 2
+    assert registry.resolve('add@1').function_name is None
+    with pytest.raises(ProblemNotFoundError):
+        registry.resolve('add@3')
+    with pytest.raises(ProblemNotFoundError):
+        registry.resolve('missing')
+
+def test_invalid_suites_and_references_are_rejected(registry):
+    with pytest.raises(ValueError):
+        registry.register('bad id', SUITE)
+    with pytest.raises(ValueError):
+        registry.register('add', [{'input': {}}])
+    with pytest.raises(ValueError):
+        registry.register('add', SUITE, 'not-an-identifier')
+    for key in ('not-an-identifier', 'class', 1):
+        with pytest.raises(ValueError, match='input key'):
+            registry.register('add', [{'input': {key: 1}, 'output': 1}])
+    with pytest.raises(ValueError):
+        parse_reference('add@0')
+    assert parse_reference('add@12') == ('add', 12)
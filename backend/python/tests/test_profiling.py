@@ -0,0 +1,60 @@
+"""Request profiling and the token-protected admin endpoints"""
+
+import marshal
+
+import pytest
+
+import profiling
+from app import app
+
+TOKEN = 'test-admin-token'
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(profiling, 'PROFILE_ADMIN_TOKEN', TOKEN)
+    monkeypatch.setattr(profiling, 'profiles', profiling.ProfileStore(10))
+    return app.test_client()
+
+@pytest.mark.parametrize('headers', [{}, {'X-Admin-Token': ''}, {'X-Admin-Token': 'wrong'}])
+def test_admin_endpoints_require_the_token(client, headers):
+    for method, path in (('GET', '/admin/profiles'), ('DELETE', '/admin/profiles'), ('GET', '/admin/profiles/1-1')):
+        response = client.open(path, method=method, headers=headers)
+        assert response.status_code == 403
+        assert response.get_json() == {'success': False, 'message': 'Invalid admin token'}
+
+def test_admin_endpoints_are_closed_without_a_configured_token(client, monkeypatch):
+    monkeypatch.setattr(profiling, 'PROFILE_ADMIN_TOKEN', '')
+    assert client.get('/admin/profiles', headers={'X-Admin-Token': ''}).status_code == 403
+
+def test_profile_header_needs_the_token(client):
+    response = client.get('/health', headers={'X-Profile': 'cprofile'})
+    assert 'X-Profile-Id' not in response.headers
+    assert client.get('/admin/profiles', headers={'X-Admin-Token': TOKEN}).get_json()['profiles'] == []
+
+def test_cprofile_capture_round_trip(client):
+    admin = {'X-Admin-Token': TOKEN}
+    response = client.get('/health', headers={'X-Profile': 'cprofile', **admin})
+    profile_id = response.headers['X-Profile-Id']
+
+    listed = client.get('/admin/profiles', headers=admin).get_json()['profiles']
+    assert [(entry['id'], entry['route'], entry['mode'], entry['trigger']) for entry in listed] == \
+        [(profile_id, '/health', 'cprofile', 'header')]
+
+    report = client.get(f'/admin/profiles/{profile_id}', headers=admin).get_json()['profile']['report']
+    assert 'function calls' in report
+    stats = marshal.loads(client.get(f'/admin/profiles/{profile_id}?format=pstats', headers=admin).data)
+    assert any(name == 'health_check' for _, _, name in stats)
+
+    assert client.delete('/admin/profiles', headers=admin).get_json()['cleared'] == 1
+    assert client.get(f'/admin/profiles/{profile_id}', headers=admin).status_code == 404
+
+def test_stack_capture_serves_folded_stacks(client):
+    admin = {'X-Admin-Token': TOKEN}
+    profile_id = client.get('/health', headers={'X-Profile': 'stack', **admin}).headers['X-Profile-Id']
+
+    response = client.get(f'/admin/profiles/{profile_id}?format=folded', headers=admin)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    for line in response.get_data(as_text=True).splitlines():
+        stack, count = line.rsplit(' ', 1)
+        assert stack and int(count) > 0
@@ -0,0 +1,40 @@
+"""Top-K and paginated ranking against the full ranking"""
+
+import random
+
+import pytest
+
+from ai_engine.ranking import rank_candidates
+
+def _candidates(rng, count):
+    return [
+        {
+            'candidate_id': candidate_id,
+            # Few distinct scores so ties are common
+            'scores': {
+                'coding': {'total_score': rng.choice([40, 55, 70, 85])},
+                'behavioral': rng.choice([50, 65.555, 80])
+            }
+        }
+        for candidate_id in range(count)
+    ]
+
+@pytest.mark.parametrize('top_k, offset', [
+    (None, 0), (None, 7), (0, 0), (1, 0), (10, 0), (10, 25), (10, 95), (200, 0), (5, 150)
+])
+def test_pages_match_slices_of_the_full_ranking(top_k, offset):
+    candidates = _candidates(random.Random(7), 100)
+    full = rank_candidates(candidates, 'Backend')
+    stop = None if top_k is None else offset + top_k
+    assert rank_candidates(candidates, 'Backend', top_k=top_k, offset=offset) == full[offset:stop]
+
+def test_ties_keep_input_order():
+    candidates = [{'candidate_id': idx, 'scores': {'coding': 50}} for idx in range(5)]
+    candidates.append({'candidate_id': 5, 'scores': {'coding': 90}})
+    ranked = rank_candidates(candidates, top_k=3)
+    assert [row['candidate_id'] for row in ranked] == [5, 0, 1]
+    assert [row['rank_position'] for row in ranked] == [1, 2, 3]
+
+def test_accepts_a_generator_of_candidates():
+    candidates = _candidates(random.Random(8), 30)
+    assert rank_candidates(iter(candidates), top_k=5, offset=3) == rank_candidates(candidates)[3:8]
@@ -0,0 +1,37 @@
+"""Code evaluation result cache keys and LRU"""
+
+from evaluation.result_cache import ResultCache, make_cache_key, normalize_source
+
+TEST_CASES = [{'input': {'n': 1}, 'output': 1}]
+
+def test_key_ignores_trivial_source_differences():
+    code = "def f(n):\n    return n\n"
+    assert make_cache_key(code, TEST_CASES) == make_cache_key("\r\n" + code.replace('\n', '  \r\n'), TEST_CASES)
+    assert normalize_source("\n\nx = 1   \r\ny = 2\r\n\n") == "x = 1\ny = 2"
+
+def test_key_changes_with_code_cases_and_extra_values():
+    code = "def f(n):\n    return n\n"
+    key = make_cache_key(code, TEST_CASES)
+
+    assert key != make_cache_key("def f(n):\n    return n + 0\n", TEST_CASES)
+    assert key != make_cache_key(code, [{'input': {'n': 1}, 'output': 2}])
+    assert key != make_cache_key(code, TEST_CASES, 'parallel')
+    assert make_cache_key(code, TEST_CASES, 'parallel') != make_cache_key(code, TEST_CASES, 'fail_fast')
+
+def test_key_does_not_depend_on_dictionary_order():
+    code = "def f(a, b):\n    return a\n"
+    assert make_cache_key(code, [{'input': {'a': 1, 'b': 2}, 'output': 1}]) == \
+        make_cache_key(code, [{'output': 1, 'input': {'b': 2, 'a': 1}}])
+
+def test_lru_returns_copies_and_spills_evicted_entries(tmp_path):
+    cache = ResultCache(max_entries=1, spill_dir=str(tmp_path))
+    cache.put('a', {'passed': 1})
+    cache.get('a')['passed'] = 99
+    assert cache.get('a') == {'passed': 1}
+
+    cache.put('b', {'passed': 2})
+    assert cache.get('a') == {'passed': 1}
+    assert cache.get('missing') is None
+
+    stats = cache.stats()
+    assert (stats['hits'], stats['disk_hits'], stats['misses'], stats['evictions']) == (2, 1, 1, 2)
@@ -0,0 +1,157 @@
+"""Sandbox pool and worker protocol"""
+
+import json
+import os
+import time
+
+import pytest
+
+from evaluation import sandbox, sandbox_worker
+
+pytestmark = pytest.mark.skipif(not sandbox.is_supported(), reason='sandbox pool needs os.fork')
+
+SLOW_CODE = "import time\ndef f(seconds):\n    time.sleep(seconds)\n    return seconds\n"
+
+def batch_request(cases, timeout=2):
+    return {
+        'op': 'batch',
+        'code': SLOW_CODE,
+        'function': 'f',
+        'cases': cases,
+        'timeout': timeout,
+        'limits': sandbox.execution_limits(timeout)
+    }
+
+def test_stop_sent_with_the_request_ends_the_batch():
+    # Both lines reach the worker in one read, so the stop is already
+    # buffered when the batch starts watching for it
+    worker = sandbox._Worker()
+    try:
+        request = batch_request([{'args': [0.5]} for _ in range(10)])
+        worker.process.stdin.write(
+            json.dumps(request).encode('utf-8') + b'\n' + json.dumps({'op': 'stop'}).encode('utf-8') + b'\n'
+        )
+        worker.process.stdin.flush()
+
+        start = time.monotonic()
+        messages = []
+        while True:
+            message = worker.receive(time.monotonic() + 10)
+            if message.get('done'):
+                break
+            messages.append(message)
+        assert time.monotonic() - start < 2
+        assert len(messages) < 10
+    finally:
+        worker.close()
+
+def test_worker_is_reused_after_closing_a_stream_early():
+    pool = sandbox.SandboxPool(1)
+    try:
+        stream = pool.stream_batch(SLOW_CODE, 'f', [{'args': [0.01]}] + [{'args': [0.3]}] * 5, timeout=1)
+        assert next(stream)['status'] == 'ok'
+        stream.close()
+
+        results = pool.run_batch(SLOW_CODE, 'f', [{'args': [0]}], timeout=1)
+        assert results[0]['result'] == '0'
+        assert pool.stats()['replaced'] == 0
+    finally:
+        pool.shutdown()
+
+def test_fast_cases_are_not_mistaken_for_a_hung_child():
+    # Several results can arrive in one read of the result pipe
+    pool = sandbox.SandboxPool(1)
+    try:
+        results = pool.run_batch("def f(n):\n    return n * 2\n", 'f', [{'args': [n]} for n in range(200)], timeout=1)
+        assert [result['result'] for result in results] == [repr(n * 2) for n in range(200)]
+    finally:
+        pool.shutdown()
+
+def test_scripts_report_output_exit_codes_and_timeouts():
+    pool = sandbox.SandboxPool(1)
+    try:
+        results = pool.run_scripts(["print(1 + 1)", "import sys; sys.exit(3)", "while True: pass"], timeout=1)
+    finally:
+        pool.shutdown()
+
+    assert results[0] == {'status': 'ok', 'returncode': 0, 'stdout': '2\n', 'stderr': ''}
+    assert results[1]['returncode'] == 3
+    assert results[2] == {'status': 'timeout'}
+
+def test_suite_cases_are_sent_once_per_worker():
+    pool = sandbox.SandboxPool(1, suite_cache_size=4)
+    code = "def f(n):\n    return n + 1\n"
+    try:
+        first = pool.run_batch(code, 'f', [{'args': [n]} for n in range(3)], timeout=1, suite_id='suite')
+        # Same suite ID: the pool leaves the cases out and the worker uses its copy
+        second = pool.run_batch(code, 'f', [{'args': [100]}] * 3, timeout=1, suite_id='suite')
+    finally:
+        pool.shutdown()
+
+    assert [result['result'] for result in first] == ['1', '2', '3']
+    assert second == first
+
+def test_parallel_ranges_keep_case_order():
+    pool = sandbox.SandboxPool(2)
+    code = "def f(n):\n    return -n\n"
+    try:
+        results = pool.run_batch(code, 'f', [{'args': [n]} for n in range(7)], timeout=1, parallelism=2)
+    finally:
+        pool.shutdown()
+
+    assert [(result['case'], result['result']) for result in results] == [(n, repr(-n)) for n in range(7)]
+
+@pytest.mark.skipif(os.geteuid() != 0, reason='switching to the sandbox user needs root')
+def test_process_limit_holds_under_the_sandbox_uid(monkeypatch):
+    fork_case = (
+        "import os\n"
+        "def f():\n"
+        "    try:\n"
+        "        pid = os.fork()\n"
+        "    except OSError:\n"
+        "        return 'blocked'\n"
+        "    if pid == 0:\n"
+        "        os._exit(0)\n"
+        "    os.waitpid(pid, 0)\n"
+        "    return 'forked'\n"
+    )
+    monkeypatch.setattr(sandbox, 'sandbox_uid_base', lambda: 1000000000)
+    pool = sandbox.SandboxPool(1)
+    try:
+        batch = pool.run_batch(fork_case, 'f', [{}] * 2, timeout=2)
+        script = pool.run_scripts([fork_case + "import os\nprint(f(), os.getuid() != 0)\n"], timeout=2)
+    finally:
+        pool.shutdown()
+
+    assert [result['result'] for result in batch] == ["'blocked'", "'blocked'"]
+    assert script[0]['stdout'] == 'blocked True\n'
+
+def test_batches_run_as_an_unprivileged_service_user():
+    # As a regular user RLIMIT_NPROC would count the service's own processes
+    # and stop the batch from forking its case processes
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        exit_code = 1
+        try:
+            os.close(read_fd)
+            if os.geteuid() == 0:
+                os.setgid(65534)
+                os.setuid(65534)
+            stop_read, _ = os.pipe()
+            sandbox_worker.requests = sandbox_worker.LineReader(stop_read)
+            results = list(sandbox_worker.run_batch(
+                "def f(x):\n    return x * 2\n", 'f', [{'args': [n]} for n in range(3)],
+                2, '/tmp', sandbox.execution_limits(2), os.open(os.devnull, os.O_WRONLY)
+            ))
+            os.write(write_fd, json.dumps(results).encode('utf-8'))
+            exit_code = 0
+        finally:
+            os._exit(exit_code)
+
+    os.close(write_fd)
+    with os.fdopen(read_fd, 'rb') as reader:
+        output = reader.read()
+    os.waitpid(pid, 0)
+
+    assert [result['result'] for result in json.loads(output)] == ['0', '2', '4']
@@ -0,0 +1,67 @@
+"""Content negotiation and compression on the wire"""
+
+import gzip
+
+import pytest
+from flask import Flask, jsonify
+from werkzeug.datastructures import MIMEAccept
+from werkzeug.http import parse_accept_header
+
+import serialization
+from serialization import gzip_body, negotiate_mimetype
+
+msgpack = pytest.importorskip('msgpack')
+
+def _accept(header):
+    return parse_accept_header(header, MIMEAccept)
+
+@pytest.mark.parametrize('header, expected', [
+    ('application/msgpack', 'application/msgpack'),
+    ('application/x-msgpack', 'application/x-msgpack'),
+    ('application/json, application/x-msgpack;q=0.5', 'application/json'),
+    ('*/*', 'application/json'),
+    (None, 'application/json')
+])
+def test_negotiates_the_type_the_client_named(header, expected):
+    assert negotiate_mimetype(_accept(header)) == expected
+
+@pytest.mark.parametrize('header, compressed', [
+    ('gzip', True),
+    ('deflate, GZIP;q=0.5', True),
+    ('*', True),
+    ('gzip;q=0', False),
+    ('*;q=0, identity', False),
+    ('deflate', False),
+    (None, False)
+])
+def test_gzip_honours_accept_encoding_qualities(monkeypatch, header, compressed):
+    monkeypatch.setattr(serialization, 'RESPONSE_GZIP_MIN_BYTES', 1)
+    data = b'x' * 100
+    body, was_compressed = gzip_body(data, header)
+    assert was_compressed is compressed
+    assert (gzip.decompress(body) if compressed else body) == data
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    serialization.init_app(app)
+    app.debug = True
+
+    @app.route('/payload')
+    def payload():
+        return jsonify({'b': [1, 2], 'a': 'x'})
+
+    return app.test_client()
+
+def test_debug_mode_keeps_the_configured_json_encoder(client):
+    response = client.get('/payload')
+    assert response.mimetype == 'application/json'
+    if serialization.USE_ORJSON:
+        assert response.data == b'{"a":"x","b":[1,2]}\n'
+    else:
+        assert response.get_json() == {'a': 'x', 'b': [1, 2]}
+
+def test_answers_with_the_requested_msgpack_type(client):
+    response = client.get('/payload', headers={'Accept': 'application/x-msgpack'})
+    assert response.mimetype == 'application/x-msgpack'
+    assert msgpack.unpackb(response.data) == {'a': 'x', 'b': [1, 2]}
@@ -0,0 +1,85 @@
+"""SQLite storage and the best-effort write helpers"""
+
+import pytest
+
+import metrics
+import storage
+from storage import Storage, store_scores
+
+@pytest.fixture
+def db(tmp_path):
+    db = Storage('sqlite', sqlite_path=str(tmp_path / 'ai_service.db'), pool_size=2)
+    yield db
+    db.close()
+
+def scores(total):
+    return {
+        'python': {
+            'skill_score': total, 'accuracy_score': total, 'time_score': total,
+            'learning_score': total, 'total_score': total
+        }
+    }
+
+def test_responses_of_one_assessment_append_in_order(db):
+    responses = [
+        {'assessment_id': 7, 'domain': 'python', 'is_correct': idx % 2 == 0, 'time_taken': idx + 0.5}
+        for idx in range(3)
+    ]
+    db.save_responses(1, responses[:2])
+    db.save_responses(1, responses[2:])
+
+    assert db.load_responses(1) == responses
+    assert db.load_responses(1, domain='sql') == []
+
+def test_bulk_replace_keeps_other_candidates(db):
+    db.save_responses(1, [{'is_correct': True}])
+    db.save_responses(2, [{'is_correct': True}])
+
+    db.replace_responses_bulk([
+        {'candidate_id': 1, 'responses': [{'assessment_id': 3, 'is_correct': False}] * 2}
+    ])
+
+    assert db.load_responses(1) == [{'assessment_id': 3, 'domain': 'general', 'is_correct': False}] * 2
+    assert db.load_responses(2) == [{'domain': 'general', 'is_correct': True}]
+
+def test_scores_upsert_and_load_by_role(db):
+    db.save_scores_bulk([{'candidate_id': 1, 'scores': scores(10.0)}, {'candidate_id': 2, 'scores': scores(20.0)}])
+    db.save_scores(1, scores(30.0))
+    db.assign_role([2, 1, 1], 'Backend')
+
+    assert db.load_scores([2, 3, 1]) == [
+        {'candidate_id': 2, 'scores': scores(20.0)},
+        {'candidate_id': 1, 'scores': scores(30.0)}
+    ]
+    assert [c['candidate_id'] for c in db.load_role_scores('Backend')] == [1, 2]
+    assert db.load_role_scores('Frontend') == []
+
+def test_saving_scores_drops_domains_no_longer_scored(db):
+    both = {**scores(10.0), 'sql': scores(40.0)['python']}
+    db.save_scores_bulk([{'candidate_id': 1, 'scores': both}, {'candidate_id': 2, 'scores': both}])
+    db.save_scores_bulk([{'candidate_id': 1, 'scores': scores(30.0)}])
+
+    assert db.load_scores([1, 2]) == [
+        {'candidate_id': 1, 'scores': scores(30.0)},
+        {'candidate_id': 2, 'scores': both}
+    ]
+
+def test_problem_suite_versions_are_unique(db):
+    db.save_problem_suite('sum', 1, 'digest', None, '[]', 1.0)
+    with pytest.raises(Exception):
+        db.save_problem_suite('sum', 1, 'other', None, '[]', 2.0)
+
+    assert db.load_problem_suite('sum') == (1, 'digest', None, '[]', 1.0)
+    assert db.load_problem_versions('sum') == [(1, 'digest', 1.0)]
+
+def test_failed_side_effect_writes_are_counted_not_raised(monkeypatch):
+    class BrokenStorage:
+        def save_scores_bulk(self, results):
+            raise RuntimeError('database is down')
+
+    monkeypatch.setattr(storage, '_storage', BrokenStorage())
+    before = metrics.STORAGE_WRITE_FAILURES._values.get(('scores',), 0)
+
+    store_scores([{'candidate_id': 1, 'scores': scores(1.0)}])
+
+    assert metrics.STORAGE_WRITE_FAILURES._values[('scores',)] == before + 1
@@ -0,0 +1,74 @@
+"""Streaming behavioral state against the batch analyzer"""
+
+import random
+
+import pytest
+
+import metrics
+from ai_engine.behavioral import calculate_adaptability
+from ai_engine.streaming import CandidateBehaviorState, EventBatchError, OnlineBehaviorAnalyzer
+
+def test_adaptability_matches_batch():
+    rng = random.Random(10)
+    for _ in range(2000):
+        responses = [
+            {
+                'is_correct': rng.random() < 0.6,
+                'difficulty': rng.choice(['easy', 'medium', 'hard'])
+            }
+            for _ in range(rng.randint(0, 30))
+        ]
+        for response in responses:
+            if rng.random() < 0.1:
+                del response['difficulty']
+
+        state = CandidateBehaviorState()
+        for response in responses:
+            state.add(response)
+        assert state.adaptability()[0] == calculate_adaptability(responses)
+
+def test_rejects_difficulties_the_batch_analyzer_rejects():
+    state = CandidateBehaviorState()
+    with pytest.raises(KeyError):
+        calculate_adaptability([{'is_correct': True, 'difficulty': 'expert'}])
+    with pytest.raises(ValueError):
+        state.add({'is_correct': True, 'difficulty': 'expert'})
+    assert state.total == 0
+
+def test_drain_counts_dropped_events():
+    failures = metrics.BEHAVIOR_STREAM_FAILURES
+    before = dict(failures._values)
+
+    analyzer = OnlineBehaviorAnalyzer()
+    analyzer.publish({'candidate_id': 1, 'is_correct': True, 'difficulty': 'expert'})
+    analyzer.publish({'candidate_id': 1, 'is_correct': True, 'difficulty': 'easy'})
+    analyzer.events.join()
+
+    assert failures._values[('ValueError',)] == before.get(('ValueError',), 0) + 1
+    assert analyzer.snapshot(1)['response_pattern']['total_responses'] == 1
+
+def test_json_batches_are_all_or_nothing():
+    analyzer = OnlineBehaviorAnalyzer()
+    with pytest.raises(EventBatchError) as excinfo:
+        analyzer.consume_many([
+            {'candidate_id': 1, 'is_correct': True},
+            {'candidate_id': 2, 'is_correct': True, 'time_taken': 'slow'}
+        ])
+    assert excinfo.value.consumed == 0
+    assert str(excinfo.value).startswith('Event 1:')
+    assert analyzer.snapshot(1) is None
+    assert analyzer.snapshot(2) is None
+
+def test_ndjson_reports_events_applied_before_a_bad_line():
+    analyzer = OnlineBehaviorAnalyzer()
+    lines = [
+        b'{"candidate_id": 1, "is_correct": true}\n',
+        b'\n',
+        b'{"candidate_id": 1, "difficulty": "expert"}\n',
+        b'{"candidate_id": 1, "is_correct": true}\n'
+    ]
+    with pytest.raises(EventBatchError) as excinfo:
+        analyzer.consume_ndjson(lines)
+    assert excinfo.value.consumed == 1
+    assert str(excinfo.value).startswith('Line 3:')
+    assert analyzer.snapshot(1)['response_pattern']['total_responses'] == 1